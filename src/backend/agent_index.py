@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+import weakref
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .client import run_sync
+
+logger = logging.getLogger("agent-index")
+
+# 인덱스 적재 시 한 페이지로 가져올 에이전트 수 (Agents API 최대 100)
+AGENT_INDEX_PAGE_SIZE = int(os.getenv("AGENT_INDEX_PAGE_SIZE", "100"))
+
+
+class StaleAgentError(Exception):
+    """인덱스에 있던 에이전트 ID가 더 이상 존재하지 않을 때 발생합니다."""
+
+    def __init__(self, agent_id: str):
+        super().__init__(f"Agent {agent_id} no longer exists")
+        self.agent_id = agent_id
+
+
+class AgentIndex:
+    """
+    에이전트 이름 → ID 인덱스.
+    처음 필요할 때 전체 목록을 페이지 단위로 한 번만 적재하고,
+    이후에는 에이전트 생성/삭제 API와 실행 실패(삭제된 ID) 시점에 갱신합니다.
+    같은 이름의 에이전트가 여러 개면 목록 순서(최신순)상 첫 번째를 사용합니다.
+    add/remove 시 on_change로 등록한 콜백(에이전트 목록 캐시 무효화 등)을 호출합니다.
+    """
+
+    def __init__(self):
+        self._by_name: Dict[str, str] = {}
+        self._listeners: List[Callable[[], None]] = []
+        self._loaded = False
+        # 적재(목록 조회) 중에 생성/삭제 API로 반영된 변경 (조회가 끝나면 목록 위에 순서대로 다시 적용)
+        self._changes_during_load: Optional[List[Tuple[str, Optional[str], str]]] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # 이름별 생성 락은 사용 중일 때만 유지
+        self._name_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # 락은 이벤트 루프에 묶여 있으므로 루프가 바뀌면(테스트 클라이언트 등) 새로 만듭니다.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._name_locks = weakref.WeakValueDictionary()
+            self._loop = loop
+        return self._lock
+
+    def name_lock(self, name: str) -> asyncio.Lock:
+        """
+        같은 이름의 에이전트를 동시에 여러 개 만들지 않도록 이름별 락을 반환합니다.
+        락을 잡은 뒤 get()으로 다시 확인하고, 없을 때만 생성하세요.
+        """
+        self._get_lock()
+        lock = self._name_locks.get(name)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._name_locks[name] = lock
+        return lock
+
+    @staticmethod
+    def _list_all(client) -> Dict[str, str]:
+        by_name: Dict[str, str] = {}
+        # ItemPaged는 순회하면서 다음 페이지를 요청함
+        for agent in client.list(limit=AGENT_INDEX_PAGE_SIZE):
+            if agent.name:
+                by_name.setdefault(agent.name, agent.id)
+        return by_name
+
+    async def ensure_loaded(self, client):
+        if self._loaded:
+            return
+        async with self._get_lock():
+            if self._loaded:
+                return
+            self._changes_during_load = []
+            try:
+                by_name = await run_sync(self._list_all, client)
+                # 새 목록이 기준이며, 조회를 시작한 뒤 이 프로세스에서 생긴 변경만 그 위에 다시 적용
+                for op, name, agent_id in self._changes_during_load:
+                    if op == "add":
+                        by_name[name] = agent_id
+                    else:
+                        by_name = {n: aid for n, aid in by_name.items() if aid != agent_id}
+            finally:
+                self._changes_during_load = None
+            self._by_name = by_name
+            self._loaded = True
+            logger.info(f"에이전트 인덱스 적재 완료: {len(self._by_name)}개")
+
+    def get(self, name: str) -> Optional[str]:
+        return self._by_name.get(name)
+
+    def on_change(self, listener: Callable[[], None]):
+        """에이전트가 생성되거나 삭제되었을 때 호출할 콜백을 등록합니다."""
+        self._listeners.append(listener)
+
+    def _notify(self):
+        for listener in self._listeners:
+            listener()
+
+    def add(self, name: Optional[str], agent_id: str):
+        if name:
+            self._by_name[name] = agent_id
+            if self._changes_during_load is not None:
+                self._changes_during_load.append(("add", name, agent_id))
+        self._notify()
+
+    def remove(self, agent_id: str):
+        for name in [n for n, aid in self._by_name.items() if aid == agent_id]:
+            del self._by_name[name]
+        if self._changes_during_load is not None:
+            self._changes_during_load.append(("remove", None, agent_id))
+        self._notify()
+
+    def clear(self):
+        self._by_name = {}
+        self._loaded = False
+
+
+agent_index = AgentIndex()
@@ -0,0 +1,70 @@
+"""
+동기 SDK 호출 오프로딩 전/후의 동시 요청 처리량 비교 벤치마크.
+
+실제 Azure 대신 호출마다 고정 지연(time.sleep)이 있는 가짜 Agents 클라이언트를 사용합니다.
+- blocking: 이전 구현처럼 async 핸들러 안에서 SDK를 직접 호출 (이벤트 루프 차단)
+- offload : run_sync로 전용 스레드 풀에서 SDK 호출
+
+실행: python -m src.backend.benchmarks.bench_sdk_offload [--requests 64] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from src.backend.main import app
+from src.backend.routers import threads
+
+
+class FakeThreads:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def get(self, thread_id):
+        time.sleep(self.latency)  # 네트워크 왕복을 흉내내는 동기 지연
+        return SimpleNamespace(id=thread_id, metadata={}, created_at=0)
+
+
+async def run_inline(fn, *args, **kwargs):
+    # 변경 전 동작: 이벤트 루프에서 동기 호출을 그대로 실행
+    return fn(*args, **kwargs)
+
+
+async def measure(total: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(http.get(f"/api/v1/threads/thread_{i}") for i in range(total))
+        )
+        elapsed = time.perf_counter() - started
+    assert all(r.status_code == 200 for r in responses)
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    fake_client = SimpleNamespace(threads=FakeThreads(args.latency))
+    threads.get_agents_client = lambda: fake_client
+
+    offload = threads.run_sync
+    results = {}
+    for mode, runner in (("blocking", run_inline), ("offload", offload)):
+        threads.run_sync = runner
+        results[mode] = asyncio.run(measure(args.requests))
+    threads.run_sync = offload
+
+    print(f"requests={args.requests} sdk_latency={args.latency * 1000:.0f}ms")
+    for mode, rps in results.items():
+        print(f"  {mode:<9} {rps:8.1f} req/s")
+    print(f"  speedup   {results['offload'] / results['blocking']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,268 @@
 import os
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
 from azure.ai.projects import AIProjectClient
+from azure.core.credentials import AccessToken
+from azure.core.pipeline.transport import RequestsTransport
 from azure.identity import DefaultAzureCredential
 
+logger = logging.getLogger("azure-client")
+
 _client = None
 _inference_client = None
+_credential = None
+_http_session = None
+# 여러 요청(스레드)이 동시에 첫 클라이언트를 만들지 않도록 보호
+_client_lock = threading.Lock()
+
+# 동기 Azure SDK 호출을 이벤트 루프 밖에서 실행하기 위한 전용 스레드 풀 (크기 제한)
+SDK_THREAD_POOL_SIZE = int(os.getenv("SDK_THREAD_POOL_SIZE", "16"))
+_sdk_executor = None
+# 실행 하나가 끝날 때까지 스레드를 점유하는 SDK 스트림 전용 스레드 풀 (일반 SDK 호출을 막지 않도록 분리)
+SDK_STREAM_POOL_SIZE = int(os.getenv("SDK_STREAM_POOL_SIZE", "32"))
+_stream_executor = None
+
+def _get_sdk_executor() -> ThreadPoolExecutor:
+    global _sdk_executor
+    if _sdk_executor is None:
+        _sdk_executor = ThreadPoolExecutor(max_workers=SDK_THREAD_POOL_SIZE, thread_name_prefix="azure-sdk")
+    return _sdk_executor
+
+async def run_sync(fn, *args, **kwargs):
+    """
+    동기 SDK 호출을 전용 스레드 풀에서 실행하고 결과를 await 합니다.
+    모든 호출은 하나의 동기 AIProjectClient와 공유 연결 풀(_build_transport)을 사용합니다.
+    ItemPaged 같은 지연 목록은 순회할 때 HTTP 요청이 발생하므로 fn 안에서 list()로 변환해야 합니다.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_sdk_executor(), functools.partial(fn, *args, **kwargs))
+
+async def run_stream_sync(fn, *args, **kwargs):
+    """run_sync와 같지만 동기 스트림 소비처럼 오래 걸리는 호출을 스트림 전용 스레드 풀에서 실행합니다."""
+    global _stream_executor
+    if _stream_executor is None:
+        _stream_executor = ThreadPoolExecutor(max_workers=SDK_STREAM_POOL_SIZE, thread_name_prefix="azure-stream")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_stream_executor, functools.partial(fn, *args, **kwargs))
+
+def shutdown_sdk_executor():
+    global _sdk_executor, _stream_executor
+    for executor in (_sdk_executor, _stream_executor):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    _sdk_executor, _stream_executor = None, None
+
+# Azure SDK HTTP 연결 풀: 캐시할 호스트별 풀 수, 호스트당 최대 연결 수 (기본값은 SDK 스레드 풀 크기)
+AZURE_HTTP_POOL_CONNECTIONS = int(os.getenv("AZURE_HTTP_POOL_CONNECTIONS", "10"))
+AZURE_HTTP_POOL_MAXSIZE = int(os.getenv("AZURE_HTTP_POOL_MAXSIZE", str(SDK_THREAD_POOL_SIZE)))
+# 토큰 만료 몇 초 전에 백그라운드에서 미리 갱신할지, 시작 시 자격 증명 예열 제한 시간(초)
+AZURE_TOKEN_REFRESH_MARGIN = int(os.getenv("AZURE_TOKEN_REFRESH_MARGIN", "600"))
+AZURE_CREDENTIAL_WARMUP_TIMEOUT = float(os.getenv("AZURE_CREDENTIAL_WARMUP_TIMEOUT", "30"))
+# 갱신 실패 또는 발급된 토큰이 없을 때 다시 시도할 간격(초)
+AZURE_TOKEN_REFRESH_RETRY = float(os.getenv("AZURE_TOKEN_REFRESH_RETRY", "60"))
+# Agents/프로젝트 API 토큰 범위 (SDK 기본값과 동일)
+AZURE_TOKEN_SCOPE = "https://ai.azure.com/.default"
+# 요청 경로에서 캐시된 토큰을 그대로 쓸 최소 남은 유효 시간(초)
+_TOKEN_MIN_VALIDITY = 60
+
+
+class CachedTokenCredential:
+    """
+    DefaultAzureCredential을 감싸 범위별 토큰을 캐시하는 자격 증명.
+    요청 경로에서는 캐시된 토큰을 바로 반환하고, 만료가 가까운 토큰은
+    token_refresh_loop()가 백그라운드에서 미리 갱신합니다.
+    캐시 키는 범위(scopes)와 tenant_id뿐이며, 그 외 옵션(enable_cae 등)은 발급 요청에만 전달합니다.
+    claims가 붙은 요청(CAE 재인증)은 캐시를 거치지 않습니다.
+    """
+
+    def __init__(self, credential, refresh_margin: int = AZURE_TOKEN_REFRESH_MARGIN):
+        self._credential = credential
+        self.refresh_margin = refresh_margin
+        self._tokens: Dict[Tuple[Tuple[str, ...], Optional[str]], AccessToken] = {}
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.failures = 0
+
+    def cached_token(self, *scopes: str, tenant_id: Optional[str] = None) -> Optional[AccessToken]:
+        token = self._tokens.get((tuple(scopes), tenant_id))
+        if token is not None and token.expires_on - time.time() > _TOKEN_MIN_VALIDITY:
+            return token
+        return None
+
+    def get_token(self, *scopes: str, claims: Optional[str] = None, tenant_id: Optional[str] = None,
+                  **kwargs: Any) -> AccessToken:
+        if claims:
+            return self._credential.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+        token = self.cached_token(*scopes, tenant_id=tenant_id)
+        if token is not None:
+            return token
+        return self._refresh((tuple(scopes), tenant_id), kwargs, force=False)
+
+    def _refresh(self, key: Tuple[Tuple[str, ...], Optional[str]], kwargs: Dict[str, Any], force: bool) -> AccessToken:
+        scopes, tenant_id = key
+        if tenant_id:
+            kwargs = {**kwargs, "tenant_id": tenant_id}
+        with self._lock:
+            # 락을 기다리는 동안 다른 스레드가 이미 갱신했다면 그 토큰을 사용
+            token = self._tokens.get(key)
+            if not force and token is not None and token.expires_on - time.time() > _TOKEN_MIN_VALIDITY:
+                return token
+            try:
+                token = self._credential.get_token(*scopes, **kwargs)
+            except Exception:
+                self.failures += 1
+                raise
+            self._tokens[key] = token
+            self.refreshes += 1
+            return token
+
+    def seconds_until_refresh(self) -> Optional[float]:
+        """가장 먼저 갱신해야 할 토큰까지 남은 시간. 발급된 토큰이 없으면 None."""
+        if not self._tokens:
+            return None
+        earliest = min(token.expires_on for token in self._tokens.values())
+        return max(0.0, earliest - self.refresh_margin - time.time())
+
+    def refresh_expiring(self) -> int:
+        """만료 여유 시간 안에 들어온 토큰을 다시 발급받고 갱신한 개수를 반환합니다."""
+        deadline = time.time() + self.refresh_margin
+        due = [key for key, token in list(self._tokens.items()) if token.expires_on <= deadline]
+        for key in due:
+            self._refresh(key, {}, force=True)
+        return len(due)
+
+    def stats(self) -> Dict[str, Any]:
+        expires_in = [int(token.expires_on - time.time()) for token in self._tokens.values()]
+        return {
+            "tokens": len(self._tokens),
+            "min_expires_in": min(expires_in) if expires_in else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+    def close(self):
+        self._credential.close()
+
+
+def get_credential() -> CachedTokenCredential:
+    global _credential
+    if _credential is None:
+        with _client_lock:
+            if _credential is None:
+                _credential = CachedTokenCredential(DefaultAzureCredential())
+    return _credential
+
+
+def _project_client_kwargs() -> Dict[str, Any]:
+    conn_str = os.getenv("AZURE_AI_PROJECT_CONNECTION_STRING")
+    if not conn_str:
+        raise ValueError("AZURE_AI_PROJECT_CONNECTION_STRING environment variable is not set")
+
+    # Manually parse connection string if needed because 'from_connection_string' is missing in v2.0.0b3
+    if ";" in conn_str:
+        parts = conn_str.split(";")
+        # Expecting: <host_name>;<subscription_id>;<resource_group_name>;<project_name>
+        if len(parts) >= 4:
+            host, sub, rg, project = parts[0], parts[1], parts[2], parts[3]
+            return {
+                "endpoint": f"https://{host}",
+                "subscription_id": sub,
+                "resource_group": rg,
+                "project_name": project
+            }
+    # Fallback: hope it works as endpoint?
+    return {"endpoint": conn_str}
+
+
+def _build_transport() -> RequestsTransport:
+    # 모든 SDK 스레드가 같은 연결 풀을 재사용하도록 공유 세션을 구성
+    # (requests 기본 풀 크기 10은 SDK 스레드 풀보다 작아 연결이 버려지고 다시 맺어짐)
+    global _http_session
+    _http_session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=AZURE_HTTP_POOL_CONNECTIONS, pool_maxsize=AZURE_HTTP_POOL_MAXSIZE)
+    _http_session.mount("https://", adapter)
+    _http_session.mount("http://", adapter)
+    return RequestsTransport(session=_http_session, session_owner=False)
+
 
 def get_project_client() -> AIProjectClient:
     global _client
     if _client is None:
-        conn_str = os.getenv("AZURE_AI_PROJECT_CONNECTION_STRING")
-        if not conn_str:
-            raise ValueError("AZURE_AI_PROJECT_CONNECTION_STRING environment variable is not set")
-        
-        # Manually parse connection string if needed because 'from_connection_string' is missing in v2.0.0b3
-        if ";" in conn_str:
-             parts = conn_str.split(";")
-             # Expecting: <host_name>;<subscription_id>;<resource_group_name>;<project_name>
-             if len(parts) >= 4:
-                 host, sub, rg, project = parts[0], parts[1], parts[2], parts[3]
-                 _client = AIProjectClient(
-                     endpoint=f"https://{host}",
-                     credential=DefaultAzureCredential(),
-                     subscription_id=sub,
-                     resource_group=rg,
-                     project_name=project
-                 )
-             else:
-                 # Fallback: hope it works as endpoint?
-                 _client = AIProjectClient(
-                    endpoint=conn_str,
-                    credential=DefaultAzureCredential(),
-                 )
-        else:
-            _client = AIProjectClient(
-                endpoint=conn_str,
-                credential=DefaultAzureCredential(),
-            )
-            
+        kwargs = _project_client_kwargs()
+        credential = get_credential()
+        with _client_lock:
+            if _client is None:
+                _client = AIProjectClient(credential=credential, transport=_build_transport(), **kwargs)
     return _client
 
 def get_agents_client():
     project_client = get_project_client()
     return project_client.agents
 
+
+async def warm_up_credentials() -> bool:
+    """
+    서버 시작 시 자격 증명 탐색, 첫 토큰 발급, 클라이언트 생성을 미리 수행합니다.
+    프로젝트 설정이 없거나 실패하면 경고만 남기고 첫 요청에서 다시 시도합니다.
+    """
+    if not os.getenv("AZURE_AI_PROJECT_CONNECTION_STRING"):
+        return False
+    started = time.monotonic()
+    try:
+        credential = get_credential()
+        await asyncio.wait_for(
+            run_sync(credential.get_token, AZURE_TOKEN_SCOPE),
+            timeout=AZURE_CREDENTIAL_WARMUP_TIMEOUT
+        )
+        await run_sync(get_project_client)
+    except Exception as e:
+        logger.warning(f"자격 증명 예열 실패 (첫 요청에서 다시 시도): {e!r}")
+        return False
+    logger.info(f"자격 증명 예열 완료: {time.monotonic() - started:.2f}s")
+    return True
+
+
+async def token_refresh_loop():
+    """캐시된 토큰이 만료 여유 시간 안으로 들어오기 전에 백그라운드에서 갱신합니다."""
+    if not os.getenv("AZURE_AI_PROJECT_CONNECTION_STRING"):
+        return
+    credential = get_credential()
+    while True:
+        delay = credential.seconds_until_refresh()
+        await asyncio.sleep(AZURE_TOKEN_REFRESH_RETRY if delay is None else max(delay, 1.0))
+        try:
+            if credential.seconds_until_refresh() is None:
+                # 시작 시 예열에 실패했다면 여기서 다시 발급 시도
+                await run_sync(credential.get_token, AZURE_TOKEN_SCOPE)
+            else:
+                await run_sync(credential.refresh_expiring)
+        except Exception as e:
+            logger.warning(f"토큰 갱신 실패, {AZURE_TOKEN_REFRESH_RETRY}s 후 재시도: {e!r}")
+            await asyncio.sleep(AZURE_TOKEN_REFRESH_RETRY)
+
+
+def credential_stats() -> Optional[Dict[str, Any]]:
+    return _credential.stats() if _credential is not None else None
+
+
+def close_clients():
+    global _client, _inference_client, _credential, _http_session
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        if _credential is not None:
+            _credential.close()
+        if _http_session is not None:
+            _http_session.close()
+        _client, _inference_client, _credential, _http_session = None, None, None, None
+
 def get_inference_client():
     global _inference_client
     if _inference_client is None:
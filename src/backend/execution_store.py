@@ -0,0 +1,454 @@
+import asyncio
+import copy
+from abc import ABC, abstractmethod
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .client import run_sync
+
+logger = logging.getLogger("execution-store")
+
+# 워크플로우 실행 기록 저장소 설정
+# EXECUTION_STORE: memory(기본, 재시작 시 초기화) 또는 sqlite
+EXECUTION_STORE = os.getenv("EXECUTION_STORE", "memory")
+EXECUTION_DB_PATH = os.getenv("EXECUTION_DB_PATH", "executions.db")
+# 단계 기록을 모아서 한 트랜잭션으로 쓰는 개수 (조회/상태 변경 시에는 즉시 반영)
+EXECUTION_STEP_BATCH_SIZE = int(os.getenv("EXECUTION_STEP_BATCH_SIZE", "20"))
+# 보관 기간(초)이 지난 실행 기록은 주기적으로 정리 (0이면 정리하지 않음)
+EXECUTION_RETENTION = float(os.getenv("EXECUTION_RETENTION", str(7 * 24 * 3600)))
+EXECUTION_COMPACT_INTERVAL = float(os.getenv("EXECUTION_COMPACT_INTERVAL", "3600"))
+
+# 진행 중인 실행은 보관 기간이 지나도 정리하지 않음
+ACTIVE_STATUSES = ("queued", "in_progress")
+# 서버 재시작/종료로 실행기 대기열과 함께 사라진 실행에 남기는 사유
+INTERRUPTED_REASON = "서버 재시작으로 중단되었습니다. (Interrupted by server restart)"
+SHUTDOWN_REASON = "서버 종료로 중단되었습니다. (Interrupted by server shutdown)"
+
+
+def encode_cursor(execution: Dict[str, Any]) -> str:
+    return f"{execution['created_at']}_{execution['execution_id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    created_at, _, execution_id = cursor.partition("_")
+    if not execution_id:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return int(created_at), execution_id
+
+
+def _summarize(execution: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "execution_id": execution["execution_id"],
+        "workflow_name": execution["workflow_name"],
+        "status": execution["status"],
+        "created_at": execution["created_at"],
+        "inputs": copy.deepcopy(execution.get("inputs")),
+        "step_count": len((execution.get("result") or {}).get("steps", [])),
+    }
+
+
+class ExecutionStore(ABC):
+    """
+    워크플로우 실행 기록 저장소 인터페이스.
+    실행 기록은 execution_id, workflow_name, status, result({"steps": [...], ...}), inputs, created_at 키를 갖는 dict입니다.
+    list는 created_at 내림차순(최신순)으로 정렬하고 다음 페이지 커서를 함께 반환합니다.
+    include_steps=False면 단계 목록 대신 step_count만 채운 요약을 반환합니다.
+    """
+
+    @abstractmethod
+    def create(self, execution: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    def get(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def update_status(self, execution_id: str, status: str) -> bool:
+        ...
+
+    @abstractmethod
+    def transition_status(self, execution_id: str, expected: str, status: str) -> bool:
+        """현재 상태가 expected일 때만 status로 바꾸고 바꿨는지 반환합니다. (확인과 변경을 한 번에 수행)"""
+
+    @abstractmethod
+    def append_step(self, execution_id: str, step: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    def delete(self, execution_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def list(
+        self,
+        *,
+        status: Optional[str] = None,
+        workflow_name: Optional[str] = None,
+        created_from: Optional[int] = None,
+        created_to: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        include_steps: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        ...
+
+    @abstractmethod
+    def compact(self, retention: float) -> int:
+        """보관 기간이 지난 (진행 중이 아닌) 실행 기록을 삭제하고 삭제한 개수를 반환합니다."""
+
+    def fail_active(self, reason: str = INTERRUPTED_REASON, execution_ids: Optional[List[str]] = None,
+                    statuses: Sequence[str] = ACTIVE_STATUSES) -> List[str]:
+        """
+        statuses(기본: 대기/진행 중) 상태인 실행을 사유 단계와 함께 failed로 바꾸고 바꾼 ID 목록을 반환합니다.
+        execution_ids를 주면 그중 해당 상태인 실행만 바꿉니다.
+        진행 중이던 실행은 어느 단계까지 반영되었는지 알 수 없어 다시 진행할 수 없으므로 실패로 정리합니다.
+        """
+        if execution_ids is None:
+            execution_ids = []
+            for status in statuses:
+                cursor = None
+                while True:
+                    page, cursor = self.list(status=status, cursor=cursor, limit=500, include_steps=False)
+                    execution_ids.extend(e["execution_id"] for e in page)
+                    if not cursor:
+                        break
+        failed = []
+        for execution_id in execution_ids:
+            execution = self.get(execution_id)
+            if execution is None or execution["status"] not in statuses:
+                continue
+            self.append_step(execution_id, {
+                "agent": "System",
+                "action": "Error",
+                "details": reason,
+                "timestamp": int(time.time())
+            })
+            self.update_status(execution_id, "failed")
+            failed.append(execution_id)
+        return failed
+
+    def close(self):
+        pass
+
+
+class InMemoryExecutionStore(ExecutionStore):
+    def __init__(self):
+        # Key: execution_id, Value: execution dict
+        self._executions: Dict[str, Dict[str, Any]] = {}
+        # 라우터는 저장소를 스레드 풀(run_sync)에서 호출하므로 순회 중 변경을 막음
+        self._lock = threading.RLock()
+
+    def create(self, execution: Dict[str, Any]):
+        execution = copy.deepcopy(execution)
+        execution.setdefault("result", {}).setdefault("steps", [])
+        with self._lock:
+            self._executions[execution["execution_id"]] = execution
+
+    def get(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            execution = self._executions.get(execution_id)
+            return copy.deepcopy(execution) if execution else None
+
+    def update_status(self, execution_id: str, status: str) -> bool:
+        with self._lock:
+            execution = self._executions.get(execution_id)
+            if execution is None:
+                return False
+            execution["status"] = status
+            return True
+
+    def transition_status(self, execution_id: str, expected: str, status: str) -> bool:
+        with self._lock:
+            execution = self._executions.get(execution_id)
+            if execution is None or execution["status"] != expected:
+                return False
+            execution["status"] = status
+            return True
+
+    def append_step(self, execution_id: str, step: Dict[str, Any]):
+        with self._lock:
+            execution = self._executions.get(execution_id)
+            if execution is not None:
+                execution["result"]["steps"].append(step)
+
+    def delete(self, execution_id: str) -> bool:
+        with self._lock:
+            return self._executions.pop(execution_id, None) is not None
+
+    def list(self, *, status=None, workflow_name=None, created_from=None, created_to=None, cursor=None, limit=50,
+             include_steps=True):
+        after = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            matches = []
+            for execution in self._executions.values():
+                if status and execution["status"] != status:
+                    continue
+                if workflow_name and execution["workflow_name"] != workflow_name:
+                    continue
+                if created_from is not None and execution["created_at"] < created_from:
+                    continue
+                if created_to is not None and execution["created_at"] > created_to:
+                    continue
+                if after and (execution["created_at"], execution["execution_id"]) >= after:
+                    continue
+                matches.append(execution)
+            matches.sort(key=lambda e: (e["created_at"], e["execution_id"]), reverse=True)
+            page = [copy.deepcopy(e) if include_steps else _summarize(e) for e in matches[:limit]]
+        next_cursor = encode_cursor(page[-1]) if len(matches) > limit else None
+        return page, next_cursor
+
+    def compact(self, retention: float) -> int:
+        cutoff = time.time() - retention
+        with self._lock:
+            expired = [
+                eid for eid, e in self._executions.items()
+                if e["created_at"] < cutoff and e["status"] not in ACTIVE_STATUSES
+            ]
+            for eid in expired:
+                del self._executions[eid]
+        return len(expired)
+
+
+class SQLiteExecutionStore(ExecutionStore):
+    """
+    SQLite(WAL 모드) 기반 실행 기록 저장소.
+    단계 기록은 별도 테이블에 쌓으며, EXECUTION_STEP_BATCH_SIZE개씩 모아 한 번에 씁니다.
+    조회, 상태 변경, 삭제 전에는 남은 단계를 먼저 기록해 항상 최신 상태를 반환합니다.
+    """
+
+    def __init__(self, path: str = EXECUTION_DB_PATH, batch_size: int = EXECUTION_STEP_BATCH_SIZE):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.RLock()
+        self._pending_steps: List[Tuple[str, str]] = []
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS executions (
+                execution_id TEXT PRIMARY KEY,
+                workflow_name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at INTEGER NOT NULL,
+                updated_at INTEGER NOT NULL,
+                inputs TEXT,
+                result TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_executions_created ON executions (created_at DESC, execution_id DESC);
+            CREATE INDEX IF NOT EXISTS idx_executions_status ON executions (status, created_at DESC, execution_id DESC);
+            CREATE INDEX IF NOT EXISTS idx_executions_workflow ON executions (workflow_name, created_at DESC, execution_id DESC);
+            CREATE TABLE IF NOT EXISTS execution_steps (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                execution_id TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_execution_steps ON execution_steps (execution_id, seq);
+        """)
+
+    def _flush_steps(self):
+        if self._pending_steps:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO execution_steps (execution_id, data) VALUES (?, ?)", self._pending_steps
+                )
+            self._pending_steps = []
+
+    def create(self, execution: Dict[str, Any]):
+        result = dict(execution.get("result") or {})
+        steps = result.pop("steps", [])
+        now = int(time.time())
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO executions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    execution["execution_id"], execution["workflow_name"], execution["status"],
+                    execution["created_at"], now,
+                    json.dumps(execution.get("inputs"), ensure_ascii=False),
+                    json.dumps(result, ensure_ascii=False),
+                )
+            )
+            self._conn.executemany(
+                "INSERT INTO execution_steps (execution_id, data) VALUES (?, ?)",
+                [(execution["execution_id"], json.dumps(s, ensure_ascii=False)) for s in steps]
+            )
+
+    def _load_steps(self, execution_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        steps: Dict[str, List[Dict[str, Any]]] = {eid: [] for eid in execution_ids}
+        if not execution_ids:
+            return steps
+        placeholders = ",".join("?" * len(execution_ids))
+        rows = self._conn.execute(
+            f"SELECT execution_id, data FROM execution_steps WHERE execution_id IN ({placeholders}) ORDER BY seq",
+            execution_ids
+        )
+        for row in rows:
+            steps[row["execution_id"]].append(json.loads(row["data"]))
+        return steps
+
+    def _count_steps(self, execution_ids: List[str]) -> Dict[str, int]:
+        if not execution_ids:
+            return {}
+        placeholders = ",".join("?" * len(execution_ids))
+        rows = self._conn.execute(
+            f"SELECT execution_id, COUNT(*) AS n FROM execution_steps WHERE execution_id IN ({placeholders}) GROUP BY execution_id",
+            execution_ids
+        )
+        return {row["execution_id"]: row["n"] for row in rows}
+
+    @staticmethod
+    def _row_to_summary(row, step_count: int) -> Dict[str, Any]:
+        # 요약 조회는 result 컬럼(계획 텍스트 등)도 읽지 않음
+        return {
+            "execution_id": row["execution_id"],
+            "workflow_name": row["workflow_name"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "inputs": json.loads(row["inputs"]) if row["inputs"] else None,
+            "step_count": step_count,
+        }
+
+    @staticmethod
+    def _row_to_execution(row, steps: List[Dict[str, Any]]) -> Dict[str, Any]:
+        result = json.loads(row["result"]) if row["result"] else {}
+        result["steps"] = steps
+        return {
+            "execution_id": row["execution_id"],
+            "workflow_name": row["workflow_name"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "inputs": json.loads(row["inputs"]) if row["inputs"] else None,
+            "result": result,
+        }
+
+    def get(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._flush_steps()
+            row = self._conn.execute("SELECT * FROM executions WHERE execution_id = ?", (execution_id,)).fetchone()
+            if row is None:
+                return None
+            return self._row_to_execution(row, self._load_steps([execution_id])[execution_id])
+
+    def update_status(self, execution_id: str, status: str) -> bool:
+        with self._lock:
+            self._flush_steps()
+            with self._conn:
+                cursor = self._conn.execute(
+                    "UPDATE executions SET status = ?, updated_at = ? WHERE execution_id = ?",
+                    (status, int(time.time()), execution_id)
+                )
+            return cursor.rowcount > 0
+
+    def transition_status(self, execution_id: str, expected: str, status: str) -> bool:
+        with self._lock:
+            self._flush_steps()
+            with self._conn:
+                cursor = self._conn.execute(
+                    "UPDATE executions SET status = ?, updated_at = ? WHERE execution_id = ? AND status = ?",
+                    (status, int(time.time()), execution_id, expected)
+                )
+            return cursor.rowcount > 0
+
+    def append_step(self, execution_id: str, step: Dict[str, Any]):
+        with self._lock:
+            self._pending_steps.append((execution_id, json.dumps(step, ensure_ascii=False)))
+            if len(self._pending_steps) >= self.batch_size:
+                self._flush_steps()
+
+    def delete(self, execution_id: str) -> bool:
+        with self._lock:
+            self._flush_steps()
+            with self._conn:
+                self._conn.execute("DELETE FROM execution_steps WHERE execution_id = ?", (execution_id,))
+                cursor = self._conn.execute("DELETE FROM executions WHERE execution_id = ?", (execution_id,))
+            return cursor.rowcount > 0
+
+    def list(self, *, status=None, workflow_name=None, created_from=None, created_to=None, cursor=None, limit=50,
+             include_steps=True):
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if workflow_name:
+            clauses.append("workflow_name = ?")
+            params.append(workflow_name)
+        if created_from is not None:
+            clauses.append("created_at >= ?")
+            params.append(created_from)
+        if created_to is not None:
+            clauses.append("created_at <= ?")
+            params.append(created_to)
+        if cursor:
+            created_at, execution_id = decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND execution_id < ?))")
+            params.extend([created_at, created_at, execution_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            self._flush_steps()
+            rows = self._conn.execute(
+                f"SELECT * FROM executions {where} ORDER BY created_at DESC, execution_id DESC LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+            page = rows[:limit]
+            execution_ids = [row["execution_id"] for row in page]
+            if include_steps:
+                steps = self._load_steps(execution_ids)
+            else:
+                counts = self._count_steps(execution_ids)
+        if include_steps:
+            executions = [self._row_to_execution(row, steps[row["execution_id"]]) for row in page]
+        else:
+            executions = [self._row_to_summary(row, counts.get(row["execution_id"], 0)) for row in page]
+        next_cursor = encode_cursor(executions[-1]) if len(rows) > limit else None
+        return executions, next_cursor
+
+    def compact(self, retention: float) -> int:
+        cutoff = int(time.time() - retention)
+        placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+        condition = f"created_at < ? AND status NOT IN ({placeholders})"
+        with self._lock:
+            self._flush_steps()
+            with self._conn:
+                self._conn.execute(
+                    f"DELETE FROM execution_steps WHERE execution_id IN (SELECT execution_id FROM executions WHERE {condition})",
+                    (cutoff, *ACTIVE_STATUSES)
+                )
+                cursor = self._conn.execute(f"DELETE FROM executions WHERE {condition}", (cutoff, *ACTIVE_STATUSES))
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._flush_steps()
+            self._conn.close()
+
+
+def create_execution_store() -> ExecutionStore:
+    if EXECUTION_STORE == "sqlite":
+        logger.info(f"SQLite 실행 기록 저장소 사용: {EXECUTION_DB_PATH}")
+        return SQLiteExecutionStore(EXECUTION_DB_PATH)
+    if EXECUTION_STORE != "memory":
+        raise ValueError(f"Unknown EXECUTION_STORE: {EXECUTION_STORE}")
+    return InMemoryExecutionStore()
+
+
+execution_store: ExecutionStore = create_execution_store()
+
+
+async def compaction_loop(store: ExecutionStore):
+    """보관 기간이 지난 실행 기록을 주기적으로 정리합니다."""
+    if EXECUTION_RETENTION <= 0:
+        return
+    while True:
+        try:
+            removed = await run_sync(store.compact, EXECUTION_RETENTION)
+            if removed:
+                logger.info(f"실행 기록 {removed}건 정리")
+        except Exception as e:
+            logger.warning(f"실행 기록 정리 실패: {e}")
+        await asyncio.sleep(EXECUTION_COMPACT_INTERVAL)
@@ -1,5 +1,10 @@
 from fastapi import FastAPI
 from .routers import agents, threads, runs, workflows, files, system
+from .mcp_manager import session_manager
+from .client import run_sync, shutdown_sdk_executor, warm_up_credentials, token_refresh_loop, close_clients
+from .workflow_executor import workflow_executor
+from .execution_store import execution_store, compaction_loop, INTERRUPTED_REASON, SHUTDOWN_REASON
+import asyncio
 import uvicorn
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
@@ -14,10 +19,38 @@ async def lifespan(app: FastAPI):
     print("Agent Framework API 서버를 시작합니다...")
     print("API 문서 (Swagger UI): http://localhost:8000/docs")
     print("건강 상태 확인 (Health Check): http://localhost:8000/api/v1/health")
-    # 필요시 SDK 클라이언트 초기화 (Initialize SDK clients here if needed)
+    # 자격 증명 탐색과 첫 토큰 발급을 미리 수행해 첫 요청이 지연되지 않도록 함
+    await warm_up_credentials()
+    # 토큰 만료 전에 백그라운드에서 갱신
+    token_refresh_task = asyncio.create_task(token_refresh_loop())
+    # MCP 세션 풀 헬스 체크 시작 (세션은 첫 호출 시 연결되어 이후 재사용됨)
+    await session_manager.start()
+    # 이전 프로세스에서 진행 중이던 실행은 어느 단계까지 반영되었는지 알 수 없으므로 실패로 정리
+    interrupted = await run_sync(execution_store.fail_active, INTERRUPTED_REASON, None, ("in_progress",))
+    if interrupted:
+        print(f"재시작으로 중단된 워크플로우 실행 {len(interrupted)}건을 실패로 표시했습니다.")
+    # 워크플로우 전용 실행기 워커 시작
+    await workflow_executor.start()
+    # 승인되었지만 시작되지 못한 실행은 대기열에 다시 등록
+    resumed, _ = await workflows.resume_queued_executions()
+    if resumed:
+        print(f"대기 중이던 워크플로우 실행 {len(resumed)}건을 다시 등록했습니다.")
+    # 보관 기간이 지난 워크플로우 실행 기록 주기적 정리
+    compaction_task = asyncio.create_task(compaction_loop(execution_store))
     yield
     # 종료 로직 (Shutdown logic)
     print("서버를 종료합니다...")
+    # 남은 작업을 잠시 기다린 뒤, 실행 도중 중단된 작업은 실패로 정리
+    # (시작하지 못한 queued 실행은 그대로 두어 다음 시작 시 다시 등록)
+    dropped = await workflow_executor.close()
+    if dropped:
+        await run_sync(execution_store.fail_active, SHUTDOWN_REASON, dropped, ("in_progress",))
+    compaction_task.cancel()
+    execution_store.close()
+    await session_manager.close()
+    token_refresh_task.cancel()
+    close_clients()
+    shutdown_sdk_executor()
 
 app = FastAPI(
     title="Microsoft Agent Framework API",
@@ -1,7 +1,12 @@
 import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+import anyio
+import httpx
 from mcp import ClientSession
 from mcp.client.sse import sse_client
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 
 logger = logging.getLogger("mcp-manager")
@@ -14,46 +19,395 @@ MCP_SERVERS = {
     "mcp-weather": "http://localhost:8004/sse"
 }
 
+# 세션 풀 설정 (Session pool settings)
+# 서버별 풀 크기는 MCP_POOL_SIZE_<SERVER> 환경 변수로 덮어쓸 수 있습니다. (예: MCP_POOL_SIZE_MCP_HR_POLICY=4)
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+MCP_CONNECT_TIMEOUT = float(os.getenv("MCP_CONNECT_TIMEOUT", "10"))
+MCP_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+# 도구 정의 캐시 TTL(초). TTL의 절반이 지나면 백그라운드에서 미리 갱신합니다.
+MCP_TOOL_CACHE_TTL = float(os.getenv("MCP_TOOL_CACHE_TTL", "300"))
+# 서버별 도구 목록 조회 타임아웃(초). 초과한 서버는 제외하고 나머지 결과만 반환합니다.
+MCP_LIST_TOOLS_TIMEOUT = float(os.getenv("MCP_LIST_TOOLS_TIMEOUT", "5"))
+
+
+def _server_version(init_result) -> Optional[str]:
+    server_info = getattr(init_result, "serverInfo", None) or getattr(init_result, "server_info", None)
+    if server_info is None:
+        return None
+    return f"{server_info.name}/{server_info.version}"
+
+
+# 세션(연결) 자체가 더 이상 쓸 수 없음을 뜻하는 오류. 그 외 도구 오류는 세션을 그대로 재사용합니다.
+_CONNECTION_ERRORS = (
+    OSError,  # ConnectionError, TimeoutError 포함
+    httpx.TransportError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+
+def get_pool_size(mcp_name: str) -> int:
+    env_key = "MCP_POOL_SIZE_" + mcp_name.upper().replace("-", "_")
+    return max(1, int(os.getenv(env_key, MCP_POOL_SIZE)))
+
+
+class PooledSession:
+    """
+    하나의 SSE 연결과 초기화된 ClientSession을 유지합니다.
+    sse_client/ClientSession 컨텍스트는 같은 태스크에서 열고 닫아야 하므로 전용 태스크가 세션을 소유합니다.
+    """
+
+    def __init__(self, mcp_name: str, url: str):
+        self.mcp_name = mcp_name
+        self.url = url
+        self.session: Optional[ClientSession] = None
+        self.init_result = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    async def open(self, timeout: float = MCP_CONNECT_TIMEOUT):
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise
+        if self.session is None:
+            raise self._error or ConnectionError(f"MCP 서버({self.mcp_name}) 연결 실패")
+
+    async def _run(self):
+        try:
+            async with sse_client(self.url) as (read, write):
+                async with ClientSession(read, write) as session:
+                    self.init_result = await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self._error = e
+            logger.warning(f"MCP 세션 종료됨 ({self.mcp_name}): {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def ping(self, timeout: float = 5.0) -> bool:
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"MCP 헬스 체크 실패 ({self.mcp_name}): {e}")
+            return False
+
+    async def close(self, timeout: float = 5.0):
+        self._closing.set()
+        if self._task and not self._task.done():
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+
+
+class MCPSessionPool:
+    """서버 하나에 대한 세션 풀. 최대 size개의 세션을 재사용합니다."""
+
+    def __init__(self, mcp_name: str, url: str, size: int):
+        self.mcp_name = mcp_name
+        self.url = url
+        self.size = size
+        self._idle: List[PooledSession] = []
+        self._all: List[PooledSession] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> PooledSession:
+        conn = PooledSession(self.mcp_name, self.url)
+        await conn.open()
+        tool_cache.observe_version(self.mcp_name, _server_version(conn.init_result))
+        self._all.append(conn)
+        logger.info(f"MCP 세션 생성됨: {self.mcp_name} ({len(self._all)}/{self.size})")
+        return conn
+
+    async def _discard(self, conn: PooledSession):
+        if not conn.alive:
+            # 연결이 끊긴 경우 서버가 재시작되었을 수 있으므로 도구 캐시도 무효화
+            tool_cache.invalidate(self.mcp_name, reason="connection dropped")
+        if conn in self._all:
+            self._all.remove(conn)
+        if conn in self._idle:
+            self._idle.remove(conn)
+        await conn.close()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """유휴 세션을 빌려주고, 끊긴 세션은 버리고 재연결합니다."""
+        async with self._slots:
+            conn = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if candidate.alive:
+                    conn = candidate
+                    break
+                await self._discard(candidate)
+            if conn is None:
+                conn = await self._connect()
+
+            try:
+                yield conn
+            except (asyncio.CancelledError, *_CONNECTION_ERRORS):
+                # 연결 오류나 응답 대기 중 취소가 나면 세션 상태를 신뢰할 수 없으므로 폐기
+                await self._discard(conn)
+                raise
+            except BaseException:
+                # 도구 실행 오류 등 애플리케이션 수준 오류는 세션에 영향이 없으므로 반납
+                await self._release(conn)
+                raise
+            else:
+                await self._release(conn)
+
+    async def _release(self, conn: PooledSession):
+        if conn.alive:
+            self._idle.append(conn)
+        else:
+            await self._discard(conn)
+
+    async def health_check(self):
+        """유휴 세션만 하나씩 꺼내(슬롯을 잡은 채) 확인하고, 정상이면 다시 유휴 목록에 넣습니다."""
+        for conn in list(self._idle):
+            # 이미 대여되었거나 모든 슬롯이 사용 중이면 이번 주기에는 건너뜀
+            if conn not in self._idle or self._slots.locked():
+                continue
+            async with self._slots:
+                self._idle.remove(conn)
+                if await conn.ping():
+                    self._idle.append(conn)
+                else:
+                    await self._discard(conn)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {"size": self.size, "open": len(self._all), "idle": len(self._idle)}
+
+    async def close(self):
+        for conn in list(self._all):
+            await self._discard(conn)
+
+
+class MCPSessionManager:
+    """MCP_SERVERS의 서버 이름별 세션 풀을 관리합니다. FastAPI lifespan에서 시작/종료됩니다."""
+
+    def __init__(self):
+        self._pools: Dict[str, MCPSessionPool] = {}
+        self._loop = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    def _ensure_loop(self):
+        # 풀은 이벤트 루프에 묶여 있으므로 루프가 바뀌면(테스트 클라이언트 등) 새로 만듭니다.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._pools = {}
+            self._health_task = None
+            self._loop = loop
+
+    def get_pool(self, mcp_name: str) -> Optional[MCPSessionPool]:
+        self._ensure_loop()
+        url = MCP_SERVERS.get(mcp_name)
+        if not url:
+            return None
+        pool = self._pools.get(mcp_name)
+        if pool is None:
+            pool = MCPSessionPool(mcp_name, url, get_pool_size(mcp_name))
+            self._pools[mcp_name] = pool
+        return pool
+
+    async def start(self):
+        self._ensure_loop()
+        if self._health_task is None and MCP_HEALTH_CHECK_INTERVAL > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(MCP_HEALTH_CHECK_INTERVAL)
+            for pool in list(self._pools.values()):
+                try:
+                    await pool.health_check()
+                except Exception as e:
+                    logger.warning(f"MCP 헬스 체크 오류 ({pool.mcp_name}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: pool.stats for name, pool in self._pools.items()}
+
+    async def close(self):
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        for pool in list(self._pools.values()):
+            await pool.close()
+        self._pools = {}
+        logger.info("MCP 세션 풀 종료 완료")
+
+
+class ToolDefinitionCache:
+    """
+    서버별 list_tools 결과(OpenAI Tool 스키마)를 TTL 동안 캐시합니다.
+    서버 버전이 바뀌거나 연결이 끊기면 해당 서버 항목을 무효화합니다.
+    """
+
+    def __init__(self, ttl: float = MCP_TOOL_CACHE_TTL):
+        self.ttl = ttl
+        # Key: mcp_name, Value: {"tools": [...], "fetched_at": float, "version": str}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # Key: mcp_name, Value: 마지막으로 확인된 서버 버전
+        self._versions: Dict[str, Optional[str]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def observe_version(self, mcp_name: str, version: Optional[str]):
+        previous = self._versions.get(mcp_name)
+        self._versions[mcp_name] = version
+        entry = self._entries.get(mcp_name)
+        if entry and previous is not None and version != previous:
+            self.invalidate(mcp_name, reason=f"server version changed {previous} -> {version}")
+
+    def invalidate(self, mcp_name: Optional[str] = None, reason: str = "manual"):
+        names = [mcp_name] if mcp_name else list(self._entries.keys())
+        for name in names:
+            if self._entries.pop(name, None) is not None:
+                logger.info(f"도구 캐시 무효화: {name} ({reason})")
+
+    async def get(self, mcp_name: str, fetch) -> List[Dict[str, Any]]:
+        entry = self._entries.get(mcp_name)
+        now = time.monotonic()
+        if entry and now - entry["fetched_at"] < self.ttl:
+            self.hits += 1
+            if now - entry["fetched_at"] >= self.ttl / 2:
+                # 만료 전에 백그라운드에서 미리 갱신 (refresh-ahead)
+                self._refresh(mcp_name, fetch)
+            return entry["tools"]
+        self.misses += 1
+        return await asyncio.shield(self._refresh(mcp_name, fetch))
+
+    def _refresh(self, mcp_name: str, fetch) -> asyncio.Task:
+        # 같은 서버에 대한 동시 조회는 하나의 요청으로 합칩니다 (single-flight)
+        task = self._inflight.get(mcp_name)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._fetch_and_store(mcp_name, fetch))
+            # 백그라운드 갱신 실패는 로그로만 남기고 기존 캐시를 유지
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[mcp_name] = task
+        return task
+
+    async def _fetch_and_store(self, mcp_name: str, fetch) -> List[Dict[str, Any]]:
+        try:
+            tools = await fetch()
+            self._entries[mcp_name] = {
+                "tools": tools,
+                "fetched_at": time.monotonic(),
+                "version": self._versions.get(mcp_name),
+            }
+            return tools
+        except Exception as e:
+            logger.warning(f"도구 목록 갱신 실패 ({mcp_name}): {e}")
+            raise
+        finally:
+            self._inflight.pop(mcp_name, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "servers": {
+                name: {
+                    "version": entry["version"],
+                    "tool_count": len(entry["tools"]),
+                    "tools": [t["function"]["name"] for t in entry["tools"]],
+                    "age_seconds": round(now - entry["fetched_at"], 1),
+                }
+                for name, entry in self._entries.items()
+            },
+        }
+
+
+tool_cache = ToolDefinitionCache()
+session_manager = MCPSessionManager()
+
+
 async def get_mcp_tool_definitions(mcp_names: List[str]) -> List[Dict[str, Any]]:
     """
     선택된 MCP 서버들에서 도구 목록을 가져와 OpenAI Tool 스키마로 변환합니다.
     도구 이름은 충돌 방지를 위해 'mcp_{server}_{tool_name}' 형식으로 변경됩니다.
     """
-    openai_tools = []
+    result = await collect_mcp_tool_definitions(mcp_names)
+    return result["tools"]
 
-    for mcp_name in mcp_names:
-        url = MCP_SERVERS.get(mcp_name)
-        if not url:
+async def collect_mcp_tool_definitions(mcp_names: List[str], timeout: float = MCP_LIST_TOOLS_TIMEOUT) -> Dict[str, Any]:
+    """
+    여러 MCP 서버의 도구 목록을 동시에 조회합니다. 서버별 타임아웃을 적용하며,
+    일부 서버가 실패하거나 시간 초과되어도 나머지 결과는 반환합니다.
+    반환값: {"tools": [...], "timed_out": [서버명], "failed": [서버명]}
+    """
+    names = []
+    for mcp_name in dict.fromkeys(mcp_names):
+        if mcp_name not in MCP_SERVERS:
             logger.warning(f"알 수 없는 MCP 서버: {mcp_name}")
             continue
-        
-        try:
-            # MCP 서버 연결 및 도구 조회
-            async with sse_client(url) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    mcp_tools_result = await session.list_tools()
-                    
-                    for tool in mcp_tools_result.tools:
-                        # OpenAI Function Definition 생성
-                        # 이름에 접두사 추가
-                        unique_tool_name = f"{mcp_name}__{tool.name}"
-                        
-                        function_def = {
-                            "type": "function",
-                            "function": {
-                                "name": unique_tool_name,
-                                "description": tool.description or "",
-                                "parameters": tool.inputSchema
-                            }
-                        }
-                        openai_tools.append(function_def)
-                        logger.info(f"도구 등록됨: {unique_tool_name}")
+        names.append(mcp_name)
 
-        except Exception as e:
-            logger.error(f"MCP 서버({mcp_name}) 연결 실패: {e}")
-            # 일부 실패하더라도 진행
+    async def fetch(mcp_name: str):
+        pool = session_manager.get_pool(mcp_name)
+        # 캐시된 도구 정의 사용 (없거나 만료된 경우 서버에서 조회)
+        # 타임아웃으로 대기를 멈춰도 조회 자체는 계속되어 다음 요청을 위한 캐시를 채웁니다.
+        return await asyncio.wait_for(
+            tool_cache.get(mcp_name, lambda: _list_server_tools(mcp_name, pool)),
+            timeout
+        )
+
+    results = await asyncio.gather(*(fetch(name) for name in names), return_exceptions=True)
+
+    openai_tools, timed_out, failed = [], [], []
+    for mcp_name, result in zip(names, results):
+        if isinstance(result, asyncio.TimeoutError):
+            logger.error(f"MCP 서버({mcp_name}) 도구 조회 시간 초과 ({timeout}s)")
+            timed_out.append(mcp_name)
+        elif isinstance(result, BaseException):
+            logger.error(f"MCP 서버({mcp_name}) 연결 실패: {result}")
+            failed.append(mcp_name)
+        else:
+            openai_tools.extend(result)
+
+    return {"tools": openai_tools, "timed_out": timed_out, "failed": failed}
 
+async def _list_server_tools(mcp_name: str, pool: MCPSessionPool) -> List[Dict[str, Any]]:
+    """풀에서 세션을 빌려 도구 목록을 조회하고 OpenAI Tool 스키마로 변환합니다."""
+    async with pool.acquire() as conn:
+        mcp_tools_result = await conn.session.list_tools()
+
+    openai_tools = []
+    for tool in mcp_tools_result.tools:
+        # OpenAI Function Definition 생성
+        # 이름에 접두사 추가
+        unique_tool_name = f"{mcp_name}__{tool.name}"
+
+        function_def = {
+            "type": "function",
+            "function": {
+                "name": unique_tool_name,
+                "description": tool.description or "",
+                "parameters": tool.inputSchema
+            }
+        }
+        openai_tools.append(function_def)
+        logger.info(f"도구 등록됨: {unique_tool_name}")
     return openai_tools
 
 async def execute_mcp_tool_call(tool_name: str, arguments: Dict[str, Any]) -> Any:
@@ -66,19 +420,18 @@ async def execute_mcp_tool_call(tool_name: str, arguments: Dict[str, Any]) -> An
     except ValueError:
         return f"Error: Invalid tool name format {tool_name}"
 
-    url = MCP_SERVERS.get(mcp_name)
-    if not url:
+    pool = session_manager.get_pool(mcp_name)
+    if not pool:
         return f"Error: Unknown MCP server for {mcp_name}"
 
     try:
-        async with sse_client(url) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                result = await session.call_tool(real_tool_name, arguments=arguments)
-                
-                # 결과 텍스트 추출
-                output_texts = [content.text for content in result.content if content.type == 'text']
-                return "\n".join(output_texts)
+        # 풀의 웜 세션 재사용 (끊긴 세션은 acquire 시 자동 재연결)
+        async with pool.acquire() as conn:
+            result = await conn.session.call_tool(real_tool_name, arguments=arguments)
+
+        # 결과 텍스트 추출
+        output_texts = [content.text for content in result.content if content.type == 'text']
+        return "\n".join(output_texts)
 
     except Exception as e:
         logger.error(f"도구 실행 실패 ({tool_name}): {e}")
@@ -0,0 +1,149 @@
+import hashlib
+import itertools
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .models import MessageResponse
+
+# 스레드 메시지 캐시 설정: 최대 스레드 수, 전체 메모리 상한(바이트), 항목 유효 시간(초)
+MESSAGE_CACHE_MAX_THREADS = int(os.getenv("MESSAGE_CACHE_MAX_THREADS", "200"))
+MESSAGE_CACHE_MAX_BYTES = int(os.getenv("MESSAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+MESSAGE_CACHE_TTL = float(os.getenv("MESSAGE_CACHE_TTL", "300"))
+
+
+class _Entry:
+    def __init__(self, messages: List[MessageResponse]):
+        self.messages = messages
+        self.cached_at = time.monotonic()
+        self._sizes = {m.id: len(m.model_dump_json()) for m in messages}
+        self.etag = self._compute_etag()
+
+    @property
+    def size(self) -> int:
+        return sum(self._sizes.values())
+
+    def _compute_etag(self) -> str:
+        digest = hashlib.sha1()
+        for m in self.messages:
+            digest.update(m.model_dump_json().encode("utf-8"))
+        return f'"{digest.hexdigest()[:20]}"'
+
+    def upsert(self, messages: List[MessageResponse]):
+        # 이미 있는 메시지(실행 중에 캐시된 작성 중 응답 등)는 교체하고,
+        # 새 메시지는 기본 목록 순서(최신순)에 맞춰 앞에 붙임
+        updated = {m.id: m for m in messages if m.id in self._sizes}
+        fresh = [m for m in messages if m.id not in self._sizes]
+        if not updated and not fresh:
+            return
+        self.messages = fresh + [updated.get(m.id, m) for m in self.messages]
+        for m in fresh + list(updated.values()):
+            self._sizes[m.id] = len(m.model_dump_json())
+        self.etag = self._compute_etag()
+
+
+class ThreadMessageCache:
+    """
+    스레드별 전체 메시지 목록(최신순) 캐시.
+    최근 사용 순서(LRU)로 관리하며 스레드 수와 전체 크기 상한을 넘으면 오래된 스레드부터 제거합니다.
+    메시지 추가는 캐시에 바로 반영(write-through)하고, 실행이 끝나면 실행이 만든 메시지를 덧붙이거나 무효화합니다.
+    """
+
+    def __init__(self, max_threads: int = MESSAGE_CACHE_MAX_THREADS, max_bytes: int = MESSAGE_CACHE_MAX_BYTES,
+                 ttl: float = MESSAGE_CACHE_TTL):
+        self.max_threads = max(1, max_threads)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        # 조회 도중 변경된 스레드의 결과를 캐시에 덮어쓰지 않도록 마지막 변경 시점을 기록
+        self._clock = itertools.count(1)
+        self._touched: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def begin_fetch(self) -> int:
+        return next(self._clock)
+
+    def _touch(self, thread_id: str):
+        self._touched[thread_id] = next(self._clock)
+        self._touched.move_to_end(thread_id)
+        while len(self._touched) > self.max_threads * 4:
+            self._touched.popitem(last=False)
+
+    def get(self, thread_id: str) -> Optional[_Entry]:
+        entry = self._entries.get(thread_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        if self.ttl > 0 and time.monotonic() - entry.cached_at > self.ttl:
+            self._remove(thread_id)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(thread_id)
+        self.hits += 1
+        return entry
+
+    def put(self, thread_id: str, messages: List[MessageResponse], fetch_started: int) -> Optional[_Entry]:
+        """begin_fetch() 이후 해당 스레드가 변경되지 않은 경우에만 저장합니다."""
+        if self._touched.get(thread_id, 0) > fetch_started:
+            return None
+        self._remove(thread_id)
+        entry = _Entry(messages)
+        self._entries[thread_id] = entry
+        self._bytes += entry.size
+        self._evict()
+        return entry
+
+    def add_messages(self, thread_id: str, messages: List[MessageResponse]):
+        """
+        새로 생성되거나 완성된 메시지(최신순)를 캐시된 목록에 반영합니다.
+        캐시에 없는 스레드는 진행 중인 조회 결과가 저장되지 않도록 변경 표시만 합니다.
+        """
+        self._touch(thread_id)
+        entry = self._entries.get(thread_id)
+        if entry is None:
+            return
+        before = entry.size
+        entry.upsert(messages)
+        self._bytes += entry.size - before
+        self._evict()
+
+    def invalidate(self, thread_id: str):
+        self._touch(thread_id)
+        self._remove(thread_id)
+
+    def _remove(self, thread_id: str):
+        entry = self._entries.pop(thread_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_threads or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threads": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+        }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+message_cache = ThreadMessageCache()
@@ -9,6 +9,17 @@ class FileResponse(BaseModel):
     mime_type: str
     created_at: int
 
+class FileBatchItem(BaseModel):
+    filename: str
+    status: str  # uploaded, deduplicated, failed
+    file: Optional[FileResponse] = None
+    error: Optional[str] = None
+
+class FileBatchResponse(BaseModel):
+    results: List[FileBatchItem]  # 요청한 파일 순서대로
+    uploaded: int
+    failed: int
+
 # --- 에이전트 모델 (Agent Models) ---
 class AgentCreate(BaseModel):
     name: str  # 에이전트 이름
@@ -31,6 +42,8 @@ class AgentResponse(BaseModel):
     tools: List[str]
     mcp_tools: Optional[List[str]] = []
     created_at: int
+    mcp_timed_out: Optional[List[str]] = None # 생성 시 도구 조회 시간이 초과된 MCP 서버
+    mcp_failed: Optional[List[str]] = None # 생성 시 연결에 실패한 MCP 서버
 
 # --- 스레드 모델 (Thread Models) ---
 class ThreadCreate(BaseModel):
@@ -59,6 +72,7 @@ class MessageResponse(BaseModel):
 class RunCreate(BaseModel):
     agent_id: str  # 실행할 에이전트 ID
     instructions: Optional[str] = None  # 실행 시 덮어쓸 지시사항 (옵션)
+    stream: Optional[bool] = False  # True면 모델 출력을 SSE로 실시간 전달
 
 class RunResponse(BaseModel):
     id: str
@@ -80,3 +94,12 @@ class WorkflowExecutionResponse(BaseModel):
     inputs: Optional[Dict[str, Any]] = None
     created_at: int
 
+class WorkflowExecutionSummary(BaseModel):
+    # 목록 조회용 요약 (result.steps 제외)
+    execution_id: str
+    workflow_name: str
+    status: str
+    inputs: Optional[Dict[str, Any]] = None
+    created_at: int
+    step_count: int
+
@@ -1,13 +1,71 @@
-from fastapi import APIRouter, HTTPException, Body
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Body, Query, Response
+from typing import List, Dict, Optional, Tuple
 import os
+import time
 from ..models import AgentCreate, AgentUpdate, AgentResponse
-from ..client import get_inference_client, get_agents_client
+from ..client import get_inference_client, get_agents_client, run_sync
 from ..database import agent_active_threads
-from ..mcp_manager import get_mcp_tool_definitions
+from ..mcp_manager import collect_mcp_tool_definitions
+from ..agent_index import agent_index
 
 router = APIRouter()
 
+# 에이전트 목록 조회 시 페이지당 조회 수 (Agents API 최대 100)
+AGENT_PAGE_SIZE = int(os.getenv("AGENT_PAGE_SIZE", "100"))
+# 에이전트 목록 응답 캐시 유효 시간(초), 0이면 캐시하지 않음
+AGENT_LIST_CACHE_TTL = float(os.getenv("AGENT_LIST_CACHE_TTL", "10"))
+
+
+class AgentListCache:
+    """
+    에이전트 목록 응답의 짧은 TTL 캐시. 키는 (after, limit)입니다.
+    같은 프로세스의 에이전트 생성/삭제 시 전체를 무효화하며,
+    조회 도중 무효화되었다면 그 결과는 저장하지 않습니다.
+    """
+
+    def __init__(self, ttl: float = AGENT_LIST_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[Optional[str], Optional[int]], Tuple[float, List[AgentResponse], Optional[str]]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key) -> Optional[Tuple[List[AgentResponse], Optional[str]]]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, key, agents: List[AgentResponse], next_cursor: Optional[str], generation: int):
+        if self.ttl <= 0 or generation != self._generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, agents, next_cursor)
+
+    def invalidate(self):
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+agent_list_cache = AgentListCache()
+
+
+def _invalidate_agent_list():
+    agent_list_cache.invalidate()
+
+
+# 이 라우터와 워크플로우(ensure_agent) 등 에이전트 인덱스를 갱신하는 모든 경로에서 목록 캐시를 무효화
+agent_index.on_change(_invalidate_agent_list)
+
 def _map_row_agent_to_response(assistant) -> AgentResponse:
     # OpenAI Assistant object mapping
     tools_list = []
@@ -42,27 +100,52 @@ def _map_row_agent_to_response(assistant) -> AgentResponse:
         created_at=created_at_ts
     )
 
+def fetch_agents(client, after: Optional[str] = None, limit: Optional[int] = None) -> list:
+    """
+    에이전트를 최신순으로 조회합니다. (동기 함수이므로 run_sync로 호출)
+    after는 에이전트 ID 커서이며 SDK 페이지 연속 토큰으로 전달됩니다.
+    limit을 주면 한 페이지만, 없으면 끝까지 조회합니다.
+    """
+    pages = client.list(limit=limit or AGENT_PAGE_SIZE).by_page(continuation_token=after)
+    if limit:
+        return list(next(pages, []))
+    return [agent for page in pages for agent in page]
+
 # 에이전트 목록 조회 (List all agents)
+# limit을 주면 한 페이지만 반환하고 다음 페이지 커서를 X-Next-Cursor 헤더로 알려줍니다.
 @router.get("/agents", response_model=List[AgentResponse])
-async def list_agents():
-    client = get_agents_client()
-    try:
-        # Azure AI Project Agents list
+async def list_agents(
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=100)
+):
+    key = (after, limit)
+    cached = agent_list_cache.get(key)
+    if cached is not None:
+        response_agents, next_cursor = cached
+    else:
+        client = get_agents_client()
+        generation = agent_list_cache.generation
         try:
-            assistants = client.list(limit=50) # returns ItemPaged
-        except AttributeError:
-            # If list method doesn't exist, return empty list for now
-            assistants = []
-        
-        response_agents = []
-        for agent in assistants:
-            response_agents.append(_map_row_agent_to_response(agent))
-                
-        return response_agents
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"에이전트 목록 조회 실패: {str(e)}")
+            # Azure AI Project Agents list
+            try:
+                assistants = await run_sync(fetch_agents, client, after, limit)
+            except AttributeError:
+                # If list method doesn't exist, return empty list for now
+                assistants = []
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"에이전트 목록 조회 실패: {str(e)}")
+
+        response_agents = [_map_row_agent_to_response(agent) for agent in assistants]
+        # 다음 페이지는 after=<마지막 에이전트 ID>로 이어서 조회
+        next_cursor = response_agents[-1].id if limit and len(response_agents) == limit else None
+        agent_list_cache.put(key, response_agents, next_cursor, generation)
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response_agents
 
 # 에이전트 생성 (Create a new agent)
 @router.post("/agents", response_model=AgentResponse)
@@ -78,10 +161,11 @@ async def create_agent(agent: AgentCreate):
                 elif t_name == "file_search": 
                      tools_objs.append({"type": "file_search"})
         
-        # MCP 도구 정의 가져오기 (동적 연결)
+        # MCP 도구 정의 가져오기 (동적 연결, 서버별 동시 조회)
+        mcp_result = None
         if agent.mcp_tools:
-            mcp_defs = await get_mcp_tool_definitions(agent.mcp_tools)
-            tools_objs.extend(mcp_defs)
+            mcp_result = await collect_mcp_tool_definitions(agent.mcp_tools)
+            tools_objs.extend(mcp_result["tools"])
 
         # .env에서 모델명 가져오기, 없으면 요청받은 model 사용
         env_model = os.getenv("AZURE_MODEL_DEPLOYMENT_NAME")
@@ -92,7 +176,8 @@ async def create_agent(agent: AgentCreate):
         if agent.mcp_tools:
             metadata["mcp_tools"] = ",".join(agent.mcp_tools)
 
-        created_agent = client.create_agent(
+        created_agent = await run_sync(
+            client.create_agent,
             name=agent.name,
             model=target_model,
             instructions=agent.instructions,
@@ -100,7 +185,13 @@ async def create_agent(agent: AgentCreate):
             metadata=metadata
         )
         
-        return _map_row_agent_to_response(created_agent)
+        agent_index.add(created_agent.name, created_agent.id)
+        response = _map_row_agent_to_response(created_agent)
+        if mcp_result:
+            # 일부 MCP 서버의 도구가 빠진 채로 생성되었는지 알려줌
+            response.mcp_timed_out = mcp_result["timed_out"]
+            response.mcp_failed = mcp_result["failed"]
+        return response
 
     except Exception as e:
         import traceback
@@ -118,7 +209,7 @@ async def create_agent(agent: AgentCreate):
 async def get_agent(agent_id: str):
     client = get_agents_client()
     try:
-        agent = client.get_agent(agent_id)
+        agent = await run_sync(client.get_agent, agent_id)
         return _map_row_agent_to_response(agent)
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"에이전트를 찾을 수 없습니다: {str(e)}")
@@ -128,7 +219,8 @@ async def get_agent(agent_id: str):
 async def delete_agent(agent_id: str):
     client = get_agents_client()
     try:
-        client.delete_agent(agent_id)
+        await run_sync(client.delete_agent, agent_id)
+        agent_index.remove(agent_id)
         return {"message": "에이전트가 성공적으로 삭제되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"에이전트 삭제 실패: {str(e)}")
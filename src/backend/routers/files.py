@@ -1,58 +1,220 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from ..models import FileResponse
-from ..client import get_agents_client
-import shutil
+from fastapi import APIRouter, UploadFile, HTTPException, Request, Response
+from ..models import FileResponse, FileBatchItem, FileBatchResponse
+from ..client import get_agents_client, run_sync
+from azure.core.exceptions import ResourceNotFoundError
+from starlette.datastructures import FormData, UploadFile as StarletteUploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
 import os
-import uuid
-import time
+
+logger = logging.getLogger("files")
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads"
+# 업로드 스풀 임계값(바이트). 이보다 작은 파일은 메모리에만 두고, 큰 파일만 임시 파일로 디스크에 저장됩니다.
+# 업로드된 본문(스풀 파일)을 그대로 Agents 서비스로 전송하므로 별도의 로컬 복사본은 만들지 않습니다.
+UPLOAD_SPOOL_MAX_SIZE = int(os.getenv("UPLOAD_SPOOL_MAX_SIZE", str(1024 * 1024)))
+UPLOAD_HASH_CHUNK_SIZE = 1024 * 1024
+# 배치 업로드: 동시에 업로드할 파일 수와 요청당 최대 파일 수
+UPLOAD_BATCH_CONCURRENCY = int(os.getenv("UPLOAD_BATCH_CONCURRENCY", "4"))
+UPLOAD_BATCH_MAX_FILES = int(os.getenv("UPLOAD_BATCH_MAX_FILES", "50"))
+# 중복 업로드 인덱스에 보관할 최대 항목 수 (가장 오래 사용하지 않은 항목부터 제거)
+UPLOAD_DEDUP_MAX_ENTRIES = int(os.getenv("UPLOAD_DEDUP_MAX_ENTRIES", "10000"))
+
+def _map_file_to_response(f) -> FileResponse:
+    created_at_ts = 0
+    if hasattr(f, "created_at"):
+        if isinstance(f.created_at, int):
+            created_at_ts = f.created_at
+        elif hasattr(f.created_at, "timestamp"):
+            created_at_ts = int(f.created_at.timestamp())
+
+    return FileResponse(
+        id=f.id,
+        filename=f.filename,
+        purpose=f.purpose,
+        mime_type="application/octet-stream", # Azure might not return mime_type
+        created_at=created_at_ts
+    )
+
+class UploadDedupIndex:
+    """
+    업로드 내용의 SHA-256 다이제스트(용도별) → 업로드된 원격 파일 인덱스.
+    같은 내용을 다시 업로드하면 기존 파일을 그대로 돌려주고, 파일이 삭제되면 항목을 제거합니다.
+    max_entries를 넘으면 가장 오래 사용하지 않은 항목부터 제거합니다. (원격 파일은 그대로 둠)
+    """
+
+    def __init__(self, max_entries: int = UPLOAD_DEDUP_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._by_key: "OrderedDict[str, FileResponse]" = OrderedDict()
+        self._key_by_file_id: Dict[str, str] = {}
+        self.hits = 0
+
+    def get(self, key: str) -> Optional[FileResponse]:
+        response = self._by_key.get(key)
+        if response is not None:
+            self._by_key.move_to_end(key)
+        return response
+
+    def add(self, key: str, response: FileResponse):
+        previous = self._by_key.pop(key, None)
+        if previous is not None:
+            # 같은 내용을 다시 업로드한 경우 이전 파일 ID로는 더 이상 찾지 않음
+            self._key_by_file_id.pop(previous.id, None)
+        self._by_key[key] = response
+        self._key_by_file_id[response.id] = key
+        while len(self._by_key) > self.max_entries:
+            _, evicted = self._by_key.popitem(last=False)
+            self._key_by_file_id.pop(evicted.id, None)
+
+    def evict_file(self, file_id: str):
+        key = self._key_by_file_id.pop(file_id, None)
+        if key is not None:
+            self._by_key.pop(key, None)
+
+
+class UploadFormParser(MultiPartParser):
+    """업로드 엔드포인트 전용 멀티파트 파서. 스풀 임계값을 이 파서에만 적용합니다. (Starlette 전역 설정은 그대로 둠)"""
+    spool_max_size = UPLOAD_SPOOL_MAX_SIZE
+
+
+async def read_upload_form(request: Request) -> FormData:
+    """요청 본문을 UploadFormParser로 읽습니다. 멀티파트가 아니거나 형식이 잘못되면 400을 반환합니다."""
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="multipart/form-data 요청이어야 합니다.")
+    parser = UploadFormParser(request.headers, request.stream(), max_files=UPLOAD_BATCH_MAX_FILES + 1)
+    try:
+        return await parser.parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=f"업로드 본문을 읽을 수 없습니다: {e.message}")
+
+
+def _form_files(form: FormData, field: str) -> List[UploadFile]:
+    return [f for f in form.getlist(field) if isinstance(f, StarletteUploadFile)]
+
+
+upload_index = UploadDedupIndex()
+# Key: dedup key, Value: 같은 내용을 업로드 중인 요청의 결과
+_inflight_uploads: Dict[str, asyncio.Future] = {}
+
+def _hash_upload(stream) -> str:
+    # 스풀 파일을 청크 단위로 읽어 다이제스트 계산 후 처음 위치로 되돌림
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(UPLOAD_HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
 
-# 업로드 디렉토리가 없으면 생성 (Ensure upload directory exists)
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
+async def _remote_file_exists(client, file_id: str) -> bool:
+    try:
+        await run_sync(client.files.get, file_id)
+        return True
+    except ResourceNotFoundError:
+        upload_index.evict_file(file_id)
+        return False
+    except Exception as e:
+        # 확인할 수 없으면 재사용하지 않고 새로 업로드 (업로드 자체를 실패시키지 않음)
+        logger.warning(f"기존 업로드 파일 확인 실패 ({file_id}), 새로 업로드합니다: {e}")
+        return False
+
+async def upload_one(client, file: UploadFile, purpose: str) -> Tuple[FileResponse, bool]:
+    """파일 하나를 업로드하고 (응답, 중복 여부)를 반환합니다. 같은 내용이 이미 업로드되어 있으면 재사용합니다."""
+    key = f"{purpose}:{await run_sync(_hash_upload, file.file)}"
+
+    cached = upload_index.get(key)
+    if cached and await _remote_file_exists(client, cached.id):
+        upload_index.hits += 1
+        return cached, True
+
+    # 같은 내용이 동시에 업로드 중이면 그 결과를 기다림
+    pending = _inflight_uploads.get(key)
+    if pending is not None:
+        upload_index.hits += 1
+        return await asyncio.shield(pending), True
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight_uploads[key] = future
+    try:
+        # Upload using Agents SDK, streaming the spooled request body as-is
+        def _upload():
+            file.file.seek(0)
+            return client.files.upload(file=(file.filename, file.file), purpose=purpose)
+        response = _map_file_to_response(await run_sync(_upload))
+        upload_index.add(key, response)
+        future.set_result(response)
+        return response, False
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # 기다리는 쪽이 없어도 경고가 남지 않도록 예외를 확인 처리
+        raise
+    finally:
+        del _inflight_uploads[key]
 
 # 파일 업로드 (Upload a file)
 @router.post("/files", response_model=FileResponse)
-async def upload_file(file: UploadFile = File(...), purpose: str = "assistants"):
-    # Generate a temp local path to handle the file stream
-    file_id_temp = str(uuid.uuid4())
-    file_path = os.path.join(UPLOAD_DIR, f"{file_id_temp}_{file.filename}")
-    
-    # Save locally first
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
+async def upload_file(request: Request, response: Response, purpose: str = "assistants"):
+    form = await read_upload_form(request)
+    uploads = _form_files(form, "file")
+    if not uploads:
+        await form.close()
+        raise HTTPException(status_code=422, detail="file 필드가 필요합니다.")
+    file = uploads[0]
     client = get_agents_client()
     try:
-        # Upload using Agents SDK
-        with open(file_path, "rb") as f:
-            uploaded_file = client.files.upload(file=f, purpose=purpose)
-        
-        created_at_ts = 0
-        if hasattr(uploaded_file, "created_at"):
-             if isinstance(uploaded_file.created_at, int):
-                 created_at_ts = uploaded_file.created_at
-             elif hasattr(uploaded_file.created_at, "timestamp"):
-                 created_at_ts = int(uploaded_file.created_at.timestamp())
-
-        return FileResponse(
-            id=uploaded_file.id,
-            filename=uploaded_file.filename,
-            purpose=uploaded_file.purpose,
-            mime_type="application/octet-stream", # Azure might not return mime_type
-            created_at=created_at_ts
-        )
+        uploaded, deduplicated = await upload_one(client, file, purpose)
+        if deduplicated:
+            response.headers["X-Upload-Deduplicated"] = "true"
+        return uploaded
     except Exception as e:
-        # Clean up local file on failure if we want
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Azure upload failed: {str(e)}")
+    finally:
+        # 디스크로 넘어간 스풀 임시 파일은 닫는 즉시 삭제됨
+        await form.close()
+
+# 여러 파일 동시 업로드 (Upload files in a batch)
+# 파일별 결과를 요청 순서대로 반환하며, 일부 실패해도 나머지 결과는 그대로 돌려줍니다.
+@router.post("/files/batch", response_model=FileBatchResponse)
+async def upload_files_batch(request: Request, purpose: str = "assistants"):
+    form = await read_upload_form(request)
+    files = _form_files(form, "files")
+    if not files:
+        await form.close()
+        raise HTTPException(status_code=422, detail="files 필드가 필요합니다.")
+    if len(files) > UPLOAD_BATCH_MAX_FILES:
+        await form.close()
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {UPLOAD_BATCH_MAX_FILES}개 파일까지 업로드할 수 있습니다.")
+
+    client = get_agents_client()
+    semaphore = asyncio.Semaphore(max(1, UPLOAD_BATCH_CONCURRENCY))
+
+    async def _upload(file: UploadFile) -> FileBatchItem:
+        try:
+            async with semaphore:
+                uploaded, deduplicated = await upload_one(client, file, purpose)
+            return FileBatchItem(
+                filename=file.filename,
+                status="deduplicated" if deduplicated else "uploaded",
+                file=uploaded
+            )
+        except Exception as e:
+            print(f"Batch upload failed for {file.filename}: {e}")
+            return FileBatchItem(filename=file.filename, status="failed", error=str(e))
+        finally:
+            await file.close()
+
+    results = await asyncio.gather(*(_upload(f) for f in files))
+    failed = sum(1 for r in results if r.status == "failed")
+    return FileBatchResponse(results=results, uploaded=len(results) - failed, failed=failed)
 
 # 파일 목록 조회 (List files)
 @router.get("/files", response_model=list[FileResponse])
@@ -60,32 +222,17 @@ async def list_files():
     client = get_agents_client()
     try:
         # Query Azure for files
-        files_data = client.files.list()
-        
-        response_files = []
-        # list context usually returns a page/iterator
-        
-        # Determine if it's an iterator or object with 'data'
-        iterator = files_data
-        if hasattr(files_data, "data"):
-             iterator = files_data.data
-             
-        for f in iterator:
-            created_at_ts = 0
-            if hasattr(f, "created_at"):
-                if isinstance(f.created_at, int):
-                    created_at_ts = f.created_at
-                elif hasattr(f.created_at, "timestamp"):
-                    created_at_ts = int(f.created_at.timestamp())
+        def _list_files():
+            files_data = client.files.list()
+            # list context usually returns a page/iterator
+            
+            # Determine if it's an iterator or object with 'data'
+            iterator = files_data
+            if hasattr(files_data, "data"):
+                 iterator = files_data.data
+            return list(iterator)
         
-            response_files.append(FileResponse(
-                id=f.id,
-                filename=f.filename,
-                purpose=f.purpose,
-                mime_type="application/octet-stream",
-                created_at=created_at_ts
-            ))
-        return response_files
+        return [_map_file_to_response(f) for f in await run_sync(_list_files)]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"List files failed: {str(e)}")
 
@@ -94,7 +241,8 @@ async def list_files():
 async def delete_file(file_id: str):
     client = get_agents_client()
     try:
-        client.files.delete(file_id)
+        await run_sync(client.files.delete, file_id)
+        upload_index.evict_file(file_id)
         return {"message": "파일이 성공적으로 삭제되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Delete failed: {str(e)}")
@@ -1,14 +1,48 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from fastapi.responses import StreamingResponse
 from ..models import RunCreate, RunResponse
-from ..client import get_agents_client
-from ..mcp_manager import execute_mcp_tool_call
-import time
+from ..client import get_agents_client, run_sync
+from ..run_driver import ensure_run_driver, run_drivers, StreamedRunDriver, serialize_last_error, format_sse
+from ..run_waiter import TERMINAL_STATUSES
 import asyncio
 import json
 
 router = APIRouter()
 
+def _sse_response(driver) -> StreamingResponse:
+    async def event_stream():
+        async for item in driver.subscribe():
+            if item is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield format_sse(item["event"], item["data"])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _map_run_to_response(run, include_error: bool = True) -> RunResponse:
+    created_at_ts = 0
+    if hasattr(run, "created_at"):
+         if isinstance(run.created_at, int):
+             created_at_ts = run.created_at
+         elif hasattr(run.created_at, "timestamp"):
+             created_at_ts = int(run.created_at.timestamp())
+
+    # Check if attribute is agent_id or assistant_id
+    agent_id_val = getattr(run, "agent_id", None) or getattr(run, "assistant_id", None)
+
+    return RunResponse(
+        id=run.id,
+        thread_id=run.thread_id,
+        agent_id=agent_id_val,
+        status=run.status,
+        created_at=created_at_ts,
+        last_error=serialize_last_error(run) if include_error else None
+    )
+
 # 실행 생성 (Create a run)
 @router.post("/threads/{thread_id}/runs", response_model=RunResponse)
 async def create_run(thread_id: str, run_input: RunCreate):
@@ -22,26 +56,19 @@ async def create_run(thread_id: str, run_input: RunCreate):
         if run_input.instructions:
             kwargs["instructions"] = run_input.instructions
 
-        run = client.runs.create(**kwargs)
-        
-        created_at_ts = 0
-        if hasattr(run, "created_at"):
-             if isinstance(run.created_at, int):
-                 created_at_ts = run.created_at
-             elif hasattr(run.created_at, "timestamp"):
-                 created_at_ts = int(run.created_at.timestamp())
-        
-        # Check if attribute is agent_id or assistant_id
-        agent_id_val = getattr(run, "agent_id", None) or getattr(run, "assistant_id", None)
+        if run_input.stream:
+            # 스트리밍 모드: 모델의 증분 출력과 도구 호출 진행을 SSE로 바로 전달
+            kwargs.pop("thread_id")
+            driver = StreamedRunDriver(thread_id, kwargs)
+            driver.start()
+            return _sse_response(driver)
 
-        return RunResponse(
-            id=run.id,
-            thread_id=run.thread_id,
-            agent_id=agent_id_val,
-            status=run.status,
-            created_at=created_at_ts,
-            last_error=None
-        )
+        run = await run_sync(client.runs.create, **kwargs)
+
+        # 서버 측 드라이버가 실행 수명 주기(도구 호출 포함)를 담당
+        ensure_run_driver(thread_id, run.id)
+
+        return _map_run_to_response(run, include_error=False)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -52,89 +79,38 @@ async def create_run(thread_id: str, run_input: RunCreate):
 async def get_run(thread_id: str, run_id: str):
     client = get_agents_client()
     try:
-        run = client.runs.get(thread_id=thread_id, run_id=run_id)
-        
-        # Handle 'requires_action' (Tool Calls)
-        if run.status == "requires_action" and run.required_action and run.required_action.submit_tool_outputs:
-            tool_outputs = []
-            tool_calls = run.required_action.submit_tool_outputs.tool_calls
-            
-            for tool_call in tool_calls:
-                fn_name = tool_call.function.name
-                fn_args = tool_call.function.arguments
-                
-                # Check if it's an MCP tool (mapped by prefix)
-                if "__" in fn_name:
-                    try:
-                        # Arguments might be a string or already a dict depending on SDK version
-                        if isinstance(fn_args, str):
-                            args_dict = json.loads(fn_args)
-                        else:
-                            args_dict = fn_args
-                            
-                        # execute_mcp_tool_call expects fn_name and dict arguments
-                        output_str = await execute_mcp_tool_call(fn_name, args_dict)
-                        
-                        tool_outputs.append({
-                            "tool_call_id": tool_call.id,
-                            "output": str(output_str)
-                        })
-                    except Exception as e:
-                        tool_outputs.append({
-                            "tool_call_id": tool_call.id,
-                            "output": f"Error fulfilling tool call: {str(e)}"
-                        })
-            
-            # Submit outputs if we processed any MCP tools
-            if tool_outputs:
-                client.runs.submit_tool_outputs(
-                    thread_id=thread_id,
-                    run_id=run_id,
-                    tool_outputs=tool_outputs
-                )
-                # Wait briefly to let the run progress
-                time.sleep(0.5)
-                run = client.runs.get(thread_id=thread_id, run_id=run_id)
-
-        last_error = None
-        if run.last_error:
-            # Handle object vs dict
-            if isinstance(run.last_error, dict):
-                 last_error = {"code": run.last_error.get("code"), "message": run.last_error.get("message")}
-            else:
-                 last_error = {"code": run.last_error.code, "message": run.last_error.message}
-
-        created_at_ts = 0
-        if hasattr(run, "created_at"):
-             if isinstance(run.created_at, int):
-                 created_at_ts = run.created_at
-             elif hasattr(run.created_at, "timestamp"):
-                 created_at_ts = int(run.created_at.timestamp())
-        
-        # Check if attribute is agent_id or assistant_id
-        agent_id_val = getattr(run, "agent_id", None) or getattr(run, "assistant_id", None)
+        # 조회는 드라이버를 새로 띄우지 않음: 구동 중인 드라이버가 있으면 마지막으로 본 상태를 반환
+        driver = run_drivers.get(run_id)
+        if driver is not None and driver.thread_id != thread_id:
+            raise ValueError(f"Run {run_id} does not belong to thread {thread_id}")
+        run = driver.run if driver is not None else None
+        # 드라이버가 없거나, 오류/시간 초과로 먼저 멈춰 마지막 상태가 오래되었다면 한 번 직접 조회
+        if run is None or (driver.done and run.status not in TERMINAL_STATUSES):
+            run = await run_sync(client.runs.get, thread_id=thread_id, run_id=run_id)
 
-        return RunResponse(
-            id=run.id,
-            thread_id=run.thread_id,
-            agent_id=agent_id_val,
-            status=run.status,
-            created_at=created_at_ts,
-            last_error=last_error
-        )
+        return _map_run_to_response(run)
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=404, detail=f"실행 조회 실패: {str(e)}")
 
+# 실행 진행 이벤트 스트림 (Stream run events via SSE)
+@router.get("/threads/{thread_id}/runs/{run_id}/events")
+async def stream_run_events(thread_id: str, run_id: str):
+    try:
+        driver = ensure_run_driver(thread_id, run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=f"실행 조회 실패: {str(e)}")
+    return _sse_response(driver)
+
 # 실행 취소 (Cancel run)
 @router.post("/threads/{thread_id}/runs/{run_id}/cancel", response_model=RunResponse)
 async def cancel_run(thread_id: str, run_id: str):
     client = get_agents_client()
     try:
-        client.runs.cancel(thread_id=thread_id, run_id=run_id)
+        await run_sync(client.runs.cancel, thread_id=thread_id, run_id=run_id)
         # Return updated status
-        run = client.runs.get(thread_id=thread_id, run_id=run_id)
+        run = await run_sync(client.runs.get, thread_id=thread_id, run_id=run_id)
 
         created_at_ts = 0
         if hasattr(run, "created_at"):
@@ -1,4 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from ..mcp_manager import MCP_SERVERS, tool_cache, session_manager
+from ..run_waiter import run_wait_metrics
+from ..workflow_executor import workflow_executor
+from ..message_cache import message_cache
+from ..client import credential_stats
+from .agents import agent_list_cache
 
 router = APIRouter()
 
@@ -14,5 +21,28 @@ async def get_metrics():
     return {
         "active_runs": 5,
         "completed_runs_today": 120,
-        "tokens_used": 45000
+        "tokens_used": 45000,
+        # 실행 상태 폴링 통계 (폴링 횟수, 종료 후 확인까지 낭비된 대기 시간)
+        "run_waiter": run_wait_metrics.snapshot(),
+        # 워크플로우 실행기 대기열 깊이와 대기 시간
+        "workflow_executor": workflow_executor.stats(),
+        # 스레드 메시지 캐시 적중률과 메모리 사용량
+        "message_cache": message_cache.stats(),
+        # 에이전트 목록 응답 캐시 적중률
+        "agent_list_cache": agent_list_cache.stats(),
+        # 자격 증명 토큰 캐시 (남은 유효 시간, 백그라운드 갱신 횟수)
+        "credential": credential_stats()
     }
+
+# MCP 도구 정의 캐시 및 세션 풀 상태 조회
+@router.get("/mcp/tool-cache")
+async def get_mcp_tool_cache():
+    return {"cache": tool_cache.snapshot(), "pools": session_manager.stats()}
+
+# MCP 도구 정의 캐시 비우기 (server 미지정 시 전체)
+@router.delete("/mcp/tool-cache")
+async def flush_mcp_tool_cache(server: Optional[str] = None):
+    if server and server not in MCP_SERVERS:
+        raise HTTPException(status_code=404, detail=f"알 수 없는 MCP 서버: {server}")
+    tool_cache.invalidate(server, reason="admin flush")
+    return {"message": "도구 캐시가 초기화되었습니다.", "server": server}
@@ -1,17 +1,42 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import List, Optional
 from ..models import ThreadCreate, ThreadResponse, MessageCreate, MessageResponse
-from ..client import get_agents_client
-import time
+from ..client import get_agents_client, run_sync
+from ..message_cache import message_cache, etag_matches
 
 router = APIRouter()
 
+def map_message_to_response(msg) -> MessageResponse:
+    content_list = []
+    if msg.content:
+        for c in msg.content:
+            if c.type == "text":
+                content_list.append({"type": "text", "text": {"value": c.text.value}})
+            elif c.type == "image_file":
+                content_list.append({"type": "image_file", "image_file": {"file_id": c.image_file.file_id}})
+
+    created_at_ts = 0
+    if hasattr(msg, "created_at"):
+        if isinstance(msg.created_at, int):
+            created_at_ts = msg.created_at
+        elif hasattr(msg.created_at, "timestamp"):
+            created_at_ts = int(msg.created_at.timestamp())
+
+    return MessageResponse(
+        id=msg.id,
+        thread_id=msg.thread_id,
+        role=msg.role,
+        content=content_list,
+        attachments=[],
+        created_at=created_at_ts
+    )
+
 # 스레드 생성 (Create a thread)
 @router.post("/threads", response_model=ThreadResponse)
 async def create_thread(thread: ThreadCreate):
     client = get_agents_client()
     try:
-        az_thread = client.threads.create(metadata=thread.metadata)
+        az_thread = await run_sync(client.threads.create, metadata=thread.metadata)
         
         created_at_ts = 0
         if hasattr(az_thread, "created_at"):
@@ -35,7 +60,7 @@ async def create_thread(thread: ThreadCreate):
 async def get_thread(thread_id: str):
     client = get_agents_client()
     try:
-        az_thread = client.threads.get(thread_id)
+        az_thread = await run_sync(client.threads.get, thread_id)
         
         created_at_ts = 0
         if hasattr(az_thread, "created_at"):
@@ -57,47 +82,82 @@ async def get_thread(thread_id: str):
 async def delete_thread(thread_id: str):
     client = get_agents_client()
     try:
-        client.threads.delete(thread_id)
+        await run_sync(client.threads.delete, thread_id)
+        message_cache.invalidate(thread_id)
         return {"message": "스레드가 성공적으로 삭제되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"스레드 삭제 실패: {str(e)}")
 
+# 전체 조회 시 페이지당 요청 수 (Agents API 최대 100)
+MESSAGE_PAGE_SIZE = 100
+
+def fetch_messages(client, thread_id: str, after: Optional[str] = None, before: Optional[str] = None,
+                   limit: Optional[int] = None, order: str = "desc") -> list:
+    """
+    스레드 메시지를 order 순서로 조회합니다. (동기 함수이므로 run_sync로 호출)
+    after/before는 메시지 ID 커서이며, after는 SDK 페이지 연속 토큰으로 전달됩니다.
+    limit을 주면 한 페이지만, 없으면 끝까지 조회합니다.
+    """
+    paged = client.messages.list(
+        thread_id=thread_id,
+        limit=limit or MESSAGE_PAGE_SIZE,
+        order=order,
+        before=before
+    )
+    pages = paged.by_page(continuation_token=after)
+    if limit:
+        return list(next(pages, []))
+    return [msg for page in pages for msg in page]
+
+async def _list_cached_messages(thread_id: str, request: Request, response: Response):
+    entry = message_cache.get(thread_id)
+    if entry is None:
+        client = get_agents_client()
+        fetch_started = message_cache.begin_fetch()
+        try:
+            messages = await run_sync(fetch_messages, client, thread_id)
+        except Exception as e:
+            raise HTTPException(status_code=404, detail=f"메시지 목록 조회 실패: {str(e)}")
+        mapped = [map_message_to_response(msg) for msg in messages]
+        # 조회 도중 메시지가 추가되었다면 캐시에 넣지 않고 이번 응답에만 사용
+        entry = message_cache.put(thread_id, mapped, fetch_started)
+        if entry is None:
+            return mapped
+
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        message_cache.not_modified += 1
+        return Response(status_code=304, headers={"ETag": entry.etag})
+    response.headers["ETag"] = entry.etag
+    return entry.messages
+
 # 메시지 목록 조회 (List messages)
+# after에 마지막으로 받은 메시지 ID를 주고 order=asc로 조회하면 그 이후 메시지만 가져올 수 있습니다.
 @router.get("/threads/{thread_id}/messages", response_model=List[MessageResponse])
-async def list_messages(thread_id: str):
+async def list_messages(
+    thread_id: str,
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    order: str = Query("desc", pattern="^(asc|desc)$")
+):
+    # 커서 없이 전체 목록을 요청하면 스레드 메시지 캐시를 사용 (ETag/If-None-Match 지원)
+    if after is None and before is None and limit is None and order == "desc":
+        return await _list_cached_messages(thread_id, request, response)
+
     client = get_agents_client()
     try:
-        messages = client.messages.list(thread_id=thread_id)
-        
-        response_messages = []
-        for msg in messages:
-            content_list = []
-            if msg.content:
-                for c in msg.content:
-                    if c.type == "text":
-                        content_list.append({"type": "text", "text": {"value": c.text.value}})
-                    elif c.type == "image_file":
-                        content_list.append({"type": "image_file", "image_file": {"file_id": c.image_file.file_id}})
-            
-            created_at_ts = 0
-            if hasattr(msg, "created_at"):
-                if isinstance(msg.created_at, int):
-                    created_at_ts = msg.created_at
-                elif hasattr(msg.created_at, "timestamp"):
-                    created_at_ts = int(msg.created_at.timestamp())
-
-            response_messages.append(MessageResponse(
-                id=msg.id,
-                thread_id=msg.thread_id,
-                role=msg.role,
-                content=content_list,
-                attachments=[], 
-                created_at=created_at_ts
-            ))
-        return response_messages
+        # 목록 순회 시 페이지 요청이 발생하므로 스레드 풀 안에서 조회
+        messages = await run_sync(fetch_messages, client, thread_id, after, before, limit, order)
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"메시지 목록 조회 실패: {str(e)}")
 
+    if limit and len(messages) == limit:
+        # 다음 페이지는 after=<마지막 메시지 ID>로 이어서 조회
+        response.headers["X-Next-Cursor"] = messages[-1].id
+    return [map_message_to_response(msg) for msg in messages]
+
 # 메시지 추가 (Add a message)
 @router.post("/threads/{thread_id}/messages", response_model=MessageResponse)
 async def create_message(thread_id: str, message: MessageCreate):
@@ -114,35 +174,17 @@ async def create_message(thread_id: str, message: MessageCreate):
         elif isinstance(message.content, str):
             content_arg = message.content
             
-        created_msg = client.messages.create(
+        created_msg = await run_sync(
+            client.messages.create,
             thread_id=thread_id,
             role=message.role,
             content=content_arg
         )
         
-        content_list = []
-        if created_msg.content:
-            for c in created_msg.content:
-                if c.type == "text":
-                    content_list.append({"type": "text", "text": {"value": c.text.value}})
-                elif c.type == "image_file":
-                    content_list.append({"type": "image_file", "image_file": {"file_id": c.image_file.file_id}})
-        
-        created_at_ts = 0
-        if hasattr(created_msg, "created_at"):
-            if isinstance(created_msg.created_at, int):
-                created_at_ts = created_msg.created_at
-            elif hasattr(created_msg.created_at, "timestamp"):
-                created_at_ts = int(created_msg.created_at.timestamp())
-
-        return MessageResponse(
-            id=created_msg.id,
-            thread_id=created_msg.thread_id,
-            role=created_msg.role,
-            content=content_list,
-            attachments=[],
-            created_at=created_at_ts
-        )
+        mapped = map_message_to_response(created_msg)
+        # 캐시된 메시지 목록에 바로 반영 (write-through)
+        message_cache.add_messages(thread_id, [mapped])
+        return mapped
     except Exception as e:
         import traceback
         traceback.print_exc()
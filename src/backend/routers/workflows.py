@@ -1,107 +1,129 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from ..models import WorkflowInput, WorkflowExecutionResponse
-from ..client import get_agents_client
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Response
+from ..models import WorkflowInput, WorkflowExecutionResponse, WorkflowExecutionSummary
+from ..client import get_agents_client, run_sync
+from ..workflow_engine import Workflow, WorkflowStep, run_workflow
+from ..run_waiter import wait_for_run, TERMINAL_STATUSES
+from ..workflow_executor import workflow_executor, QueueFullError, PRIORITIES
+from ..agent_index import agent_index, StaleAgentError
+from ..execution_store import execution_store, INTERRUPTED_REASON
+from azure.core.exceptions import ResourceNotFoundError
 import uuid
 import time
 import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 router = APIRouter()
 
 # 워크플로우 예시 정의
 AVAILABLE_WORKFLOWS = ["hr-onboarding", "research-news", "trip-planner"]
 
-# In-memory storage for execution state
-executions_db: Dict[str, Dict[str, Any]] = {}
-
-# Cache for created agent IDs to prevent duplicates
-agent_cache: Dict[str, str] = {}
-
-# Agent Definitions
-AGENTS_CONFIG = {
-    "Identity Agent": {
-        "instructions": "You are an Identity Management Agent. When given a candidate name, generate a company email address for them in the format firstname.lastname@company.com. Return only the email address. 답변은 반드시 한국어로 작성해 주세요.",
-        "model": "gpt-4o-mini"
-    },
-    "IT Agent": {
-        "instructions": "You are an IT Coordinator Agent. Assign laptops based on role. Developers get MacBook Pro, others get Dell XPS. Return only the assigned device name. 답변은 반드시 한국어로 작성해 주세요.",
-        "model": "gpt-4o-mini"
-    },
-    "Training Agent": {
-        "instructions": "You are a Training Coordinator Agent. Assign courses based on role. Developers get 'Security Coding', others get 'Company Culture'. Return the list of courses. 답변은 반드시 한국어로 작성해 주세요.",
-        "model": "gpt-4o-mini"
-    }
+# 워크플로우 정의 (Workflow Definitions)
+# Identity, IT, Training 단계는 서로의 결과에 의존하지 않으므로 동시에 실행됩니다.
+HR_ONBOARDING_WORKFLOW = Workflow(
+    name="hr-onboarding",
+    steps=[
+        WorkflowStep(
+            id="identity",
+            agent="Identity Agent",
+            instructions="You are an Identity Management Agent. When given a candidate name, generate a company email address for them in the format firstname.lastname@company.com. Return only the email address. 답변은 반드시 한국어로 작성해 주세요.",
+            action="이메일 생성",
+            prompt="({name})님을 위한 이메일을 생성해주세요 (한국어로 답변)",
+        ),
+        WorkflowStep(
+            id="it",
+            agent="IT Agent",
+            instructions="You are an IT Coordinator Agent. Assign laptops based on role. Developers get MacBook Pro, others get Dell XPS. Return only the assigned device name. 답변은 반드시 한국어로 작성해 주세요.",
+            action="자산 할당",
+            prompt="역할: {role}에 따른 장비를 할당해주세요 (한국어로 답변)",
+        ),
+        WorkflowStep(
+            id="training",
+            agent="Training Agent",
+            instructions="You are a Training Coordinator Agent. Assign courses based on role. Developers get 'Security Coding', others get 'Company Culture'. Return the list of courses. 답변은 반드시 한국어로 작성해 주세요.",
+            action="교육 과정 배정",
+            prompt="역할: {role}에 따른 교육 과정을 배정해주세요 (한국어로 답변)",
+        ),
+    ]
+)
+
+WORKFLOWS: Dict[str, Workflow] = {
+    HR_ONBOARDING_WORKFLOW.name: HR_ONBOARDING_WORKFLOW,
 }
 
-def ensure_agent(client, name, config):
-    # Check cache first
-    if name in agent_cache:
-        print(f"Using cached agent: {name} (ID: {agent_cache[name]})")
-        return agent_cache[name]
-    
+async def ensure_agent(client, name, config):
+    # 이름 → ID 인덱스 조회 (처음 한 번만 전체 목록을 적재)
     try:
-        # Try to find existing agent by name
-        assistants = list(client.list())  # Convert to list to handle iterator
-        for agent in assistants:
-            if agent.name == name:
-                print(f"Found existing agent: {name} (ID: {agent.id})")
-                agent_cache[name] = agent.id
-                return agent.id
+        await agent_index.ensure_loaded(client)
+        agent_id = agent_index.get(name)
+        if agent_id:
+            print(f"Using cached agent: {name} (ID: {agent_id})")
+            return agent_id
     except Exception as e:
         print(f"Error checking existing agents: {e}")
     
     # If not found, create new agent
+    # 같은 이름을 동시에 요청한 워크플로우가 각각 에이전트를 만들지 않도록 이름별로 한 번만 생성
+    async with agent_index.name_lock(name):
+        agent_id = agent_index.get(name)
+        if agent_id:
+            print(f"Using cached agent: {name} (ID: {agent_id})")
+            return agent_id
+        try:
+            print(f"Creating new agent: {name}")
+            agent = await run_sync(
+                client.create_agent,
+                name=name,
+                instructions=config["instructions"],
+                model=config["model"]
+            )
+            print(f"Created agent: {name} (ID: {agent.id})")
+            agent_index.add(name, agent.id)
+            return agent.id
+        except Exception as e:
+            print(f"Error creating agent {name}: {e}")
+            return None
+
+def _agent_config(step: WorkflowStep) -> dict:
+    return {"instructions": step.instructions, "model": step.model}
+
+async def get_workflow_agents(client, workflow: Workflow):
+    names = {step.agent: step for step in workflow.steps}
+    ids = await asyncio.gather(*(ensure_agent(client, name, _agent_config(step)) for name, step in names.items()))
+    return {name: aid for name, aid in zip(names, ids) if aid}
+
+async def run_agent_task(client, agent_id, user_content):
     try:
-        print(f"Creating new agent: {name}")
-        agent = client.create_agent(
-            name=name,
-            instructions=config["instructions"],
-            model=config["model"]
-        )
-        print(f"Created agent: {name} (ID: {agent.id})")
-        agent_cache[name] = agent.id
-        return agent.id
-    except Exception as e:
-        print(f"Error creating agent {name}: {e}")
-        return None
-
-def get_onboarding_agents(client):
-    agent_ids = {}
-    for name, config in AGENTS_CONFIG.items():
-        aid = ensure_agent(client, name, config)
-        if aid:
-             agent_ids[name] = aid
-    return agent_ids
-
-def run_agent_task(client, agent_id, user_content):
-    try:
-        thread = client.threads.create()
-        client.messages.create(
+        thread = await run_sync(client.threads.create)
+        await run_sync(
+            client.messages.create,
             thread_id=thread.id,
             role="user",
             content=user_content
         )
-        run = client.runs.create(
-            thread_id=thread.id,
-            agent_id=agent_id
+        try:
+            run = await run_sync(
+                client.runs.create,
+                thread_id=thread.id,
+                agent_id=agent_id
+            )
+        except ResourceNotFoundError:
+            # 인덱스의 에이전트가 외부에서 삭제된 경우
+            raise StaleAgentError(agent_id)
+
+        # 이 워크플로우는 도구 호출을 기대하지 않으므로 requires_action에서도 대기를 멈춤
+        # 단계 타임아웃으로 대기가 취소되면 원격 실행도 함께 취소됩니다.
+        run = await wait_for_run(
+            client, thread.id, run.id,
+            until=TERMINAL_STATUSES | {"requires_action"},
+            cancel_run_on_abort=True
         )
-        
-        # Simple polling loop
-        while run.status in ["queued", "in_progress", "requires_action"]:
-            time.sleep(1)
-            run = client.runs.get(thread_id=thread.id, run_id=run.id)
-            # Simplistic handling: no tool outputs in this workflow currently
-            if run.status == "requires_action":
-                # If we encountered a tool call we didn't expect, break or fail
-                # For this specific HR workflow, we expect simple text.
-                print("Unexpected requires_action in HR workflow")
-                break
-        
+        if run.status == "requires_action":
+            print("Unexpected requires_action in HR workflow")
+
         if run.status == "completed":
-            messages = client.messages.list(thread_id=thread.id)
             # messages are usually reverse chronological
             # Convert iterator to list to access index 0
-            messages_list = list(messages)
+            messages_list = await run_sync(lambda: list(client.messages.list(thread_id=thread.id)))
             if messages_list:
                  msg_content = "No content"
                  # Check latest message content
@@ -114,81 +136,100 @@ def run_agent_task(client, agent_id, user_content):
                  return "No response message found."
         else:
             return f"Error: Run status {run.status}"
-            
+
+    except (asyncio.CancelledError, StaleAgentError):
+        raise
     except Exception as e:
         return f"Error executing task: {str(e)}"
 
-def process_hr_onboarding_agents(execution_id: str, input_data: dict):
-    # Create a fresh client inside the task
-    from ..client import get_agents_client
+async def process_workflow(workflow: Workflow, execution_id: str, input_data: dict):
     client = get_agents_client()
     
-    agent_ids = get_onboarding_agents(client)
-    
-    candidate_name = input_data.get("name", "Unknown")
-    role = input_data.get("role", "Employee")
-
-    def update_status(status, step_data=None):
-        if execution_id in executions_db:
-            executions_db[execution_id]["status"] = status
-            if step_data:
-                current_result = executions_db[execution_id].get("result") or {"steps": []}
-                if "steps" not in current_result:
-                    current_result["steps"] = []
-                current_result["steps"].append(step_data)
-                executions_db[execution_id]["result"] = current_result
+    # 저장소 호출(SQLite 등)은 이벤트 루프를 막지 않도록 스레드 풀에서 실행
+    async def update_status(status, step_data=None):
+        if step_data:
+            await run_sync(execution_store.append_step, execution_id, step_data)
+        await run_sync(execution_store.update_status, execution_id, status)
+
+    async def record_step(record):
+        await run_sync(execution_store.append_step, execution_id, record)
+
+    async def run_step(step: WorkflowStep, prompt: str) -> str:
+        agent_id = agent_ids.get(step.agent)
+        if not agent_id:
+            raise RuntimeError("Agent not found")
+        try:
+            response = await run_agent_task(client, agent_id, prompt)
+        except StaleAgentError:
+            # 삭제된 ID는 인덱스에서 빼고 다시 확보한 뒤 한 번 더 실행
+            agent_index.remove(agent_id)
+            agent_id = await ensure_agent(client, step.agent, _agent_config(step))
+            if not agent_id:
+                raise RuntimeError("Agent not found")
+            agent_ids[step.agent] = agent_id
+            response = await run_agent_task(client, agent_id, prompt)
+        # run_agent_task는 실패 시 "Error..." 문자열을 반환하므로 재시도를 위해 예외로 변환
+        if response.startswith("Error"):
+            raise RuntimeError(response)
+        return response
 
     try:
-        # Step 1: Identity
-        update_status("in_progress")
-        if "Identity Agent" in agent_ids:
-            id_response = run_agent_task(client, agent_ids["Identity Agent"], f"({candidate_name})님을 위한 이메일을 생성해주세요 (한국어로 답변)")
-            update_status("in_progress", {
-                "agent": "Identity Agent",
-                "action": "이메일 생성",
-                "details": id_response,
-                "timestamp": int(time.time())
-            })
-        else:
-            update_status("in_progress", {
-                "agent": "Identity Agent",
-                "action": "Error",
-                "details": "Agent not found",
-                "timestamp": int(time.time())
-            })
-
-        # Step 2: IT
-        if "IT Agent" in agent_ids:
-            it_response = run_agent_task(client, agent_ids["IT Agent"], f"역할: {role}에 따른 장비를 할당해주세요 (한국어로 답변)")
-            update_status("in_progress", {
-                "agent": "IT Agent",
-                "action": "자산 할당",
-                "details": it_response,
-                "timestamp": int(time.time())
-            })
-
-        # Step 3: Training
-        if "Training Agent" in agent_ids:
-            tr_response = run_agent_task(client, agent_ids["Training Agent"], f"역할: {role}에 따른 교육 과정을 배정해주세요 (한국어로 답변)")
-            update_status("completed", {
-                "agent": "Training Agent",
-                "action": "교육 과정 배정",
-                "details": tr_response,
-                "timestamp": int(time.time())
-            })
-        
-        # If we reached here, mark completed if not already
-        executions_db[execution_id]["status"] = "completed"
+        await update_status("in_progress")
+        agent_ids = await get_workflow_agents(client, workflow)
+        inputs = {"name": "Unknown", "role": "Employee", **input_data}
+        succeeded = await run_workflow(
+            workflow,
+            inputs,
+            run_step,
+            # 단계 기록은 저장소에서 모아서 기록됨
+            record_step
+        )
+        await update_status("completed" if succeeded else "failed")
 
     except Exception as e:
-        print(f"Error in onboarding workflow: {e}")
-        update_status("failed", {
+        print(f"Error in {workflow.name} workflow: {e}")
+        await update_status("failed", {
             "agent": "System",
             "action": "Error",
             "details": str(e),
             "timestamp": int(time.time())
         })
 
+async def process_hr_onboarding_agents(execution_id: str, input_data: dict):
+    await process_workflow(HR_ONBOARDING_WORKFLOW, execution_id, input_data)
+
+async def resume_queued_executions() -> Tuple[List[str], List[str]]:
+    """
+    서버 시작 시 승인되었지만 시작되지 못한(queued) 실행을 실행기 대기열에 다시 등록합니다.
+    아직 어떤 단계도 실행되지 않았으므로 처음부터 실행해도 안전합니다.
+    우선순위는 저장하지 않으므로 normal로 등록하고, 대기열이 가득 차면 승인 대기로 되돌립니다.
+    승인 단계가 없는 예시용 워크플로우는 재개할 작업이 없으므로 실패로 정리합니다.
+    (다시 등록한 ID 목록, 실패로 정리한 ID 목록)을 반환합니다.
+    """
+    queued, cursor = [], None
+    while True:
+        page, cursor = await run_sync(execution_store.list, status="queued", cursor=cursor, limit=500, include_steps=False)
+        queued.extend(page)
+        if not cursor:
+            break
+
+    resumed, unresumable = [], []
+    # 목록은 최신순이므로 먼저 승인된 실행부터 등록
+    for execution in reversed(queued):
+        execution_id = execution["execution_id"]
+        if execution["workflow_name"] != "hr-onboarding":
+            unresumable.append(execution_id)
+            continue
+        try:
+            workflow_executor.submit(
+                execution_id, process_hr_onboarding_agents, execution_id, execution.get("inputs") or {}
+            )
+            resumed.append(execution_id)
+        except QueueFullError:
+            await run_sync(execution_store.transition_status, execution_id, "queued", "waiting_for_approval")
+    failed = await run_sync(execution_store.fail_active, INTERRUPTED_REASON, unresumable) if unresumable else []
+    return resumed, failed
+
 @router.get("/workflows")
 async def list_workflows():
     return {"workflows": AVAILABLE_WORKFLOWS}
@@ -225,23 +266,35 @@ async def plan_workflow(workflow_name: str, input_data: WorkflowInput):
         "created_at": int(time.time()),
         "inputs": inputs # Store inputs for later execution
     }
-    executions_db[execution_id] = initial_state
+    await run_sync(execution_store.create, initial_state)
     
     return WorkflowExecutionResponse(**initial_state)
 
 @router.post("/workflows/executions/{execution_id}/approve", response_model=WorkflowExecutionResponse)
-async def approve_workflow(execution_id: str, background_tasks: BackgroundTasks):
-    if execution_id not in executions_db:
+async def approve_workflow(execution_id: str, priority: str = "normal"):
+    execution = await run_sync(execution_store.get, execution_id)
+    if execution is None:
         raise HTTPException(status_code=404, detail="Execution not found")
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority는 {', '.join(PRIORITIES)} 중 하나여야 합니다.")
     
-    execution = executions_db[execution_id]
-    if execution["status"] != "waiting_for_approval":
-        raise HTTPException(status_code=400, detail="Workflow not waiting for approval")
-    
-    execution["status"] = "queued"
     inputs = execution.get("inputs", {})
     
-    background_tasks.add_task(process_hr_onboarding_agents, execution_id, inputs)
+    # 승인 대기 → queued 전환을 원자적으로 수행해 동시에 들어온 승인 중 하나만 등록되도록 함
+    # (워커가 in_progress로 바꾼 뒤에 queued로 덮어쓰지 않도록 등록 전에 상태를 먼저 기록)
+    if not await run_sync(execution_store.transition_status, execution_id, "waiting_for_approval", "queued"):
+        raise HTTPException(status_code=400, detail="Workflow not waiting for approval")
+    # 전용 실행기 대기열에 등록 (가득 차면 승인 상태로 되돌리고 429로 거절)
+    try:
+        workflow_executor.submit(execution_id, process_hr_onboarding_agents, execution_id, inputs, priority=priority)
+    except QueueFullError as e:
+        await run_sync(execution_store.transition_status, execution_id, "queued", "waiting_for_approval")
+        raise HTTPException(
+            status_code=429,
+            detail="워크플로우 대기열이 가득 찼습니다. 잠시 후 다시 시도해 주세요.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    execution["status"] = "queued"
     
     return WorkflowExecutionResponse(**execution)
 
@@ -265,29 +318,58 @@ async def execute_workflow(workflow_name: str, input_data: WorkflowInput, backgr
         "created_at": int(time.time()),
         "inputs": input_data.inputs
     }
-    executions_db[execution_id] = initial_state
+    await run_sync(execution_store.create, initial_state)
     
     # Generic mock for others
     background_tasks.add_task(lambda eid: time.sleep(1), execution_id)
         
     return WorkflowExecutionResponse(**initial_state)
 
-@router.get("/workflows/executions", response_model=List[WorkflowExecutionResponse])
-async def list_executions():
-    return [WorkflowExecutionResponse(**data) for data in executions_db.values()]
+@router.get(
+    "/workflows/executions",
+    response_model=List[Union[WorkflowExecutionSummary, WorkflowExecutionResponse]]
+)
+async def list_executions(
+    response: Response,
+    status: Optional[str] = None,
+    workflow_name: Optional[str] = None,
+    created_from: Optional[int] = None,
+    created_to: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    view: str = Query("full", pattern="^(full|summary)$")
+):
+    # 필터링과 페이지 처리는 저장소에서 수행 (최신순). 다음 페이지 커서는 X-Next-Cursor 헤더로 전달
+    try:
+        executions, next_cursor = await run_sync(
+            execution_store.list,
+            status=status,
+            workflow_name=workflow_name,
+            created_from=created_from,
+            created_to=created_to,
+            cursor=cursor,
+            limit=limit,
+            include_steps=(view == "full")
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if view == "summary":
+        return [WorkflowExecutionSummary(**data) for data in executions]
+    return [WorkflowExecutionResponse(**data) for data in executions]
 
 @router.get("/workflows/executions/{execution_id}", response_model=WorkflowExecutionResponse)
 async def get_execution(execution_id: str):
-    if execution_id not in executions_db:
+    data = await run_sync(execution_store.get, execution_id)
+    if data is None:
         raise HTTPException(status_code=404, detail="실행 정보를 찾을 수 없습니다.")
     
-    data = executions_db[execution_id]
     return WorkflowExecutionResponse(**data)
 
 @router.delete("/workflows/executions/{execution_id}")
 async def delete_execution(execution_id: str):
-    if execution_id not in executions_db:
+    if not await run_sync(execution_store.delete, execution_id):
         raise HTTPException(status_code=404, detail="실행 정보를 찾을 수 없습니다.")
     
-    del executions_db[execution_id]
     return {"message": "실행 기록이 성공적으로 삭제되었습니다."}
@@ -0,0 +1,363 @@
+import asyncio
+import json
+import logging
+import os
+from typing import List, Dict, Any, Optional
+
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+
+from .client import get_agents_client, run_sync, run_stream_sync
+from .mcp_manager import execute_mcp_tool_call
+from .run_waiter import wait_for_run, RunWaitTimeout, TERMINAL_STATUSES
+from .routers.threads import map_message_to_response
+from .message_cache import message_cache
+
+logger = logging.getLogger("run-driver")
+
+# 한 번의 requires_action 단계에서 동시에 실행할 도구 호출 수와 호출별 타임아웃(초)
+TOOL_CALL_CONCURRENCY = int(os.getenv("TOOL_CALL_CONCURRENCY", "4"))
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "30"))
+
+# 실행 드라이버 설정: 최대 구동 시간(초), 종료 후 이벤트 보관 시간(초)
+RUN_DRIVER_TIMEOUT = float(os.getenv("RUN_DRIVER_TIMEOUT", "600"))
+RUN_DRIVER_RETENTION = float(os.getenv("RUN_DRIVER_RETENTION", "60"))
+# 실행 조회/도구 결과 제출이 일시적으로 실패할 때 연속 재시도 횟수와 첫 대기 시간(초, 매번 2배)
+RUN_DRIVER_MAX_RETRIES = int(os.getenv("RUN_DRIVER_MAX_RETRIES", "5"))
+RUN_DRIVER_RETRY_DELAY = float(os.getenv("RUN_DRIVER_RETRY_DELAY", "1.0"))
+SSE_KEEPALIVE_INTERVAL = 15
+
+
+async def _execute_tool_call(tool_call, semaphore: asyncio.Semaphore) -> Dict[str, str]:
+    fn_name = tool_call.function.name
+    fn_args = tool_call.function.arguments
+    try:
+        # Arguments might be a string or already a dict depending on SDK version
+        if isinstance(fn_args, str):
+            args_dict = json.loads(fn_args)
+        else:
+            args_dict = fn_args
+
+        async with semaphore:
+            # execute_mcp_tool_call expects fn_name and dict arguments
+            output_str = await asyncio.wait_for(execute_mcp_tool_call(fn_name, args_dict), TOOL_CALL_TIMEOUT)
+        return {"tool_call_id": tool_call.id, "output": str(output_str)}
+    except asyncio.TimeoutError:
+        return {"tool_call_id": tool_call.id, "output": f"Error fulfilling tool call: timed out after {TOOL_CALL_TIMEOUT}s"}
+    except Exception as e:
+        return {"tool_call_id": tool_call.id, "output": f"Error fulfilling tool call: {str(e)}"}
+
+
+def get_mcp_tool_calls(tool_calls) -> list:
+    # Check if it's an MCP tool (mapped by prefix)
+    return [tc for tc in tool_calls if "__" in tc.function.name]
+
+
+async def execute_tool_calls(tool_calls) -> List[Dict[str, str]]:
+    """
+    MCP 도구 호출(접두사 '__'로 구분)들을 동시에 실행합니다.
+    결과는 원래 tool_call 순서대로 반환됩니다.
+    """
+    semaphore = asyncio.Semaphore(max(1, TOOL_CALL_CONCURRENCY))
+    mcp_calls = get_mcp_tool_calls(tool_calls)
+    return list(await asyncio.gather(*(_execute_tool_call(tc, semaphore) for tc in mcp_calls)))
+
+
+def serialize_last_error(run) -> Optional[Dict[str, Any]]:
+    if not run.last_error:
+        return None
+    # Handle object vs dict
+    if isinstance(run.last_error, dict):
+        return {"code": run.last_error.get("code"), "message": run.last_error.get("message")}
+    return {"code": run.last_error.code, "message": run.last_error.message}
+
+
+def is_transient_error(error: Exception) -> bool:
+    """연결 오류, 408/429, 5xx 응답처럼 다시 시도하면 성공할 수 있는 SDK 오류인지 판단합니다."""
+    if isinstance(error, (ServiceRequestError, ServiceResponseError, ConnectionError)):
+        return True
+    if isinstance(error, HttpResponseError):
+        status = error.status_code or 0
+        return status in (408, 429) or status >= 500
+    return False
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class RunDriver:
+    """
+    하나의 실행(Run)의 수명 주기를 서버에서 구동합니다.
+    상태 조회, MCP 도구 호출 처리, 최종 메시지 조회를 담당하고 진행 이벤트를 구독자에게 전달합니다.
+    """
+
+    def __init__(self, thread_id: str, run_id: str):
+        self.thread_id = thread_id
+        self.run_id = run_id
+        self.run = None  # 마지막으로 조회한 SDK Run 객체
+        self.done = False
+        self.events: List[Dict[str, Any]] = []
+        self._subscribers: List[asyncio.Queue] = []
+        self._handled_tool_calls = set()
+        self._unsubmitted_outputs: List[Dict[str, str]] = []  # 실행했지만 아직 제출하지 못한 도구 결과
+        self._run_messages = None  # 실행이 완료되면 실행이 만든 메시지 목록 (최신순)
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._drive())
+
+    @property
+    def reusable(self) -> bool:
+        # 종료된 드라이버는 이벤트 재생용으로 재사용하고,
+        # 다른 이벤트 루프에서 시작된 태스크는 더 이상 진행되지 않으므로 새로 구동
+        if self.done:
+            return True
+        return (
+            self.task is not None
+            and not self.task.done()
+            and self.task.get_loop() is asyncio.get_running_loop()
+        )
+
+    def publish(self, event: str, data: Dict[str, Any]):
+        item = {"event": event, "data": data}
+        self.events.append(item)
+        for queue in self._subscribers:
+            queue.put_nowait(item)
+
+    async def subscribe(self):
+        """지금까지의 이벤트를 재생한 뒤 새 이벤트를 'done'까지 전달합니다. 유휴 시 None(keep-alive)을 보냅니다."""
+        queue: asyncio.Queue = asyncio.Queue()
+        history = list(self.events)
+        self._subscribers.append(queue)
+        try:
+            for item in history:
+                yield item
+            if self.done:
+                return
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield item
+                if item["event"] == "done":
+                    return
+        finally:
+            self._subscribers.remove(queue)
+
+    async def _drive(self):
+        client = get_agents_client()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + RUN_DRIVER_TIMEOUT
+        last_status = None
+
+        def on_update(run):
+            nonlocal last_status
+            self.run = run
+            if run.status != last_status:
+                last_status = run.status
+                self.publish("status", {"status": run.status, "last_error": serialize_last_error(run)})
+
+        def needs_attention(run) -> bool:
+            # 종료되었거나 아직 처리하지 않은 MCP 도구 호출이 있을 때 폴링을 멈춤
+            if run.status in TERMINAL_STATUSES:
+                return True
+            return run.status == "requires_action" and bool(self._pending_tool_calls(run))
+
+        try:
+            failures = 0
+            while True:
+                try:
+                    if self._unsubmitted_outputs:
+                        # 제출에 실패한 도구 결과는 도구를 다시 실행하지 않고 제출만 재시도
+                        await self._submit_tool_outputs(client)
+                    run = await wait_for_run(
+                        client, self.thread_id, self.run_id,
+                        until=needs_attention,
+                        max_wait=max(0.0, deadline - loop.time()),
+                        on_update=on_update
+                    )
+                    if run.status in TERMINAL_STATUSES:
+                        break
+                    await self._handle_tool_calls(client, self._pending_tool_calls(run))
+                    failures = 0
+                except Exception as e:
+                    # 일시적인 오류는 구동 시간이 남아 있는 동안 백오프 후 재시도
+                    retryable = isinstance(e, RunWaitTimeout) or is_transient_error(e)
+                    remaining = deadline - loop.time()
+                    if not retryable or remaining <= 0 or failures >= RUN_DRIVER_MAX_RETRIES:
+                        raise
+                    delay = min(RUN_DRIVER_RETRY_DELAY * 2 ** failures, remaining)
+                    failures += 1
+                    logger.warning(f"실행 드라이버 재시도 {failures}/{RUN_DRIVER_MAX_RETRIES} ({self.run_id}, {delay:.1f}초 후): {e}")
+                    await asyncio.sleep(delay)
+
+            if last_status == "completed":
+                await self._publish_messages(client)
+        except asyncio.CancelledError:
+            raise
+        except RunWaitTimeout:
+            self.publish("error", {"message": f"Run driver timed out after {RUN_DRIVER_TIMEOUT}s"})
+        except Exception as e:
+            logger.error(f"실행 드라이버 오류 ({self.run_id}): {e}")
+            self.publish("error", {"message": str(e)})
+        finally:
+            self._update_message_cache()
+            self.done = True
+            self.publish("done", {"status": last_status})
+            _schedule_cleanup(self)
+
+    def _update_message_cache(self):
+        # 완료된 실행의 메시지는 캐시에 덧붙이고, 그 외 종료(실패, 취소, 오류)는 캐시를 무효화
+        if self._run_messages is not None:
+            message_cache.add_messages(self.thread_id, self._run_messages)
+        else:
+            message_cache.invalidate(self.thread_id)
+
+    def _pending_tool_calls(self, run) -> list:
+        if not (run.required_action and run.required_action.submit_tool_outputs):
+            return []
+        # 제출 직후 조회에서 같은 requires_action이 다시 보일 수 있으므로 이미 처리한 호출은 제외
+        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+        return [tc for tc in get_mcp_tool_calls(tool_calls) if tc.id not in self._handled_tool_calls]
+
+    async def _handle_tool_calls(self, client, tool_calls) -> bool:
+        self._unsubmitted_outputs = await self._run_tool_calls(tool_calls)
+        if not self._unsubmitted_outputs:
+            return False
+        await self._submit_tool_outputs(client)
+        return True
+
+    async def _submit_tool_outputs(self, client):
+        await run_sync(
+            client.runs.submit_tool_outputs,
+            thread_id=self.thread_id,
+            run_id=self.run_id,
+            tool_outputs=self._unsubmitted_outputs
+        )
+        self._unsubmitted_outputs = []
+
+    async def _run_tool_calls(self, tool_calls) -> List[Dict[str, str]]:
+        mcp_calls = [tc for tc in get_mcp_tool_calls(tool_calls) if tc.id not in self._handled_tool_calls]
+        if not mcp_calls:
+            return []
+        self._handled_tool_calls.update(tc.id for tc in mcp_calls)
+        for tc in mcp_calls:
+            self.publish("tool_call.started", {
+                "tool_call_id": tc.id,
+                "name": tc.function.name,
+                "arguments": tc.function.arguments,
+            })
+        tool_outputs = await execute_tool_calls(mcp_calls)
+        for output in tool_outputs:
+            self.publish("tool_call.completed", output)
+        return tool_outputs
+
+    async def _publish_messages(self, client):
+        messages = await run_sync(lambda: list(client.messages.list(thread_id=self.thread_id, run_id=self.run_id)))
+        self._run_messages = [map_message_to_response(m) for m in messages]
+        self.publish("messages", {
+            "messages": [m.model_dump() for m in self._run_messages]
+        })
+
+
+class StreamedRunDriver(RunDriver):
+    """
+    runs.stream으로 실행을 생성하고 모델의 증분 출력(delta)을 이벤트로 전달합니다.
+    SDK 스트림은 동기 이터레이터이므로 스트림 전용 스레드 풀에서 소비하고,
+    드라이버 상태 변경과 이벤트 발행은 모두 이벤트 루프로 넘겨 처리합니다.
+    requires_action에서 멈추면 MCP 도구를 실행한 뒤 같은 스트림에 이어서 결과를 제출합니다.
+    """
+
+    def __init__(self, thread_id: str, run_kwargs: Dict[str, Any]):
+        super().__init__(thread_id, None)
+        self._run_kwargs = run_kwargs
+        self._last_status = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._drive_stream())
+
+    async def _drive_stream(self):
+        client = get_agents_client()
+        loop = asyncio.get_running_loop()
+        try:
+            self._run_messages = await run_stream_sync(self._consume_stream, client, loop)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"스트리밍 실행 오류 ({self.run_id}): {e}")
+            self.publish("error", {"message": str(e)})
+        finally:
+            self._update_message_cache()
+            self.done = True
+            self.publish("done", {"status": self.run.status if self.run else None})
+            if self.run_id:
+                _schedule_cleanup(self)
+
+    def _on_run_event(self, run):
+        # 이벤트 루프에서 호출됨: 실행 ID는 첫 이벤트에서 확정되며, 이후 get_run/events가 이 드라이버를 재사용
+        self.run = run
+        if self.run_id is None:
+            self.run_id = run.id
+            run_drivers[run.id] = self
+            self.publish("run.created", {"run_id": run.id, "thread_id": self.thread_id})
+        if run.status != self._last_status:
+            self._last_status = run.status
+            self.publish("status", {"status": run.status, "last_error": serialize_last_error(run)})
+
+    def _consume_stream(self, client, loop) -> Optional[list]:
+        """스트림 스레드에서 실행되며, 완료되면 실행이 만든 메시지 목록(최신순)을 반환합니다."""
+        emit = lambda event, data: loop.call_soon_threadsafe(self.publish, event, data)
+        last_status = None
+        completed_messages = []
+        with client.runs.stream(thread_id=self.thread_id, **self._run_kwargs) as stream:
+            for event_type, event_data, _ in stream:
+                if event_type == "thread.message.delta":
+                    emit("delta", {"message_id": event_data.id, "text": event_data.text})
+                elif event_type == "thread.message.completed":
+                    message = map_message_to_response(event_data)
+                    completed_messages.insert(0, message)  # 캐시와 같은 최신순으로 보관
+                    emit("message", message.model_dump())
+                elif str(event_type).startswith("thread.run.") and not str(event_type).startswith("thread.run.step"):
+                    run = event_data
+                    last_status = run.status
+                    loop.call_soon_threadsafe(self._on_run_event, run)
+                    if run.status == "requires_action" and run.required_action and run.required_action.submit_tool_outputs:
+                        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+                        tool_outputs = asyncio.run_coroutine_threadsafe(self._run_tool_calls(tool_calls), loop).result()
+                        if tool_outputs:
+                            # 제출 결과 스트림이 현재 이터레이터에 이어 붙음
+                            client.runs.submit_tool_outputs_stream(
+                                thread_id=self.thread_id,
+                                run_id=run.id,
+                                tool_outputs=tool_outputs,
+                                event_handler=stream
+                            )
+                elif event_type == "error":
+                    emit("error", {"message": str(event_data)})
+        return completed_messages if last_status == "completed" else None
+
+
+# Key: run_id, Value: RunDriver
+run_drivers: Dict[str, RunDriver] = {}
+
+
+def _schedule_cleanup(driver: RunDriver):
+    # 늦게 연결한 구독자도 이벤트를 재생할 수 있도록 일정 시간 보관 후 제거
+    def _remove():
+        if run_drivers.get(driver.run_id) is driver:
+            del run_drivers[driver.run_id]
+    asyncio.get_running_loop().call_later(RUN_DRIVER_RETENTION, _remove)
+
+
+def ensure_run_driver(thread_id: str, run_id: str) -> RunDriver:
+    """실행마다 하나의 드라이버만 구동되도록 보장합니다. 다른 스레드의 실행 ID이면 ValueError를 발생시킵니다."""
+    driver = run_drivers.get(run_id)
+    if driver is not None and driver.thread_id != thread_id:
+        raise ValueError(f"Run {run_id} does not belong to thread {thread_id}")
+    if driver is None or not driver.reusable:
+        driver = RunDriver(thread_id, run_id)
+        run_drivers[run_id] = driver
+        driver.start()
+    return driver
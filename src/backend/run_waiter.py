@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from .client import run_sync
+
+logger = logging.getLogger("run-waiter")
+
+# 실행 상태 폴링 설정 (초)
+# 첫 조회는 RUN_POLL_INITIAL 전후로 지터를 두고, 이후 상태 변화가 없으면 RUN_POLL_MAX까지 간격을 늘립니다.
+RUN_POLL_INITIAL = float(os.getenv("RUN_POLL_INITIAL", "0.25"))
+RUN_POLL_MAX = float(os.getenv("RUN_POLL_MAX", "2.0"))
+RUN_POLL_BACKOFF = float(os.getenv("RUN_POLL_BACKOFF", "1.5"))
+RUN_POLL_JITTER = 0.5
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled", "expired", "incomplete"}
+
+
+class RunWaitTimeout(asyncio.TimeoutError):
+    def __init__(self, run_id: str, max_wait: float, status: Optional[str]):
+        super().__init__(f"Run {run_id} did not finish within {max_wait}s (last status: {status})")
+        self.run_id = run_id
+        self.status = status
+
+
+class RunWaitMetrics:
+    """폴링 횟수와 낭비된 대기 시간(실행이 끝난 뒤 결과를 확인하기까지 걸린 시간)을 집계합니다."""
+
+    def __init__(self):
+        self.waits = 0
+        self.polls = 0
+        self.wait_seconds = 0.0
+        self.wasted_seconds = 0.0
+        self.timeouts = 0
+        self.cancellations = 0
+
+    def record(self, polls: int, waited: float, wasted: float):
+        self.waits += 1
+        self.polls += polls
+        self.wait_seconds += waited
+        self.wasted_seconds += wasted
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = max(self.waits, 1)
+        return {
+            "waits": self.waits,
+            "polls": self.polls,
+            "avg_polls_per_wait": round(self.polls / waits, 2),
+            "avg_wait_ms": int(self.wait_seconds / waits * 1000),
+            "avg_wasted_wait_ms": int(self.wasted_seconds / waits * 1000),
+            "total_wasted_wait_ms": int(self.wasted_seconds * 1000),
+            "timeouts": self.timeouts,
+            "cancellations": self.cancellations,
+        }
+
+
+run_wait_metrics = RunWaitMetrics()
+
+
+def _finished_at(run) -> Optional[float]:
+    # 실행이 실제로 끝난 시각 (SDK에 따라 datetime 또는 epoch 초)
+    for attr in ("completed_at", "failed_at", "cancelled_at"):
+        value = getattr(run, attr, None)
+        if isinstance(value, (int, float)) and value > 0:
+            return float(value)
+        if hasattr(value, "timestamp"):
+            return value.timestamp()
+    return None
+
+
+async def wait_for_run(
+    client,
+    thread_id: str,
+    run_id: str,
+    *,
+    until: Union[Iterable[str], Callable[[Any], bool]] = TERMINAL_STATUSES,
+    max_wait: Optional[float] = None,
+    on_update: Optional[Callable[[Any], None]] = None,
+    cancel_run_on_abort: bool = False,
+):
+    """
+    실행이 until 상태 중 하나가 될 때까지(또는 until(run)이 True일 때까지) 지수 백오프로 폴링하고
+    마지막 Run 객체를 반환합니다.
+    - 첫 조회는 지터를 둔 짧은 지연 후 수행하고, 상태가 바뀌면 간격을 처음으로 되돌립니다.
+    - max_wait을 넘기면 RunWaitTimeout을 발생시킵니다.
+    - 대기 중인 태스크가 취소되거나 시간 초과되면 cancel_run_on_abort=True일 때 원격 실행도 취소합니다.
+    on_update는 조회한 Run마다 호출됩니다.
+    """
+    if callable(until):
+        reached = until
+    else:
+        statuses = set(until)
+        reached = lambda run: run.status in statuses
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    delay = RUN_POLL_INITIAL * random.uniform(1 - RUN_POLL_JITTER, 1 + RUN_POLL_JITTER)
+    polls = 0
+    last_status = None
+    try:
+        while True:
+            await asyncio.sleep(delay)
+            run = await run_sync(client.runs.get, thread_id=thread_id, run_id=run_id)
+            polls += 1
+            if on_update:
+                on_update(run)
+
+            if reached(run):
+                waited = loop.time() - started
+                finished_at = _finished_at(run)
+                if finished_at is not None:
+                    wasted = max(0.0, min(time.time() - finished_at, delay))
+                else:
+                    # 종료 시각을 모르면 마지막 대기 구간의 절반을 추정치로 사용
+                    wasted = delay / 2
+                run_wait_metrics.record(polls, waited, wasted)
+                return run
+
+            if max_wait is not None and loop.time() - started >= max_wait:
+                run_wait_metrics.timeouts += 1
+                raise RunWaitTimeout(run_id, max_wait, run.status)
+
+            if run.status != last_status:
+                last_status = run.status
+                delay = RUN_POLL_INITIAL
+            else:
+                delay = min(delay * RUN_POLL_BACKOFF, RUN_POLL_MAX)
+            if max_wait is not None:
+                delay = min(delay, max(0.0, max_wait - (loop.time() - started)))
+    except (asyncio.CancelledError, RunWaitTimeout):
+        if cancel_run_on_abort:
+            run_wait_metrics.cancellations += 1
+            # 취소 요청 자체는 취소되지 않도록 보호
+            try:
+                await asyncio.shield(run_sync(client.runs.cancel, thread_id=thread_id, run_id=run_id))
+            except Exception as e:
+                logger.warning(f"실행 취소 실패 ({run_id}): {e}")
+        raise
@@ -1,6 +1,9 @@
 from fastapi.testclient import TestClient
 from src.backend.main import app
 import uuid
+from types import SimpleNamespace
+
+from src.backend.routers import agents
 
 client = TestClient(app)
 
@@ -65,3 +68,126 @@ def test_delete_agent():
     response = client.get(f"/api/v1/agents/{agent_id}")
     assert response.status_code == 404
 
+
+
+class FakeAgentPages:
+    def __init__(self, store, page_size):
+        self.store = store
+        self.page_size = page_size
+
+    def __iter__(self):
+        return iter(list(self.store))
+
+    def by_page(self, continuation_token=None):
+        ids = [a.id for a in self.store]
+        start = ids.index(continuation_token) + 1 if continuation_token else 0
+        for i in range(start, len(self.store), self.page_size):
+            yield iter(self.store[i:i + self.page_size])
+
+
+def test_list_agents_paginates_and_caches_until_changed(monkeypatch):
+    store = [
+        SimpleNamespace(id=f"asst_{i}", name=f"agent-{i}", model="gpt-4o", instructions="", tools=[], metadata={}, created_at=i)
+        for i in range(7)
+    ]
+    calls = []
+
+    def list_agents(limit):
+        calls.append(limit)
+        return FakeAgentPages(store, limit)
+
+    fake_client = SimpleNamespace(list=list_agents, delete_agent=lambda agent_id: store.pop([a.id for a in store].index(agent_id)))
+    monkeypatch.setattr(agents, "get_agents_client", lambda: fake_client)
+    monkeypatch.setattr(agents, "agent_list_cache", agents.AgentListCache(ttl=60))
+    monkeypatch.setattr(agents, "AGENT_PAGE_SIZE", 3)
+
+    # 기본 조회는 여러 페이지를 끝까지 가져옴 (50개 잘림 없음)
+    response = client.get("/api/v1/agents")
+    assert [a["id"] for a in response.json()] == [a.id for a in store]
+    assert "X-Next-Cursor" not in response.headers
+
+    # 커서 페이지네이션
+    response = client.get("/api/v1/agents", params={"limit": 4})
+    assert [a["id"] for a in response.json()] == ["asst_0", "asst_1", "asst_2", "asst_3"]
+    response = client.get("/api/v1/agents", params={"limit": 4, "after": response.headers["X-Next-Cursor"]})
+    assert [a["id"] for a in response.json()] == ["asst_4", "asst_5", "asst_6"]
+    assert "X-Next-Cursor" not in response.headers
+
+    # 같은 요청은 캐시에서 응답
+    calls.clear()
+    client.get("/api/v1/agents")
+    assert calls == []
+
+    # 삭제하면 캐시가 무효화됨
+    client.delete("/api/v1/agents/asst_0")
+    response = client.get("/api/v1/agents")
+    assert "asst_0" not in [a["id"] for a in response.json()]
+    assert calls == [3]
+
+
+def test_workflow_agent_creation_invalidates_agent_list(monkeypatch):
+    import asyncio
+    from src.backend.agent_index import agent_index
+    from src.backend.routers import workflows
+
+    store = []
+    calls = []
+
+    def list_agents(limit):
+        calls.append(limit)
+        return FakeAgentPages(store, limit)
+
+    def create_agent(name, instructions, model):
+        agent = SimpleNamespace(id=f"asst_{name}", name=name, model=model, instructions=instructions,
+                                tools=[], metadata={}, created_at=0)
+        store.insert(0, agent)
+        return agent
+
+    fake_client = SimpleNamespace(list=list_agents, create_agent=create_agent)
+    monkeypatch.setattr(agents, "get_agents_client", lambda: fake_client)
+    monkeypatch.setattr(agents, "agent_list_cache", agents.AgentListCache(ttl=60))
+    agent_index.clear()
+    try:
+        assert client.get("/api/v1/agents").json() == []
+
+        # 워크플로우가 없는 에이전트를 만들면 목록 캐시도 무효화되어 바로 보임
+        asyncio.run(workflows.ensure_agent(fake_client, "Identity Agent", {"instructions": "", "model": "gpt-4o"}))
+        response = client.get("/api/v1/agents")
+        assert [a["id"] for a in response.json()] == ["asst_Identity Agent"]
+    finally:
+        agent_index.clear()
+
+
+def test_agent_index_listing_replaces_stale_entries_but_keeps_changes_made_while_loading():
+    import asyncio
+    import threading
+    from src.backend.agent_index import AgentIndex
+
+    index = AgentIndex()
+    # 이전 적재에서 남은 항목은 새 목록에 없으면 사라져야 함
+    index.add("Deleted Agent", "agent_gone")
+    listing_started = threading.Event()
+    release_listing = threading.Event()
+
+    def list_agents(limit=None):
+        listing_started.set()
+        release_listing.wait(5)
+        return iter([
+            SimpleNamespace(id="agent_hr", name="HR Agent"),
+            SimpleNamespace(id="agent_removed", name="Removed Agent"),
+        ])
+
+    async def scenario():
+        load = asyncio.create_task(index.ensure_loaded(SimpleNamespace(list=list_agents)))
+        await asyncio.to_thread(listing_started.wait, 5)
+        # 목록 조회 중에 생성/삭제된 에이전트
+        index.add("New Agent", "agent_new")
+        index.remove("agent_removed")
+        release_listing.set()
+        await load
+
+    asyncio.run(scenario())
+    assert index.get("Deleted Agent") is None
+    assert index.get("HR Agent") == "agent_hr"
+    assert index.get("New Agent") == "agent_new"
+    assert index.get("Removed Agent") is None
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from azure.core.credentials import AccessToken
+
+from src.backend import client as client_module
+from src.backend.client import CachedTokenCredential
+
+
+class FakeCredential:
+    def __init__(self, lifetime=3600):
+        self.lifetime = lifetime
+        self.calls = []
+
+    def get_token(self, *scopes, **kwargs):
+        self.calls.append((scopes, kwargs))
+        time.sleep(0.01)
+        return AccessToken(f"token-{len(self.calls)}", int(time.time()) + self.lifetime)
+
+    def close(self):
+        pass
+
+
+def test_cached_credential_reuses_token_and_refreshes_ahead_of_expiry():
+    inner = FakeCredential()
+    credential = CachedTokenCredential(inner, refresh_margin=600)
+    scope = client_module.AZURE_TOKEN_SCOPE
+
+    # 동시에 요청해도 한 번만 발급
+    threads = [threading.Thread(target=credential.get_token, args=(scope,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(inner.calls) == 1
+    assert credential.get_token(scope).token == "token-1"
+    assert 2900 < credential.seconds_until_refresh() <= 3000
+
+    # 재인증 요청(claims)은 캐시를 거치지 않음
+    assert credential.get_token(scope, claims="challenge").token == "token-2"
+    assert credential.get_token(scope).token == "token-1"
+
+    # 캐시 키는 범위와 tenant_id뿐이므로 다른 옵션만 다른 요청은 같은 토큰을 사용
+    assert credential.get_token(scope, enable_cae=True).token == "token-1"
+    assert credential.get_token(scope, tenant_id="tenant-b").token == "token-3"
+    assert credential.get_token(scope, tenant_id="tenant-b", enable_cae=True).token == "token-3"
+    assert inner.calls[-1] == ((scope,), {"tenant_id": "tenant-b"})
+
+    # 갱신 여유 시간에 들어오지 않은 토큰은 건너뛰고, 들어온 토큰은 다시 발급
+    assert credential.refresh_expiring() == 0
+    credential.refresh_margin = 4000
+    assert credential.refresh_expiring() == 2
+    assert credential.get_token(scope).token in ("token-4", "token-5")
+    assert credential.get_token(scope, tenant_id="tenant-b").token in ("token-4", "token-5")
+    assert inner.calls[-1][1] in ({}, {"tenant_id": "tenant-b"})
+    assert credential.stats()["refreshes"] == 4
+
+
+def test_project_client_is_built_once_with_shared_pool(monkeypatch):
+    built = []
+
+    class FakeProjectClient:
+        def __init__(self, **kwargs):
+            time.sleep(0.01)
+            built.append(kwargs)
+
+        def close(self):
+            pass
+
+    monkeypatch.setenv("AZURE_AI_PROJECT_CONNECTION_STRING", "https://example.services.ai.azure.com/api/projects/demo")
+    monkeypatch.setattr(client_module, "AIProjectClient", FakeProjectClient)
+    monkeypatch.setattr(client_module, "DefaultAzureCredential", FakeCredential)
+    monkeypatch.setattr(client_module, "_client", None)
+    monkeypatch.setattr(client_module, "_credential", None)
+
+    threads = [threading.Thread(target=client_module.get_project_client) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(built) == 1
+    assert built[0]["endpoint"] == "https://example.services.ai.azure.com/api/projects/demo"
+    adapter = client_module._http_session.get_adapter("https://example.services.ai.azure.com")
+    assert adapter._pool_maxsize == client_module.AZURE_HTTP_POOL_MAXSIZE
+    client_module.close_clients()
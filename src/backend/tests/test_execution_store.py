@@ -0,0 +1,146 @@
+import time
+
+import pytest
+
+from src.backend.execution_store import InMemoryExecutionStore, SQLiteExecutionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = InMemoryExecutionStore()
+    else:
+        store = SQLiteExecutionStore(str(tmp_path / "executions.db"), batch_size=3)
+    yield store
+    store.close()
+
+
+def make_execution(execution_id, created_at, status="completed", workflow_name="hr-onboarding"):
+    return {
+        "execution_id": execution_id,
+        "workflow_name": workflow_name,
+        "status": status,
+        "result": {"steps": [], "plan": "plan"},
+        "created_at": created_at,
+        "inputs": {"name": execution_id},
+    }
+
+
+def test_steps_and_status_are_visible_immediately(store):
+    store.create(make_execution("e1", 100, status="queued"))
+    store.append_step("e1", {"step": "identity"})
+    store.append_step("e1", {"step": "it"})
+    store.update_status("e1", "in_progress")
+
+    execution = store.get("e1")
+    assert execution["status"] == "in_progress"
+    assert [s["step"] for s in execution["result"]["steps"]] == ["identity", "it"]
+    assert execution["result"]["plan"] == "plan"
+    assert execution["inputs"] == {"name": "e1"}
+
+    assert store.delete("e1") is True
+    assert store.get("e1") is None
+    assert store.delete("e1") is False
+
+
+def test_list_filters_and_paginates_newest_first(store):
+    for i in range(5):
+        store.create(make_execution(f"e{i}", 100 + i, status="failed" if i % 2 else "completed"))
+    store.create(make_execution("other", 103, workflow_name="trip-planner"))
+
+    page, cursor = store.list(workflow_name="hr-onboarding", limit=2)
+    assert [e["execution_id"] for e in page] == ["e4", "e3"]
+    page, cursor = store.list(workflow_name="hr-onboarding", limit=2, cursor=cursor)
+    assert [e["execution_id"] for e in page] == ["e2", "e1"]
+    page, cursor = store.list(workflow_name="hr-onboarding", limit=2, cursor=cursor)
+    assert [e["execution_id"] for e in page] == ["e0"] and cursor is None
+
+    page, _ = store.list(status="failed")
+    assert [e["execution_id"] for e in page] == ["e3", "e1"]
+    page, _ = store.list(created_from=102, created_to=103)
+    assert {e["execution_id"] for e in page} == {"e2", "e3", "other"}
+
+
+def test_summary_listing_counts_steps_without_loading_them(store):
+    store.create(make_execution("e1", 100))
+    store.append_step("e1", {"step": "identity"})
+    store.append_step("e1", {"step": "it"})
+    store.create(make_execution("e2", 101))
+
+    page, _ = store.list(include_steps=False)
+    assert [(e["execution_id"], e["step_count"]) for e in page] == [("e2", 0), ("e1", 2)]
+    assert "result" not in page[0]
+
+
+def test_compact_removes_only_expired_finished_executions(store):
+    now = int(time.time())
+    store.create(make_execution("old", now - 1000))
+    store.create(make_execution("old_running", now - 1000, status="in_progress"))
+    store.create(make_execution("recent", now))
+    store.append_step("old", {"step": "identity"})
+
+    assert store.compact(retention=500) == 1
+    page, _ = store.list()
+    assert {e["execution_id"] for e in page} == {"old_running", "recent"}
+
+
+def test_sqlite_store_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "executions.db")
+    store = SQLiteExecutionStore(path, batch_size=10)
+    store.create(make_execution("e1", 100, status="in_progress"))
+    store.append_step("e1", {"step": "identity"})
+    store.close()  # 남은 단계 기록을 반영하고 닫음
+
+    reopened = SQLiteExecutionStore(path)
+    execution = reopened.get("e1")
+    assert execution["status"] == "in_progress"
+    assert execution["result"]["steps"] == [{"step": "identity"}]
+    reopened.close()
+
+
+def test_restart_resumes_queued_and_fails_in_progress_executions(tmp_path, monkeypatch):
+    import asyncio
+    from fastapi.testclient import TestClient
+    from src.backend import main
+    from src.backend.routers import workflows
+    from src.backend.execution_store import INTERRUPTED_REASON
+
+    path = str(tmp_path / "executions.db")
+    now = int(time.time())
+    store = SQLiteExecutionStore(path)
+    store.create(make_execution("queued_1", now, status="queued"))
+    store.create(make_execution("queued_2", now + 1, status="queued"))
+    store.create(make_execution("queued_mock", now + 2, status="queued", workflow_name="trip-planner"))
+    store.create(make_execution("running", now + 3, status="in_progress"))
+    store.create(make_execution("waiting", now + 4, status="waiting_for_approval"))
+    store.create(make_execution("done", now + 5))
+    store.close()
+
+    processed = []
+
+    async def fake_process(execution_id, inputs):
+        processed.append((execution_id, inputs["name"]))
+        await asyncio.to_thread(reopened.update_status, execution_id, "completed")
+
+    reopened = SQLiteExecutionStore(path)
+    monkeypatch.setattr(main, "execution_store", reopened)
+    monkeypatch.setattr(workflows, "execution_store", reopened)
+    monkeypatch.setattr(workflows, "process_hr_onboarding_agents", fake_process)
+    # 워커 하나로 등록 순서대로 실행되는지 확인
+    monkeypatch.setattr(main.workflow_executor, "workers", 1)
+    with TestClient(main.app):
+        for _ in range(250):
+            if reopened.get("queued_2")["status"] == "completed":
+                break
+            time.sleep(0.02)
+        # 승인 후 시작하지 못한 실행은 먼저 승인된 순서대로 다시 실행되고,
+        # 진행 중이던 실행과 재개할 수 없는 실행은 실패로 정리됨
+        assert processed == [("queued_1", "queued_1"), ("queued_2", "queued_2")]
+        statuses = {e["execution_id"]: e["status"] for e in reopened.list()[0]}
+        assert statuses == {
+            "queued_1": "completed", "queued_2": "completed", "queued_mock": "failed",
+            "running": "failed", "waiting": "waiting_for_approval", "done": "completed",
+        }
+        assert reopened.get("running")["result"]["steps"][-1]["details"] == INTERRUPTED_REASON
+        # 정리된 실행은 더 이상 진행 중이 아니므로 보관 기간이 지나면 정리 대상
+        assert reopened.compact(retention=-10) == 6
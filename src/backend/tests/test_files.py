@@ -0,0 +1,168 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from src.backend.main import app
+from src.backend.routers import files
+
+client = TestClient(app)
+
+
+class FakeFiles:
+    def __init__(self):
+        self.uploaded = []
+
+    def upload(self, file, purpose):
+        filename, stream = file
+        self.uploaded.append({"filename": filename, "content": stream.read(), "stream": stream})
+        return SimpleNamespace(id=f"file_{len(self.uploaded)}", filename=filename, purpose=purpose, created_at=0)
+
+
+def test_upload_streams_body_without_local_copy(monkeypatch, tmp_path):
+    from starlette.formparsers import MultiPartParser
+
+    fake_files = FakeFiles()
+    monkeypatch.setattr(files, "get_agents_client", lambda: SimpleNamespace(files=fake_files))
+    monkeypatch.chdir(tmp_path)
+    starlette_spool_max_size = MultiPartParser.spool_max_size
+    monkeypatch.setattr(files.UploadFormParser, "spool_max_size", 16)
+
+    small = b"hello"
+    large = b"x" * (files.UPLOAD_SPOOL_MAX_SIZE + 1)
+    for name, content in (("small.txt", small), ("large.pdf", large)):
+        response = client.post("/api/v1/files", files={"file": (name, content)})
+        assert response.status_code == 200
+        assert response.json()["filename"] == name
+
+    assert [u["content"] for u in fake_files.uploaded] == [small, large]
+    # 로컬 복사본이 남지 않고, 스풀 파일은 요청이 끝나면 닫힘
+    assert list(tmp_path.iterdir()) == []
+    assert all(u["stream"].closed for u in fake_files.uploaded)
+    # 스풀 임계값은 업로드 파서에만 적용되고 Starlette 전역 설정은 바뀌지 않음
+    assert [u["stream"]._rolled for u in fake_files.uploaded] == [False, True]
+    assert MultiPartParser.spool_max_size == starlette_spool_max_size
+
+    response = client.post("/api/v1/files", data={"purpose": "agents"})
+    assert response.status_code == 400
+
+
+def test_duplicate_upload_reuses_remote_file_until_deleted(monkeypatch):
+    from azure.core.exceptions import ResourceNotFoundError
+
+    fake_files = FakeFiles()
+    remote = set()
+    original_upload = fake_files.upload
+
+    def upload(file, purpose):
+        result = original_upload(file, purpose)
+        remote.add(result.id)
+        return result
+
+    def get(file_id):
+        if file_id not in remote:
+            raise ResourceNotFoundError("not found")
+        return SimpleNamespace(id=file_id)
+
+    fake_client = SimpleNamespace(files=SimpleNamespace(upload=upload, get=get, delete=lambda file_id: remote.discard(file_id)))
+    monkeypatch.setattr(files, "get_agents_client", lambda: fake_client)
+    monkeypatch.setattr(files, "upload_index", files.UploadDedupIndex())
+
+    first = client.post("/api/v1/files", files={"file": ("policy.pdf", b"same content")})
+    second = client.post("/api/v1/files", files={"file": ("policy-copy.pdf", b"same content")})
+    assert second.json()["id"] == first.json()["id"]
+    assert second.headers["X-Upload-Deduplicated"] == "true"
+    assert len(fake_files.uploaded) == 1
+
+    # 다른 내용이나 다른 용도는 새로 업로드
+    client.post("/api/v1/files", files={"file": ("other.pdf", b"other content")})
+    client.post("/api/v1/files", files={"file": ("policy.pdf", b"same content")}, params={"purpose": "vision"})
+    assert len(fake_files.uploaded) == 3
+
+    # 삭제되면 인덱스에서 제거되어 다시 업로드
+    client.delete(f"/api/v1/files/{first.json()['id']}")
+    third = client.post("/api/v1/files", files={"file": ("policy.pdf", b"same content")})
+    assert third.json()["id"] != first.json()["id"]
+    assert "X-Upload-Deduplicated" not in third.headers
+
+    # 외부에서 삭제된 파일도 확인 후 다시 업로드
+    remote.discard(third.json()["id"])
+    fourth = client.post("/api/v1/files", files={"file": ("policy.pdf", b"same content")})
+    assert fourth.json()["id"] not in (first.json()["id"], third.json()["id"])
+    assert len(fake_files.uploaded) == 5
+
+
+def test_batch_upload_runs_concurrently_and_reports_failures(monkeypatch):
+    import threading
+    import time
+
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+    uploaded = []
+
+    def upload(file, purpose):
+        filename, stream = file
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        try:
+            time.sleep(0.05)
+            if filename == "broken.pdf":
+                raise RuntimeError("upstream rejected file")
+            uploaded.append(filename)
+            return SimpleNamespace(id=f"file_{filename}", filename=filename, purpose=purpose, created_at=0)
+        finally:
+            with lock:
+                active["now"] -= 1
+
+    monkeypatch.setattr(files, "get_agents_client", lambda: SimpleNamespace(files=SimpleNamespace(upload=upload)))
+    monkeypatch.setattr(files, "upload_index", files.UploadDedupIndex())
+    monkeypatch.setattr(files, "UPLOAD_BATCH_CONCURRENCY", 2)
+
+    names = ["a.pdf", "b.pdf", "broken.pdf", "c.pdf", "d.pdf"]
+    response = client.post(
+        "/api/v1/files/batch",
+        files=[("files", (name, f"content of {name}".encode())) for name in names]
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["filename"] for r in data["results"]] == names
+    assert [r["status"] for r in data["results"]] == ["uploaded", "uploaded", "failed", "uploaded", "uploaded"]
+    assert "upstream rejected" in data["results"][2]["error"]
+    assert data["uploaded"] == 4 and data["failed"] == 1
+    assert active["peak"] == 2
+
+    monkeypatch.setattr(files, "UPLOAD_BATCH_MAX_FILES", 2)
+    response = client.post("/api/v1/files/batch", files=[("files", (n, b"x")) for n in names])
+    assert response.status_code == 400
+
+
+def test_dedup_lookup_errors_fall_back_to_upload_and_index_is_bounded(monkeypatch):
+    from azure.core.exceptions import HttpResponseError
+
+    fake_files = FakeFiles()
+
+    def get(file_id):
+        raise HttpResponseError("Service Unavailable")
+
+    fake_client = SimpleNamespace(files=SimpleNamespace(upload=fake_files.upload, get=get))
+    monkeypatch.setattr(files, "get_agents_client", lambda: fake_client)
+    monkeypatch.setattr(files, "upload_index", files.UploadDedupIndex(max_entries=2))
+
+    first = client.post("/api/v1/files", files={"file": ("policy.pdf", b"same content")})
+    # 기존 파일 확인이 실패하면 500 대신 새로 업로드
+    second = client.post("/api/v1/files", files={"file": ("policy.pdf", b"same content")})
+    assert second.status_code == 200
+    assert second.json()["id"] != first.json()["id"]
+    # 이전 파일을 삭제해도 새로 업로드한 항목은 남아 있음
+    files.upload_index.evict_file(first.json()["id"])
+    assert files.upload_index.get(f"assistants:{files.hashlib.sha256(b'same content').hexdigest()}").id == second.json()["id"]
+
+    # 최대 항목 수를 넘으면 가장 오래 사용하지 않은 항목부터 제거
+    index = files.UploadDedupIndex(max_entries=2)
+    for i in range(3):
+        index.add(f"k{i}", files.FileResponse(id=f"file_{i}", filename="f", purpose="assistants",
+                                              mime_type="application/octet-stream", created_at=0))
+        if i == 1:
+            index.get("k0")
+    assert index.get("k1") is None
+    assert index.get("k0").id == "file_0" and index.get("k2").id == "file_2"
+    assert len(index._key_by_file_id) == 2
@@ -0,0 +1,205 @@
+import asyncio
+import anyio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from src.backend import mcp_manager
+
+# MCP 서버 없이 세션 풀 동작을 확인하기 위한 가짜 SSE 연결/세션
+connect_count = 0
+list_tools_count = 0
+server_version = "1.0"
+slow_urls = set()
+pinged = []
+
+
+@asynccontextmanager
+async def fake_sse_client(url):
+    global connect_count
+    connect_count += 1
+    yield (url, None)
+
+
+class FakeSession:
+    def __init__(self, read, write):
+        self.url = read
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def initialize(self):
+        return SimpleNamespace(serverInfo=SimpleNamespace(name="fake", version=server_version))
+
+    async def list_tools(self):
+        global list_tools_count
+        list_tools_count += 1
+        if self.url in slow_urls:
+            await asyncio.sleep(1)
+        tool = SimpleNamespace(name="get_forecast", description="Forecast", inputSchema={"type": "object"})
+        return SimpleNamespace(tools=[tool])
+
+    async def send_ping(self):
+        pinged.append(self)
+        return None
+
+    async def call_tool(self, name, arguments=None):
+        await asyncio.sleep(0.01)
+        if arguments["x"] == "bad_argument":
+            raise ValueError("invalid arguments")
+        if arguments["x"] == "connection_lost":
+            raise anyio.BrokenResourceError()
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=f"{name}:{arguments['x']}")])
+
+
+def _patch(monkeypatch):
+    global connect_count, list_tools_count, server_version
+    connect_count = 0
+    list_tools_count = 0
+    server_version = "1.0"
+    slow_urls.clear()
+    pinged.clear()
+    mcp_manager.tool_cache.invalidate()
+    monkeypatch.setattr(mcp_manager, "sse_client", fake_sse_client)
+    monkeypatch.setattr(mcp_manager, "ClientSession", FakeSession)
+
+
+def test_tool_calls_reuse_pooled_sessions(monkeypatch):
+    _patch(monkeypatch)
+
+    async def scenario():
+        manager = mcp_manager.session_manager
+        await manager.start()
+        try:
+            for i in range(5):
+                out = await mcp_manager.execute_mcp_tool_call("mcp-weather__get_forecast", {"x": i})
+                assert out == f"get_forecast:{i}"
+            # 순차 호출은 하나의 웜 세션을 재사용
+            assert connect_count == 1
+
+            calls = [mcp_manager.execute_mcp_tool_call("mcp-weather__get_forecast", {"x": i}) for i in range(10)]
+            await asyncio.gather(*calls)
+            # 동시 호출도 풀 크기를 넘지 않음
+            assert connect_count <= mcp_manager.get_pool_size("mcp-weather")
+        finally:
+            await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_dead_session_is_reconnected(monkeypatch):
+    _patch(monkeypatch)
+
+    async def scenario():
+        manager = mcp_manager.session_manager
+        try:
+            await mcp_manager.execute_mcp_tool_call("mcp-weather__get_forecast", {"x": 1})
+            pool = manager.get_pool("mcp-weather")
+            # 서버 재시작 등으로 세션이 끊긴 상황
+            for conn in pool._idle:
+                await conn.close()
+            out = await mcp_manager.execute_mcp_tool_call("mcp-weather__get_forecast", {"x": 2})
+            assert out == "get_forecast:2"
+            assert connect_count == 2
+        finally:
+            await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_only_connection_errors_discard_sessions(monkeypatch):
+    _patch(monkeypatch)
+
+    async def scenario():
+        manager = mcp_manager.session_manager
+        try:
+            # 도구 수준 오류는 세션을 반납하고 재사용
+            out = await mcp_manager.execute_mcp_tool_call("mcp-weather__get_forecast", {"x": "bad_argument"})
+            assert out.startswith("Error executing tool")
+            await mcp_manager.execute_mcp_tool_call("mcp-weather__get_forecast", {"x": 1})
+            assert connect_count == 1
+
+            # 연결 오류는 세션을 폐기하고 다음 호출에서 재연결
+            await mcp_manager.execute_mcp_tool_call("mcp-weather__get_forecast", {"x": "connection_lost"})
+            assert manager.get_pool("mcp-weather").stats["open"] == 0
+            await mcp_manager.execute_mcp_tool_call("mcp-weather__get_forecast", {"x": 2})
+            assert connect_count == 2
+        finally:
+            await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_health_check_pings_only_idle_sessions(monkeypatch):
+    _patch(monkeypatch)
+
+    async def scenario():
+        manager = mcp_manager.session_manager
+        pool = manager.get_pool("mcp-weather")
+        try:
+            async with pool.acquire() as busy:
+                async with pool.acquire() as idle:
+                    pass
+                await pool.health_check()
+                assert pinged == [idle.session]
+                assert pool._idle == [idle]
+            assert pool.stats == {"size": 2, "open": 2, "idle": 2}
+        finally:
+            await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_tool_definitions_are_cached_until_server_changes(monkeypatch):
+    _patch(monkeypatch)
+
+    async def scenario():
+        global server_version
+        manager = mcp_manager.session_manager
+        try:
+            for _ in range(3):
+                tools = await mcp_manager.get_mcp_tool_definitions(["mcp-weather"])
+                assert tools[0]["function"]["name"] == "mcp-weather__get_forecast"
+            assert list_tools_count == 1
+
+            # 서버 재시작(연결 끊김 + 새 버전) 후에는 캐시가 무효화되고 새 버전으로 다시 조회됨
+            server_version = "2.0"
+            pool = manager.get_pool("mcp-weather")
+            for conn in pool._idle:
+                await conn.close()
+            await mcp_manager.execute_mcp_tool_call("mcp-weather__get_forecast", {"x": 1})
+            await mcp_manager.get_mcp_tool_definitions(["mcp-weather"])
+            assert list_tools_count == 2
+            assert mcp_manager.tool_cache.snapshot()["servers"]["mcp-weather"]["version"] == "fake/2.0"
+        finally:
+            await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_tool_listing_fans_out_with_partial_results(monkeypatch):
+    _patch(monkeypatch)
+    slow_urls.add(mcp_manager.MCP_SERVERS["mcp-hr-policy"])
+
+    async def scenario():
+        manager = mcp_manager.session_manager
+        try:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            result = await mcp_manager.collect_mcp_tool_definitions(
+                ["mcp-hr-policy", "mcp-weather", "mcp-sales-crm", "unknown"], timeout=0.3
+            )
+            elapsed = loop.time() - started
+
+            # 느린 서버는 시간 초과로 보고되고 나머지 서버의 도구는 반환됨
+            assert result["timed_out"] == ["mcp-hr-policy"]
+            assert result["failed"] == []
+            names = [t["function"]["name"] for t in result["tools"]]
+            assert names == ["mcp-weather__get_forecast", "mcp-sales-crm__get_forecast"]
+            assert elapsed < 0.9
+        finally:
+            await manager.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.backend import run_waiter
+
+
+def make_client(statuses):
+    """statuses를 차례로 반환하고 마지막 상태를 유지하는 가짜 Agents 클라이언트"""
+    calls = {"get": 0, "cancel": 0}
+
+    def get(thread_id, run_id):
+        status = statuses[min(calls["get"], len(statuses) - 1)]
+        calls["get"] += 1
+        return SimpleNamespace(id=run_id, status=status)
+
+    def cancel(thread_id, run_id):
+        calls["cancel"] += 1
+
+    return SimpleNamespace(runs=SimpleNamespace(get=get, cancel=cancel)), calls
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(run_waiter, "RUN_POLL_INITIAL", 0.01)
+    monkeypatch.setattr(run_waiter, "RUN_POLL_MAX", 0.04)
+    monkeypatch.setattr(run_waiter, "run_wait_metrics", run_waiter.RunWaitMetrics())
+
+
+def test_wait_for_run_returns_terminal_run_and_records_metrics():
+    client, calls = make_client(["queued", "in_progress", "in_progress", "in_progress", "completed"])
+    seen = []
+
+    run = asyncio.run(run_waiter.wait_for_run(client, "thread_1", "run_1", on_update=lambda r: seen.append(r.status)))
+
+    assert run.status == "completed"
+    assert seen == ["queued", "in_progress", "in_progress", "in_progress", "completed"]
+    metrics = run_waiter.run_wait_metrics.snapshot()
+    assert metrics["waits"] == 1
+    assert metrics["polls"] == 5
+
+
+def test_wait_for_run_times_out_and_cancels_remote_run():
+    client, calls = make_client(["in_progress"])
+
+    with pytest.raises(run_waiter.RunWaitTimeout):
+        asyncio.run(run_waiter.wait_for_run(client, "thread_1", "run_1", max_wait=0.1, cancel_run_on_abort=True))
+
+    # 간격이 RUN_POLL_MAX까지 늘어나므로 고정 간격보다 적게 조회
+    assert calls["get"] < 0.1 / 0.01
+    assert calls["cancel"] == 1
+    metrics = run_waiter.run_wait_metrics.snapshot()
+    assert metrics["timeouts"] == 1
+    assert metrics["cancellations"] == 1
+
+
+def test_cancelled_wait_cancels_remote_run():
+    client, calls = make_client(["in_progress"])
+
+    async def scenario():
+        task = asyncio.create_task(
+            run_waiter.wait_for_run(client, "thread_1", "run_1", cancel_run_on_abort=True)
+        )
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert calls["cancel"] == 1
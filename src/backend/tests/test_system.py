@@ -22,3 +22,14 @@ client = TestClient(app)
     # Deleting the entire file
 
     # Deleting the entire file
+
+def test_mcp_tool_cache_admin():
+    response = client.get("/api/v1/mcp/tool-cache")
+    assert response.status_code == 200
+    assert "servers" in response.json()["cache"]
+
+    response = client.delete("/api/v1/mcp/tool-cache", params={"server": "mcp-weather"})
+    assert response.status_code == 200
+
+    response = client.delete("/api/v1/mcp/tool-cache", params={"server": "unknown"})
+    assert response.status_code == 404
@@ -72,3 +72,444 @@ def test_thread_and_messages_flow():
              client.delete(f"/api/v1/threads/{thread_id}")
         client.delete(f"/api/v1/agents/{agent_id}")
 
+
+def test_tool_calls_run_concurrently_in_order(monkeypatch):
+    import asyncio
+    import json
+    from types import SimpleNamespace
+    from src.backend import run_driver
+
+    active = {"now": 0, "peak": 0}
+
+    async def fake_tool_call(tool_name, arguments):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        # 뒤에 온 호출이 먼저 끝나도록 지연
+        await asyncio.sleep(arguments["delay"])
+        active["now"] -= 1
+        return f"{tool_name}:{arguments['sku']}"
+
+    monkeypatch.setattr(run_driver, "execute_mcp_tool_call", fake_tool_call)
+    monkeypatch.setattr(run_driver, "TOOL_CALL_CONCURRENCY", 2)
+    monkeypatch.setattr(run_driver, "TOOL_CALL_TIMEOUT", 0.5)
+
+    def tool_call(call_id, name, args):
+        return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=json.dumps(args)))
+
+    calls = [
+        tool_call("call_1", "mcp-supply-chain__check_stock", {"sku": "A", "delay": 0.2}),
+        tool_call("call_2", "mcp-supply-chain__check_stock", {"sku": "B", "delay": 0.1}),
+        tool_call("call_3", "code_interpreter", {}),
+        tool_call("call_4", "mcp-supply-chain__check_stock", {"sku": "C", "delay": 0.05}),
+        tool_call("call_5", "mcp-supply-chain__check_stock", {"sku": "D", "delay": 5}),
+    ]
+    outputs = asyncio.run(run_driver.execute_tool_calls(calls))
+
+    # MCP 도구만 원래 순서대로 제출되고, 동시 실행 수는 제한을 넘지 않음
+    assert [o["tool_call_id"] for o in outputs] == ["call_1", "call_2", "call_4", "call_5"]
+    assert outputs[0]["output"] == "mcp-supply-chain__check_stock:A"
+    assert "timed out" in outputs[3]["output"]
+    assert active["peak"] == 2
+
+
+def test_run_events_stream_driven_by_server(monkeypatch):
+    import json
+    from types import SimpleNamespace
+    from src.backend import run_driver, run_waiter
+
+    tool_call = SimpleNamespace(
+        id="call_1",
+        function=SimpleNamespace(name="mcp-hr-policy__get_employee_balance", arguments='{"employee_id": "emp_002"}')
+    )
+
+    def make_run(status, required_action=None):
+        return SimpleNamespace(
+            id="run_1", thread_id="thread_1", agent_id="agent_1", status=status,
+            created_at=0, last_error=None, required_action=required_action
+        )
+
+    statuses = iter([
+        make_run("queued"),
+        make_run("requires_action", SimpleNamespace(submit_tool_outputs=SimpleNamespace(tool_calls=[tool_call]))),
+        make_run("in_progress"),
+        make_run("completed"),
+    ])
+    submitted = []
+    answer = SimpleNamespace(
+        id="msg_1", thread_id="thread_1", role="assistant", created_at=0,
+        content=[SimpleNamespace(type="text", text=SimpleNamespace(value="잔여 휴가는 5일입니다."))]
+    )
+    fake_client = SimpleNamespace(
+        runs=SimpleNamespace(
+            get=lambda thread_id, run_id: next(statuses),
+            submit_tool_outputs=lambda thread_id, run_id, tool_outputs: submitted.append(tool_outputs),
+        ),
+        messages=SimpleNamespace(list=lambda thread_id, run_id=None: [answer]),
+    )
+
+    async def fake_tool_call(tool_name, arguments):
+        return '{"vacation": 5}'
+
+    monkeypatch.setattr(run_driver, "get_agents_client", lambda: fake_client)
+    monkeypatch.setattr(run_driver, "execute_mcp_tool_call", fake_tool_call)
+    monkeypatch.setattr(run_waiter, "RUN_POLL_INITIAL", 0.01)
+    monkeypatch.setattr(run_waiter, "RUN_POLL_MAX", 0.01)
+
+    events = []
+    with client.stream("GET", "/api/v1/threads/thread_1/runs/run_1/events") as response:
+        assert response.status_code == 200
+        event = None
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+
+    names = [e for e, _ in events]
+    assert names == [
+        "status", "status", "tool_call.started", "tool_call.completed",
+        "status", "status", "messages", "done",
+    ]
+    assert [d["status"] for e, d in events if e == "status"] == ["queued", "requires_action", "in_progress", "completed"]
+    assert submitted == [[{"tool_call_id": "call_1", "output": '{"vacation": 5}'}]]
+    assert events[6][1]["messages"][0]["content"][0]["text"]["value"] == "잔여 휴가는 5일입니다."
+    run_driver.run_drivers.clear()
+
+
+def test_run_driver_retries_transient_errors_without_rerunning_tools(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+    from azure.core.exceptions import HttpResponseError, ServiceRequestError, ResourceNotFoundError
+    from src.backend import run_driver, run_waiter
+
+    tool_call = SimpleNamespace(
+        id="call_1",
+        function=SimpleNamespace(name="mcp-hr-policy__get_employee_balance", arguments='{"employee_id": "emp_002"}')
+    )
+
+    def make_run(status, required_action=None):
+        return SimpleNamespace(
+            id="run_r", thread_id="thread_r", agent_id="agent_1", status=status,
+            created_at=0, last_error=None, required_action=required_action
+        )
+
+    def unavailable():
+        error = HttpResponseError("Service Unavailable")
+        error.status_code = 503
+        return error
+
+    responses = iter([
+        ServiceRequestError("connection reset"),
+        make_run("requires_action", SimpleNamespace(submit_tool_outputs=SimpleNamespace(tool_calls=[tool_call]))),
+        make_run("completed"),
+    ])
+    submit_results = iter([unavailable(), None])
+    submitted, tool_runs = [], []
+
+    def get(thread_id, run_id):
+        item = next(responses)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def submit_tool_outputs(thread_id, run_id, tool_outputs):
+        submitted.append(tool_outputs)
+        error = next(submit_results)
+        if error is not None:
+            raise error
+
+    async def fake_tool_call(tool_name, arguments):
+        tool_runs.append(tool_name)
+        return '{"vacation": 5}'
+
+    fake_client = SimpleNamespace(
+        runs=SimpleNamespace(get=get, submit_tool_outputs=submit_tool_outputs),
+        messages=SimpleNamespace(list=lambda thread_id, run_id=None: []),
+    )
+    monkeypatch.setattr(run_driver, "get_agents_client", lambda: fake_client)
+    monkeypatch.setattr(run_driver, "execute_mcp_tool_call", fake_tool_call)
+    monkeypatch.setattr(run_driver, "RUN_DRIVER_RETRY_DELAY", 0.01)
+    monkeypatch.setattr(run_waiter, "RUN_POLL_INITIAL", 0.01)
+    monkeypatch.setattr(run_waiter, "RUN_POLL_MAX", 0.01)
+
+    async def drive():
+        driver = run_driver.RunDriver("thread_r", "run_r")
+        driver.start()
+        await driver.task
+        return driver
+
+    driver = asyncio.run(drive())
+    assert [e["event"] for e in driver.events if e["event"] == "error"] == []
+    assert driver.run.status == "completed"
+    # 도구는 한 번만 실행하고, 실패한 제출은 같은 결과로 재시도
+    assert tool_runs == ["mcp-hr-policy__get_employee_balance"]
+    assert len(submitted) == 2 and submitted[0] == submitted[1]
+
+    # 없는 실행(404)처럼 일시적이지 않은 오류는 재시도하지 않음
+    fake_client.runs.get = lambda thread_id, run_id: (_ for _ in ()).throw(ResourceNotFoundError("run not found"))
+    driver = asyncio.run(drive())
+    assert [e["event"] for e in driver.events] == ["error", "done"]
+    run_driver.run_drivers.clear()
+
+
+def test_get_run_checks_thread_and_refreshes_stopped_driver(monkeypatch):
+    from types import SimpleNamespace
+    from src.backend import run_driver
+    from src.backend.routers import runs
+
+    def make_run(status):
+        return SimpleNamespace(id="run_x", thread_id="thread_x", agent_id="agent_1", status=status,
+                               created_at=0, last_error=None)
+
+    fetched = []
+
+    def get(thread_id, run_id):
+        fetched.append((thread_id, run_id))
+        return make_run("completed")
+
+    monkeypatch.setattr(runs, "get_agents_client", lambda: SimpleNamespace(runs=SimpleNamespace(get=get)))
+    # 시간 초과로 멈춘 드라이버는 마지막으로 본 상태가 in_progress
+    driver = run_driver.RunDriver("thread_x", "run_x")
+    driver.run = make_run("in_progress")
+    driver.done = True
+    run_driver.run_drivers["run_x"] = driver
+    try:
+        response = client.get("/api/v1/threads/thread_other/runs/run_x")
+        assert response.status_code == 404
+        response = client.get("/api/v1/threads/thread_other/runs/run_x/events")
+        assert response.status_code == 404
+
+        response = client.get("/api/v1/threads/thread_x/runs/run_x")
+        assert response.status_code == 200
+        assert response.json()["status"] == "completed"
+        assert fetched == [("thread_x", "run_x")]
+
+        # 드라이버가 없는 실행은 한 번 조회만 하고 드라이버를 띄우지 않음
+        run_driver.run_drivers.clear()
+        response = client.get("/api/v1/threads/thread_x/runs/run_x")
+        assert response.status_code == 200
+        assert fetched == [("thread_x", "run_x")] * 2
+        assert run_driver.run_drivers == {}
+    finally:
+        run_driver.run_drivers.clear()
+
+
+def test_streaming_run_relays_deltas_and_tool_calls(monkeypatch):
+    import json
+    import threading
+    from collections import deque
+    from types import SimpleNamespace
+    from src.backend import run_driver
+    from src.backend.routers import runs
+
+    tool_call = SimpleNamespace(
+        id="call_1",
+        function=SimpleNamespace(name="mcp-weather__get_current_weather", arguments='{"city": "Seoul"}')
+    )
+
+    def run_event(status, required_action=None):
+        return SimpleNamespace(id="run_s", status=status, last_error=None, required_action=required_action)
+
+    def delta(text):
+        return ("thread.message.delta", SimpleNamespace(id="msg_s", text=text), None)
+
+    final_message = SimpleNamespace(
+        id="msg_s", thread_id="thread_s", role="assistant", created_at=0,
+        content=[SimpleNamespace(type="text", text=SimpleNamespace(value="서울은 맑습니다."))]
+    )
+
+    class FakeStream:
+        # SDK의 AgentRunStream처럼 제출 결과 스트림이 같은 이터레이터에 이어짐
+        def __init__(self):
+            self.events = deque([
+                ("thread.run.created", run_event("queued"), None),
+                ("thread.run.requires_action", run_event(
+                    "requires_action",
+                    SimpleNamespace(submit_tool_outputs=SimpleNamespace(tool_calls=[tool_call]))
+                ), None),
+            ])
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def __iter__(self):
+            consumer_threads.append(threading.current_thread().name)
+            while self.events:
+                yield self.events.popleft()
+
+    submitted = []
+    consumer_threads = []
+
+    def submit_tool_outputs_stream(thread_id, run_id, tool_outputs, event_handler):
+        submitted.append(tool_outputs)
+        event_handler.events.extend([
+            ("thread.run.in_progress", run_event("in_progress"), None),
+            delta("서울은 "),
+            delta("맑습니다."),
+            ("thread.message.completed", final_message, None),
+            ("thread.run.completed", run_event("completed"), None),
+        ])
+
+    fake_client = SimpleNamespace(runs=SimpleNamespace(
+        stream=lambda thread_id, **kwargs: FakeStream(),
+        submit_tool_outputs_stream=submit_tool_outputs_stream,
+    ))
+
+    async def fake_tool_call(tool_name, arguments):
+        return "Sunny"
+
+    monkeypatch.setattr(run_driver, "get_agents_client", lambda: fake_client)
+    monkeypatch.setattr(runs, "get_agents_client", lambda: fake_client)
+    monkeypatch.setattr(run_driver, "execute_mcp_tool_call", fake_tool_call)
+
+    events = []
+    with client.stream("POST", "/api/v1/threads/thread_s/runs", json={"agent_id": "agent_1", "stream": True}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        event = None
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+
+    names = [e for e, _ in events]
+    assert names[:4] == ["run.created", "status", "status", "tool_call.started"]
+    assert "".join(d["text"] for e, d in events if e == "delta") == "서울은 맑습니다."
+    assert names[-3:] == ["message", "status", "done"]
+    assert submitted == [[{"tool_call_id": "call_1", "output": "Sunny"}]]
+    # 스트림은 일반 SDK 스레드 풀이 아닌 전용 풀에서 소비되고, 드라이버는 실행 ID로 등록됨
+    assert consumer_threads and consumer_threads[0].startswith("azure-stream")
+    driver = run_driver.run_drivers["run_s"]
+    assert driver.run_id == "run_s" and driver.run.status == "completed"
+    run_driver.run_drivers.clear()
+
+
+def test_list_messages_after_cursor_fetches_only_new_messages(monkeypatch):
+    from types import SimpleNamespace
+    from azure.core.paging import ItemPaged
+    from src.backend.routers import threads
+
+    stored = [
+        SimpleNamespace(id=f"msg_{i}", thread_id="thread_1", role="user", created_at=i,
+                        content=[SimpleNamespace(type="text", text=SimpleNamespace(value=f"m{i}"))])
+        for i in range(7)
+    ]
+    requests = []
+
+    def list_messages(thread_id, limit=None, order=None, before=None):
+        # Agents API 페이지 동작을 흉내냄: after 커서 이후 limit개, 응답의 last_id가 다음 연속 토큰
+        def get_next(after=None):
+            requests.append({"limit": limit, "order": order, "after": after})
+            items = stored if order == "asc" else stored[::-1]
+            ids = [m.id for m in items]
+            start = ids.index(after) + 1 if after else 0
+            return items[start:start + limit]
+
+        def extract_data(page):
+            return (page[-1].id if page else None), iter(page)
+
+        return ItemPaged(get_next, extract_data)
+
+    monkeypatch.setattr(threads, "get_agents_client", lambda: SimpleNamespace(messages=SimpleNamespace(list=list_messages)))
+
+    response = client.get("/api/v1/threads/thread_1/messages", params={"after": "msg_3", "order": "asc"})
+    assert response.status_code == 200
+    assert [m["id"] for m in response.json()] == ["msg_4", "msg_5", "msg_6"]
+    assert requests[0] == {"limit": 100, "order": "asc", "after": "msg_3"}
+
+    response = client.get("/api/v1/threads/thread_1/messages", params={"limit": 2})
+    assert [m["id"] for m in response.json()] == ["msg_6", "msg_5"]
+    assert response.headers["X-Next-Cursor"] == "msg_5"
+    response = client.get("/api/v1/threads/thread_1/messages", params={"limit": 2, "after": "msg_5"})
+    assert [m["id"] for m in response.json()] == ["msg_4", "msg_3"]
+
+    # 기존 호출(파라미터 없음)은 전체를 최신순으로 반환
+    assert len(client.get("/api/v1/threads/thread_1/messages").json()) == 7
+
+
+def test_message_list_is_cached_with_etag_and_write_through(monkeypatch):
+    from types import SimpleNamespace
+    from src.backend import run_driver
+    from src.backend.message_cache import ThreadMessageCache
+    from src.backend.routers import threads
+
+    def make_message(msg_id, role, text, created_at):
+        return SimpleNamespace(id=msg_id, thread_id="thread_c", role=role, created_at=created_at,
+                               content=[SimpleNamespace(type="text", text=SimpleNamespace(value=text))])
+
+    upstream = {"list": 0}
+
+    def list_messages(thread_id, limit=None, order=None, before=None):
+        upstream["list"] += 1
+        return [make_message("msg_1", "user", "안녕하세요", 1)]
+
+    class Paged(list):
+        def by_page(self, continuation_token=None):
+            return iter([self])
+
+    fake_client = SimpleNamespace(messages=SimpleNamespace(
+        list=lambda **kwargs: Paged(list_messages(**kwargs)),
+        create=lambda thread_id, role, content: make_message("msg_2", role, content, 2),
+    ))
+    cache = ThreadMessageCache()
+    monkeypatch.setattr(threads, "get_agents_client", lambda: fake_client)
+    monkeypatch.setattr(threads, "message_cache", cache)
+    monkeypatch.setattr(run_driver, "message_cache", cache)
+
+    response = client.get("/api/v1/threads/thread_c/messages")
+    etag = response.headers["ETag"]
+    assert [m["id"] for m in response.json()] == ["msg_1"]
+
+    # 변경이 없으면 업스트림 호출 없이 304
+    response = client.get("/api/v1/threads/thread_c/messages", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert upstream["list"] == 1
+
+    # 메시지 추가는 캐시에 바로 반영되어 ETag가 바뀜
+    client.post("/api/v1/threads/thread_c/messages", json={"role": "user", "content": "휴가 잔여일 알려줘"})
+    response = client.get("/api/v1/threads/thread_c/messages", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [m["id"] for m in response.json()] == ["msg_2", "msg_1"]
+
+    # 실행이 완료되면 실행이 만든 메시지가 덧붙고, 실패하면 캐시가 무효화됨
+    driver = run_driver.RunDriver("thread_c", "run_1")
+    driver._run_messages = [threads.map_message_to_response(make_message("msg_3", "assistant", "5일 남았습니다.", 3))]
+    driver._update_message_cache()
+    assert [m["id"] for m in client.get("/api/v1/threads/thread_c/messages").json()] == ["msg_3", "msg_2", "msg_1"]
+    assert upstream["list"] == 1
+
+    run_driver.RunDriver("thread_c", "run_2")._update_message_cache()
+    client.get("/api/v1/threads/thread_c/messages")
+    assert upstream["list"] == 2
+
+
+def test_message_cache_evicts_least_recently_used_threads_over_memory_cap():
+    from src.backend.message_cache import ThreadMessageCache
+    from src.backend.models import MessageResponse
+
+    def messages(thread_id, count):
+        return [
+            MessageResponse(id=f"{thread_id}_{i}", thread_id=thread_id, role="user",
+                            content=[{"type": "text", "text": {"value": "x" * 100}}], created_at=i)
+            for i in range(count)
+        ]
+
+    one_thread = len(messages("a", 3)[0].model_dump_json()) * 3
+    cache = ThreadMessageCache(max_threads=10, max_bytes=one_thread * 2, ttl=0)
+    for thread_id in ("a", "b"):
+        cache.put(thread_id, messages(thread_id, 3), cache.begin_fetch())
+    cache.get("a")  # a를 최근 사용으로 갱신
+    cache.put("c", messages("c", 3), cache.begin_fetch())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+    # 조회 도중 메시지가 추가된 스레드의 오래된 조회 결과는 저장하지 않음
+    started = cache.begin_fetch()
+    cache.add_messages("d", messages("d", 1))
+    assert cache.put("d", [], started) is None
@@ -1,3 +1,4 @@
+import pytest
 
 from fastapi.testclient import TestClient
 from src.backend.main import app
@@ -37,3 +38,343 @@ def test_workflow_execution_flow():
     assert response.status_code == 200
     data = response.json()
     assert data["execution_id"] == execution_id
+
+
+def test_workflow_engine_runs_independent_steps_concurrently():
+    import asyncio
+    from src.backend.workflow_engine import Workflow, WorkflowStep, run_workflow
+
+    def step(step_id, depends_on=None, prompt="{role}", timeout=1.0, retries=0):
+        return WorkflowStep(
+            id=step_id, agent=f"{step_id} agent", instructions="", action=step_id,
+            prompt=prompt, depends_on=depends_on or [], timeout=timeout, retries=retries
+        )
+
+    workflow = Workflow(name="test", steps=[
+        step("a"),
+        step("b"),
+        step("c", depends_on=["a", "b"], prompt="{a}+{b}"),
+        step("flaky", retries=2),
+        step("slow", timeout=0.1),
+        step("after_slow", depends_on=["slow"]),
+    ])
+    calls = {"flaky": 0}
+    started = {}
+
+    async def run_step(s, prompt):
+        started[s.id] = asyncio.get_running_loop().time()
+        if s.id == "flaky":
+            calls["flaky"] += 1
+            if calls["flaky"] < 3:
+                raise RuntimeError("transient")
+        if s.id == "slow":
+            await asyncio.sleep(1)
+        await asyncio.sleep(0.05)
+        return f"{s.id}({prompt})"
+
+    records = []
+    succeeded = asyncio.run(run_workflow(workflow, {"role": "Dev"}, run_step, records.append))
+
+    by_step = {r["step"]: r for r in records}
+    assert succeeded is False
+    # 독립 단계는 동시에 시작되고, 의존 단계는 선행 결과를 받아 실행됨
+    assert abs(started["a"] - started["b"]) < 0.03
+    assert by_step["c"]["details"] == "c(a(Dev)+b(Dev))"
+    assert by_step["flaky"]["status"] == "completed" and by_step["flaky"]["attempts"] == 3
+    assert by_step["slow"]["status"] == "failed" and "Timed out" in by_step["slow"]["details"]
+    assert by_step["after_slow"]["status"] == "skipped"
+
+
+def test_workflow_step_with_missing_template_input_fails_alone():
+    import asyncio
+    from src.backend.workflow_engine import Workflow, WorkflowStep, run_workflow
+
+    def step(step_id, prompt, depends_on=None):
+        return WorkflowStep(id=step_id, agent=f"{step_id} agent", instructions="", action=step_id,
+                            prompt=prompt, depends_on=depends_on or [], timeout=1.0, retries=0)
+
+    workflow = Workflow(name="test", steps=[
+        step("missing", "{name} / {department}"),
+        step("sibling", "{name}"),
+        step("after_missing", "{missing}", depends_on=["missing"]),
+    ])
+    ran = []
+
+    async def run_step(s, prompt):
+        await asyncio.sleep(0.05)
+        ran.append(s.id)
+        return prompt
+
+    records = []
+    succeeded = asyncio.run(run_workflow(workflow, {"name": "Kim"}, run_step, records.append))
+
+    by_step = {r["step"]: r for r in records}
+    assert succeeded is False
+    # 입력값이 빠진 단계만 실패로 기록되고, 형제 단계는 취소되지 않고 끝까지 실행됨
+    assert by_step["missing"]["status"] == "failed"
+    assert by_step["missing"]["details"] == "Error: missing input 'department' for prompt template"
+    assert by_step["sibling"]["status"] == "completed" and by_step["sibling"]["details"] == "Kim"
+    assert by_step["after_missing"]["status"] == "skipped"
+    assert ran == ["sibling"]
+
+
+def test_workflow_rejects_dependency_cycles():
+    import pytest
+    from src.backend.workflow_engine import Workflow, WorkflowStep
+
+    def step(step_id, depends_on):
+        return WorkflowStep(id=step_id, agent="", instructions="", action="", prompt="", depends_on=depends_on)
+
+    with pytest.raises(ValueError):
+        Workflow(name="cycle", steps=[step("a", ["b"]), step("b", ["a"])])
+
+
+def test_workflow_executor_runs_high_priority_first():
+    import asyncio
+    from src.backend.workflow_executor import WorkflowExecutor
+
+    order = []
+
+    async def scenario():
+        executor = WorkflowExecutor(workers=1, queue_size=10)
+        release = asyncio.Event()
+
+        async def job(name):
+            if name == "blocker":
+                await release.wait()
+            order.append(name)
+
+        executor.submit("blocker", job, "blocker")
+        await asyncio.sleep(0)  # 워커가 blocker를 가져가도록 양보
+        executor.submit("low", job, "low", priority="low")
+        executor.submit("normal", job, "normal")
+        assert executor.submit("high", job, "high", priority="high") == 1
+        assert executor.stats()["queue_depth"] == 3
+        release.set()
+        await executor._queue.join()
+        stats = executor.stats()
+        await executor.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert order == ["blocker", "high", "normal", "low"]
+    assert stats["completed"] == 4 and stats["queue_depth"] == 0
+
+
+def test_workflow_executor_close_reports_unfinished_jobs():
+    import asyncio
+    from src.backend.workflow_executor import WorkflowExecutor, QueueFullError
+
+    done = []
+
+    async def scenario():
+        executor = WorkflowExecutor(workers=1, queue_size=10)
+
+        async def job(name, seconds):
+            await asyncio.sleep(seconds)
+            done.append(name)
+
+        executor.submit("quick", job, "quick", 0)
+        executor.submit("stuck", job, "stuck", 60)
+        executor.submit("waiting", job, "waiting", 0)
+        await asyncio.sleep(0.01)
+        closing = asyncio.create_task(executor.close(drain_timeout=0.1))
+        await asyncio.sleep(0)
+        # 종료 중에는 새 작업을 받지 않음
+        with pytest.raises(QueueFullError):
+            executor.submit("late", job, "late", 0)
+        return await closing
+
+    dropped = asyncio.run(scenario())
+    assert done == ["quick"]
+    assert sorted(dropped) == ["stuck", "waiting"]
+
+
+def test_approve_returns_429_when_workflow_queue_is_full(monkeypatch):
+    import asyncio
+    import threading
+    from src.backend.routers import workflows
+    from src.backend.workflow_executor import workflow_executor
+
+    started = threading.Event()
+
+    async def blocking_workflow(execution_id, inputs):
+        started.set()
+        await asyncio.sleep(10)
+
+    # 다른 테스트가 남긴 queued 실행이 시작 시 재등록되어 대기열을 채우지 않도록 빈 저장소 사용
+    from src.backend import main
+    from src.backend.execution_store import InMemoryExecutionStore
+    store = InMemoryExecutionStore()
+    monkeypatch.setattr(main, "execution_store", store)
+    monkeypatch.setattr(workflows, "execution_store", store)
+    monkeypatch.setattr(workflows, "process_hr_onboarding_agents", blocking_workflow)
+    monkeypatch.setattr(workflow_executor, "workers", 1)
+    monkeypatch.setattr(workflow_executor, "queue_size", 1)
+
+    with TestClient(app) as test_client:
+        ids = [
+            test_client.post("/api/v1/workflows/hr-onboarding/plan", json={"inputs": {"name": f"U{i}"}}).json()["execution_id"]
+            for i in range(3)
+        ]
+        assert test_client.post(f"/api/v1/workflows/executions/{ids[0]}/approve").status_code == 200
+        assert started.wait(2)
+        # 워커 1개가 사용 중이므로 두 번째는 대기열에, 세 번째는 거절
+        assert test_client.post(f"/api/v1/workflows/executions/{ids[1]}/approve", params={"priority": "high"}).status_code == 200
+        response = test_client.post(f"/api/v1/workflows/executions/{ids[2]}/approve")
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert test_client.get(f"/api/v1/workflows/executions/{ids[2]}").json()["status"] == "waiting_for_approval"
+
+        metrics = test_client.get("/api/v1/telemetry/metrics").json()["workflow_executor"]
+        assert metrics["queue_depth"] == 1 and metrics["rejected"] >= 1
+
+
+def test_concurrent_approvals_submit_once(monkeypatch, tmp_path):
+    import asyncio
+    from fastapi import HTTPException
+    from src.backend.routers import workflows
+    from src.backend.execution_store import InMemoryExecutionStore, SQLiteExecutionStore
+
+    for store in (InMemoryExecutionStore(), SQLiteExecutionStore(str(tmp_path / "executions.db"))):
+        submitted = []
+        monkeypatch.setattr(workflows, "execution_store", store)
+        monkeypatch.setattr(workflows.workflow_executor, "submit", lambda job_id, fn, *args, **kwargs: submitted.append(job_id))
+        store.create({
+            "execution_id": "exec_approve", "workflow_name": "hr-onboarding", "status": "waiting_for_approval",
+            "inputs": {"name": "Kim"}, "result": {"steps": []}, "created_at": 0,
+        })
+
+        async def scenario():
+            return await asyncio.gather(
+                *(workflows.approve_workflow("exec_approve") for _ in range(5)), return_exceptions=True
+            )
+
+        results = asyncio.run(scenario())
+        assert submitted == ["exec_approve"]
+        rejected = [r for r in results if isinstance(r, HTTPException)]
+        assert len(rejected) == 4 and all(r.status_code == 400 for r in rejected)
+        assert store.get("exec_approve")["status"] == "queued"
+        store.close()
+
+
+def test_workflow_agents_resolved_from_index_and_stale_ids_recovered(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+    from azure.core.exceptions import ResourceNotFoundError
+    from src.backend import agent_index as agent_index_module
+    from src.backend.routers import workflows
+
+    calls = {"list": 0, "create": 0}
+    deleted = {"agent_identity"}
+    agents = [SimpleNamespace(id="agent_identity", name="Identity Agent"), SimpleNamespace(id="agent_it", name="IT Agent")]
+    agents += [SimpleNamespace(id=f"agent_{i}", name=f"Other {i}") for i in range(250)]
+
+    def list_agents(limit=None):
+        calls["list"] += 1
+        return iter(agents)
+
+    def create_agent(name, instructions, model):
+        calls["create"] += 1
+        return SimpleNamespace(id=f"new_{name}", name=name)
+
+    def create_run(thread_id, agent_id):
+        if agent_id in deleted:
+            raise ResourceNotFoundError("agent not found")
+        return SimpleNamespace(id="run_1", status="completed")
+
+    fake_client = SimpleNamespace(
+        list=list_agents,
+        create_agent=create_agent,
+        threads=SimpleNamespace(create=lambda: SimpleNamespace(id="thread_1")),
+        messages=SimpleNamespace(
+            create=lambda thread_id, role, content: None,
+            list=lambda thread_id: [SimpleNamespace(content=[SimpleNamespace(type="text", text=SimpleNamespace(value="ok"))])],
+        ),
+        runs=SimpleNamespace(create=create_run),
+    )
+    monkeypatch.setattr(agent_index_module, "agent_index", agent_index_module.AgentIndex())
+    monkeypatch.setattr(workflows, "agent_index", agent_index_module.agent_index)
+    monkeypatch.setattr(workflows, "get_agents_client", lambda: fake_client)
+    async def fake_wait_for_run(client, thread_id, run_id, **kwargs):
+        return SimpleNamespace(id=run_id, status="completed")
+
+    monkeypatch.setattr(workflows, "wait_for_run", fake_wait_for_run)
+
+    execution_id = "exec_index"
+    workflows.execution_store.create({
+        "execution_id": execution_id, "workflow_name": "hr-onboarding", "status": "queued",
+        "result": {"steps": []}, "created_at": 0,
+    })
+    asyncio.run(workflows.process_hr_onboarding_agents(execution_id, {"name": "Kim", "role": "Developer"}))
+
+    execution = workflows.execution_store.get(execution_id)
+    workflows.execution_store.delete(execution_id)
+    assert execution["status"] == "completed"
+    # 목록은 한 번만 조회, 없는 Training Agent만 생성, 삭제된 Identity Agent는 재생성 후 재실행
+    assert calls == {"list": 1, "create": 2}
+    assert agent_index_module.agent_index.get("Identity Agent") == "new_Identity Agent"
+    assert agent_index_module.agent_index.get("IT Agent") == "agent_it"
+
+
+def test_concurrent_ensure_agent_creates_each_name_once(monkeypatch):
+    import asyncio
+    import time
+    from types import SimpleNamespace
+    from src.backend import agent_index as agent_index_module
+    from src.backend.routers import workflows
+
+    created = []
+
+    def create_agent(name, instructions, model):
+        time.sleep(0.05)  # 생성 요청이 진행 중인 동안 다른 요청이 들어오도록
+        created.append(name)
+        return SimpleNamespace(id=f"agent_{len(created)}", name=name)
+
+    fake_client = SimpleNamespace(list=lambda limit=None: iter([]), create_agent=create_agent)
+    monkeypatch.setattr(workflows, "agent_index", agent_index_module.AgentIndex())
+    config = {"instructions": "", "model": "gpt-4o"}
+
+    async def scenario():
+        return await asyncio.gather(
+            *(workflows.ensure_agent(fake_client, "Identity Agent", config) for _ in range(5)),
+            workflows.ensure_agent(fake_client, "IT Agent", config),
+        )
+
+    ids = asyncio.run(scenario())
+    assert sorted(created) == ["IT Agent", "Identity Agent"]
+    assert len(set(ids[:5])) == 1 and ids[5] != ids[0]
+
+
+def test_list_executions_paginates_with_cursor_and_summary_view(monkeypatch):
+    from src.backend.routers import workflows
+    from src.backend.execution_store import InMemoryExecutionStore
+
+    store = InMemoryExecutionStore()
+    monkeypatch.setattr(workflows, "execution_store", store)
+    for i in range(5):
+        store.create({
+            "execution_id": f"exec_{i}", "workflow_name": "trip-planner" if i == 0 else "hr-onboarding",
+            "status": "completed" if i % 2 else "failed", "created_at": 1000 + i,
+            "result": {"steps": [{"step": "identity"}, {"step": "it"}]}, "inputs": {"name": f"U{i}"},
+        })
+
+    response = client.get("/api/v1/workflows/executions", params={"limit": 2, "view": "summary"})
+    assert response.status_code == 200
+    page = response.json()
+    assert [e["execution_id"] for e in page] == ["exec_4", "exec_3"]
+    assert page[0]["step_count"] == 2 and "result" not in page[0]
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/api/v1/workflows/executions", params={"limit": 2, "cursor": cursor})
+    page = response.json()
+    assert [e["execution_id"] for e in page] == ["exec_2", "exec_1"]
+    assert len(page[0]["result"]["steps"]) == 2
+
+    response = client.get("/api/v1/workflows/executions", params={
+        "workflow_name": "hr-onboarding", "status": "failed", "created_from": 1001, "created_to": 1004,
+    })
+    assert [e["execution_id"] for e in response.json()] == ["exec_4", "exec_2"]
+    assert "X-Next-Cursor" not in response.headers
+
+    assert client.get("/api/v1/workflows/executions", params={"cursor": "bogus"}).status_code == 400
@@ -0,0 +1,132 @@
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable, Awaitable, Optional
+
+logger = logging.getLogger("workflow-engine")
+
+
+@dataclass
+class WorkflowStep:
+    """
+    워크플로우의 한 단계. depends_on에 적힌 단계가 모두 성공하면 실행되며,
+    의존 관계가 없는 단계끼리는 동시에 실행됩니다.
+    prompt는 입력값과 선행 단계 결과({step_id})로 format 됩니다.
+    """
+    id: str
+    agent: str  # 실행할 에이전트 이름
+    instructions: str  # 에이전트 지시사항 (System Prompt)
+    action: str  # 타임라인에 표시할 작업명
+    prompt: str
+    model: str = "gpt-4o-mini"
+    depends_on: List[str] = field(default_factory=list)
+    timeout: float = 120.0
+    retries: int = 1
+
+
+@dataclass
+class Workflow:
+    name: str
+    steps: List[WorkflowStep]
+
+    def __post_init__(self):
+        ids = {step.id for step in self.steps}
+        for step in self.steps:
+            missing = [dep for dep in step.depends_on if dep not in ids]
+            if missing:
+                raise ValueError(f"Step '{step.id}' depends on unknown steps: {missing}")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        remaining = {step.id: set(step.depends_on) for step in self.steps}
+        while remaining:
+            ready = [sid for sid, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Workflow '{self.name}' has a dependency cycle: {sorted(remaining)}")
+            for sid in ready:
+                del remaining[sid]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+
+# 단계 실행 함수: (step, prompt) -> 결과 텍스트. 실패 시 예외를 발생시켜야 재시도됩니다.
+StepRunner = Callable[[WorkflowStep, str], Awaitable[str]]
+# 단계 결과 기록 함수: 실행 기록 저장소(execution_store)에 단계 결과를 추가합니다.
+# 기록 함수는 동기 함수이거나 코루틴 함수일 수 있음 (저장소 I/O를 스레드 풀에서 수행하는 경우)
+StepRecorder = Callable[[Dict[str, Any]], Optional[Awaitable[None]]]
+
+
+async def run_workflow(workflow: Workflow, inputs: Dict[str, Any], run_step: StepRunner, record_step: StepRecorder) -> bool:
+    """
+    워크플로우의 단계들을 의존 관계에 따라 실행합니다.
+    각 단계는 완료되는 즉시 record_step으로 기록되며, 모든 단계가 성공하면 True를 반환합니다.
+    """
+    results: Dict[str, str] = {}
+    done_events = {step.id: asyncio.Event() for step in workflow.steps}
+    succeeded: Dict[str, bool] = {}
+
+    async def record(entry: Dict[str, Any]):
+        result = record_step(entry)
+        if inspect.isawaitable(result):
+            await result
+
+    async def execute(step: WorkflowStep):
+        try:
+            for dep in step.depends_on:
+                await done_events[dep].wait()
+            failed_deps = [dep for dep in step.depends_on if not succeeded.get(dep)]
+            if failed_deps:
+                succeeded[step.id] = False
+                await record(_step_record(step, "skipped", f"선행 단계 실패로 건너뜀: {', '.join(failed_deps)}", 0, 0.0))
+                return
+
+            try:
+                prompt = step.prompt.format(**{**inputs, **results})
+            except KeyError as e:
+                # 이 단계만 실패로 기록하고, 다른 단계는 그대로 진행 (gather 전체가 취소되지 않도록)
+                succeeded[step.id] = False
+                await record(_step_record(step, "failed", f"Error: missing input '{e.args[0]}' for prompt template", 0, 0.0))
+                return
+            except (IndexError, ValueError) as e:
+                succeeded[step.id] = False
+                await record(_step_record(step, "failed", f"Error: invalid prompt template: {e}", 0, 0.0))
+                return
+            started = time.monotonic()
+            last_error = None
+            attempts = 0
+            for attempt in range(1, step.retries + 2):
+                attempts = attempt
+                try:
+                    output = await asyncio.wait_for(run_step(step, prompt), step.timeout)
+                    results[step.id] = output
+                    succeeded[step.id] = True
+                    await record(_step_record(step, "completed", output, attempts, time.monotonic() - started))
+                    return
+                except asyncio.TimeoutError:
+                    last_error = f"Timed out after {step.timeout}s"
+                except Exception as e:
+                    last_error = str(e)
+                logger.warning(f"단계 실패 ({workflow.name}/{step.id}, 시도 {attempt}): {last_error}")
+
+            succeeded[step.id] = False
+            await record(_step_record(step, "failed", f"Error: {last_error}", attempts, time.monotonic() - started))
+        finally:
+            done_events[step.id].set()
+
+    await asyncio.gather(*(execute(step) for step in workflow.steps))
+    return all(succeeded.get(step.id) for step in workflow.steps)
+
+
+def _step_record(step: WorkflowStep, status: str, details: str, attempts: int, duration: float) -> Dict[str, Any]:
+    return {
+        "step": step.id,
+        "agent": step.agent,
+        "action": step.action if status == "completed" else "Error",
+        "status": status,
+        "details": details,
+        "attempts": attempts,
+        "duration_ms": int(duration * 1000),
+        "timestamp": int(time.time()),
+    }
@@ -0,0 +1,175 @@
+import asyncio
+import itertools
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("workflow-executor")
+
+# 워크플로우 실행기 설정: 동시에 실행할 워크플로우 수, 대기열 최대 길이
+WORKFLOW_WORKERS = int(os.getenv("WORKFLOW_WORKERS", "2"))
+WORKFLOW_QUEUE_SIZE = int(os.getenv("WORKFLOW_QUEUE_SIZE", "50"))
+# 종료 시 대기 중/실행 중인 작업이 끝나기를 기다리는 최대 시간(초)
+WORKFLOW_DRAIN_TIMEOUT = float(os.getenv("WORKFLOW_DRAIN_TIMEOUT", "10"))
+
+# 우선순위 레인 (값이 작을수록 먼저 실행)
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 찼을 때 발생합니다. retry_after는 재시도까지 권장 대기 시간(초)입니다."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Workflow queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    job_id: str = field(compare=False)
+    lane: str = field(compare=False)
+    fn: Callable[..., Awaitable[Any]] = field(compare=False)
+    args: tuple = field(compare=False, default=())
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+class WorkflowExecutor:
+    """
+    워크플로우 전용 실행기.
+    우선순위 대기열에 작업을 쌓고 고정된 수의 워커 태스크가 순서대로 꺼내 실행합니다.
+    대기열이 가득 차면 QueueFullError로 거절해 승인 요청이 몰려도 API 처리 자원을 잠식하지 않게 합니다.
+    """
+
+    def __init__(self, workers: int = WORKFLOW_WORKERS, queue_size: int = WORKFLOW_QUEUE_SIZE):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running_jobs: Dict[int, str] = {}  # 워커 번호 → 실행 중인 작업 ID
+        self._closing = False
+        self._seq = itertools.count()
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._lane_depth = {lane: 0 for lane in PRIORITIES}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._started_jobs = 0
+
+    def _ensure_loop(self):
+        # 대기열과 워커는 이벤트 루프에 묶여 있으므로 루프가 바뀌면(테스트 클라이언트 등) 새로 만듭니다.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.PriorityQueue()
+            self._lane_depth = {lane: 0 for lane in PRIORITIES}
+            self._worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+            self._running_jobs = {}
+            self._closing = False
+
+    async def start(self):
+        self._ensure_loop()
+
+    def submit(self, job_id: str, fn: Callable[..., Awaitable[Any]], *args, priority: str = "normal") -> int:
+        """작업을 대기열에 넣고 대기열 내 위치(1부터)를 반환합니다. 가득 차면 QueueFullError를 발생시킵니다."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        self._ensure_loop()
+        if self._closing or self._queue.qsize() >= self.queue_size:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+        self._queue.put_nowait(_Job(PRIORITIES[priority], next(self._seq), job_id, priority, fn, args))
+        self._lane_depth[priority] += 1
+        self.submitted += 1
+        # 같거나 높은 우선순위 레인에 대기 중인 작업이 먼저 실행됨
+        return sum(depth for lane, depth in self._lane_depth.items() if PRIORITIES[lane] <= PRIORITIES[priority])
+
+    async def _worker(self, index: int):
+        while True:
+            job: _Job = await self._queue.get()
+            self._lane_depth[job.lane] -= 1
+            waited = time.monotonic() - job.enqueued_at
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._started_jobs += 1
+            self.active += 1
+            self._running_jobs[index] = job.job_id
+            started = time.monotonic()
+            try:
+                await job.fn(*job.args)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"워크플로우 작업 실패 ({job.job_id}): {e}")
+            finally:
+                self._running_jobs.pop(index, None)
+                self.active -= 1
+                self._run_total += time.monotonic() - started
+                self._queue.task_done()
+
+    def retry_after(self) -> int:
+        # 워커 하나가 작업을 끝내 대기열에 빈자리가 생길 때까지의 평균 시간을 추정
+        finished = self.completed + self.failed
+        avg_run = self._run_total / finished if finished else 30.0
+        return max(1, math.ceil(avg_run / self.workers))
+
+    def stats(self) -> Dict[str, Any]:
+        started = max(self._started_jobs, 1)
+        return {
+            "workers": self.workers,
+            "active": self.active,
+            "queue_size": self.queue_size,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "lanes": dict(self._lane_depth),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": int(self._wait_total / started * 1000),
+            "max_wait_ms": int(self._wait_max * 1000),
+        }
+
+    async def close(self, drain_timeout: float = WORKFLOW_DRAIN_TIMEOUT) -> List[str]:
+        """
+        새 작업을 받지 않고 남은 작업이 끝나기를 drain_timeout초까지 기다린 뒤 워커를 종료합니다.
+        끝내지 못하고 버린 작업(대기 중 + 실행 중 취소)의 ID 목록을 반환하므로,
+        호출하는 쪽에서 해당 실행 기록을 중단 상태로 정리해야 합니다.
+        """
+        dropped: List[str] = []
+        if self._loop is asyncio.get_running_loop() and self._queue is not None:
+            self._closing = True
+            if drain_timeout > 0:
+                try:
+                    await asyncio.wait_for(self._queue.join(), drain_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            while not self._queue.empty():
+                dropped.append(self._queue.get_nowait().job_id)
+                self._queue.task_done()
+            dropped.extend(self._running_jobs.values())
+        for task in self._worker_tasks:
+            task.cancel()
+        if self._loop is asyncio.get_running_loop():
+            await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._running_jobs = {}
+        self._queue = None
+        self._loop = None
+        if dropped:
+            logger.warning(f"종료 시 끝내지 못한 워크플로우 작업 {len(dropped)}건: {dropped}")
+        logger.info("워크플로우 실행기 종료 완료")
+        return dropped
+
+
+workflow_executor = WorkflowExecutor()
@@ -264,12 +264,17 @@ function App() {
   };
 
   const handleFileSelect = async (e: React.ChangeEvent<HTMLInputElement>) => {
-    if (e.target.files && e.target.files[0]) {
-      const file = e.target.files[0];
+    if (e.target.files && e.target.files.length > 0) {
+      const files = Array.from(e.target.files);
       setIsUploading(true);
       try {
-        const uploaded = await api.uploadFile(file);
-        setAttachedFiles(prev => [...prev, uploaded]);
+        const batch = await api.uploadFiles(files);
+        const uploaded = batch.results.flatMap(r => (r.file ? [r.file] : []));
+        setAttachedFiles(prev => [...prev, ...uploaded.filter(f => !prev.some(p => p.id === f.id))]);
+        if (batch.failed > 0) {
+          const failedNames = batch.results.filter(r => r.status === 'failed').map(r => r.filename);
+          alert(`일부 파일 업로드 실패: ${failedNames.join(', ')}`);
+        }
       } catch (err) {
         console.error("File upload failed", err);
         alert("파일 업로드 실패");
@@ -298,31 +303,42 @@ function App() {
       const userMsg = await api.createMessage(currentThread.id, content, attachments);
       setMessages(prev => [...prev, userMsg]);
 
-      const run = await api.createRun(currentThread.id, selectedAgent.id);
-
-      const pollInterval = setInterval(async () => {
-        try {
-          const runStatus = await api.getRun(currentThread.id, run.id);
-          if (runStatus.status === 'completed') {
-            clearInterval(pollInterval);
-            setIsSending(false);
-            await loadMessages(currentThread.id);
-          } else if (runStatus.status === 'failed' || runStatus.status === 'cancelled') {
-             clearInterval(pollInterval);
-             setIsSending(false);
-             let errorMessage = "에이전트 실행이 실패하거나 취소되었습니다.";
-             if (runStatus.last_error && runStatus.last_error.message) {
-                errorMessage += `\n사유: ${runStatus.last_error.message}`;
-             }
-             alert(errorMessage);
-             return;
+      // 응답을 토큰 단위로 표시하기 위한 임시 어시스턴트 메시지
+      const streamingId = `streaming-${Date.now()}`;
+      let streamedText = '';
+      setMessages(prev => [...prev, {
+        id: streamingId,
+        thread_id: currentThread.id,
+        role: 'assistant',
+        content: '',
+        created_at: Math.floor(Date.now() / 1000),
+      }]);
+
+      let failed = false;
+      await api.createRunStream(currentThread.id, selectedAgent.id, (event, data) => {
+        if (event === 'delta') {
+          streamedText += data.text;
+          setMessages(prev => prev.map(m => m.id === streamingId ? { ...m, content: streamedText } : m));
+        } else if (event === 'status' && (data.status === 'failed' || data.status === 'cancelled' || data.status === 'expired')) {
+          failed = true;
+          let errorMessage = "에이전트 실행이 실패하거나 취소되었습니다.";
+          if (data.last_error && data.last_error.message) {
+             errorMessage += `\n사유: ${data.last_error.message}`;
           }
-        } catch (e) {
-          clearInterval(pollInterval);
-          setIsSending(false);
-          console.error(e);
+          alert(errorMessage);
+        } else if (event === 'error') {
+          console.error(data.message);
         }
-      }, 1000);
+      });
+
+      setIsSending(false);
+      if (failed) {
+        setMessages(prev => prev.filter(m => m.id !== streamingId));
+      } else {
+        // 보낸 메시지 이후에 생성된 메시지만 받아서 임시 메시지를 교체
+        const newMessages = await api.getMessages(currentThread.id, { after: userMsg.id, order: 'asc' });
+        setMessages(prev => [...prev.filter(m => m.id !== streamingId), ...newMessages]);
+      }
     } catch (error) {
        console.error("Error sending message", error);
        setIsSending(false);
@@ -735,6 +751,7 @@ function App() {
                     </button>
                     <input 
                         type="file" 
+                        multiple
                         ref={fileInputRef}
                         className="hidden" 
                         onChange={handleFileSelect}
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { Agent, Message, Run, Thread, FileData, AgentCreate } from '../types';
+import type { Agent, Message, Thread, FileData, FileBatchResult, AgentCreate } from '../types';
 
 const client = axios.create({
   baseURL: '/api/v1',
@@ -19,7 +19,9 @@ export const api = {
   
   // Threads
   createThread: () => client.post<Thread>('/threads', {}).then(r => r.data),
-  getMessages: (threadId: string) => client.get<Message[]>(`/threads/${threadId}/messages`).then(r => r.data),
+  // after: 마지막으로 받은 메시지 ID (order='asc'와 함께 쓰면 이후 메시지만 조회)
+  getMessages: (threadId: string, params?: { after?: string; limit?: number; order?: 'asc' | 'desc' }) =>
+    client.get<Message[]>(`/threads/${threadId}/messages`, { params }).then(r => r.data),
   createMessage: (threadId: string, content: string, attachments: {id: string, type: string}[] = []) => 
     client.post<Message>(`/threads/${threadId}/messages`, { role: 'user', content, attachments }).then(r => r.data),
   
@@ -32,12 +34,45 @@ export const api = {
       headers: { 'Content-Type': 'multipart/form-data' }
     }).then(r => r.data);
   },
+  // 여러 파일을 한 번의 요청으로 업로드 (파일별 성공/실패 결과 반환)
+  uploadFiles: (files: File[]) => {
+    const formData = new FormData();
+    files.forEach(file => formData.append('files', file));
+    return client.post<FileBatchResult>('/files/batch', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' }
+    }).then(r => r.data);
+  },
 
   // Runs
-  createRun: (threadId: string, agentId: string) => 
-    client.post<Run>(`/threads/${threadId}/runs`, { agent_id: agentId }).then(r => r.data),
-    
-  getRun: (threadId: string, runId: string) => client.get<Run>(`/threads/${threadId}/runs/${runId}`).then(r => r.data),
+  // 실행을 스트리밍 모드로 생성하고 SSE 이벤트(delta, status, done 등)를 콜백으로 전달
+  createRunStream: async (threadId: string, agentId: string, onEvent: (event: string, data: any) => void) => {
+    const response = await fetch(`${client.defaults.baseURL}/threads/${threadId}/runs`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ agent_id: agentId, stream: true }),
+    });
+    if (!response.ok || !response.body) throw new Error(`Run stream failed: ${response.status}`);
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+        const chunk = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        let event = 'message';
+        let data = '';
+        for (const line of chunk.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        if (data) onEvent(event, JSON.parse(data));
+      }
+    }
+  },
 
   // Workflows
   getWorkflows: () => client.get<{ workflows: string[] }>('/workflows').then(r => r.data),
@@ -40,6 +40,19 @@ export interface FileData {
   created_at: number;
 }
 
+export interface FileBatchItem {
+  filename: string;
+  status: 'uploaded' | 'deduplicated' | 'failed';
+  file?: FileData;
+  error?: string;
+}
+
+export interface FileBatchResult {
+  results: FileBatchItem[];
+  uploaded: number;
+  failed: number;
+}
+
 export interface Run {
   id: string;
   thread_id: string;
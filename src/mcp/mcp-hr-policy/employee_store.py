@@ -0,0 +1,275 @@
+import asyncio
+import contextlib
+import copy
+import json
+import logging
+import os
+import weakref
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("hr-server")
+
+# 변경 사항을 employees.json에 모아서 기록하기까지 기다리는 시간(초)
+EMP_FLUSH_DELAY = float(os.getenv("HR_EMP_FLUSH_DELAY", "1.0"))
+
+class EmployeeStore:
+    """
+    직원 데이터를 메모리에 ID별 딕셔너리로 유지하는 저장소.
+    변경은 먼저 저널(<파일>.journal)에 한 줄씩 추가하고, 스냅샷(employees.json)은
+    잠시 뒤 모아서 임시 파일에 쓴 다음 이름 바꾸기(atomic rename)로 교체합니다.
+    파일의 수정 시각(mtime)이 바뀐 경우에만 다시 읽으며, 그때도 저널을 다시 적용합니다.
+    변경은 transaction()으로만 수행하며, 직원별 락을 잡은 상태에서 여러 직원의 변경을
+    저널 한 줄로 기록(fsync)하므로 일부만 반영되는 일이 없습니다.
+    """
+
+    def __init__(self, path: str, flush_delay: float = EMP_FLUSH_DELAY):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.flush_delay = flush_delay
+        self._by_id: Dict[str, dict] = {}
+        self._order: List[str] = []
+        self._mtime: Optional[int] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        # 직원별 락은 사용 중일 때만 유지 (수만 명 규모에서도 락이 쌓이지 않도록)
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._journal_lock: Optional[asyncio.Lock] = None
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._loop = None
+
+    def _load(self):
+        logger.info(f"직원 데이터 로딩 중: {self.path}")
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # 스레드에서 읽는 동안 조회가 반쯤 적용된 상태를 보지 않도록 새 딕셔너리에 만든 뒤 한 번에 교체
+        by_id = {e["id"]: e for e in data}
+        order = [e["id"] for e in data]
+        # 처음 열 때는 아직 진행 중인 저널 기록이 없으므로 중단된 마지막 줄을 정리해도 안전함
+        repair = self._mtime is None
+        # 스냅샷에 아직 반영되지 않은 변경(기록 중이던 저널 포함)을 다시 적용
+        for journal in (self.journal_path + ".flushing", self.journal_path):
+            self._replay(journal, by_id, order, repair)
+        self._by_id, self._order = by_id, order
+        self._mtime = mtime
+
+    def _replay(self, journal: str, by_id: Dict[str, dict], order: List[str], repair: bool = False):
+        try:
+            with open(journal, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            # 저장이 끝나 저널이 지워졌다면 그 내용은 이미 스냅샷에 있음
+            return
+        # 모든 항목은 줄바꿈으로 끝나므로, 줄바꿈이 없는 마지막 조각은 기록 도중 중단된 항목
+        *lines, tail = data.split(b"\n")
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"손상된 저널 항목 무시: {journal}")
+                continue
+            # 트랜잭션 한 줄에 여러 직원의 레코드가 함께 기록됨
+            for emp in record["records"] if "records" in record else [record]:
+                if emp["id"] not in by_id:
+                    order.append(emp["id"])
+                by_id[emp["id"]] = emp
+        if tail:
+            logger.warning(f"기록 도중 중단된 저널 항목 무시: {journal}")
+            if repair:
+                # 다음 기록이 중단된 조각 뒤에 붙어 한 줄로 합쳐지지 않도록 잘라냄
+                with open(journal, "r+b") as f:
+                    f.truncate(len(data) - len(tail))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def _ensure_fresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._mtime is None or mtime != self._mtime:
+            self._load()
+
+    async def _ensure_fresh_async(self):
+        # 파일 확인과 (다시) 읽기는 이벤트 루프 밖에서, 한 번에 하나만 수행
+        self._ensure_loop()
+        async with self._load_lock:
+            await asyncio.to_thread(self._ensure_fresh)
+
+    def get(self, emp_id: str) -> Optional[dict]:
+        """조회 전용. 반환된 레코드를 직접 수정하지 말고 transaction()을 사용하세요."""
+        self._ensure_fresh()
+        return self._by_id.get(emp_id)
+
+    async def get_async(self, emp_id: str) -> Optional[dict]:
+        """get()과 같지만 파일 읽기를 스레드에서 수행합니다. 이벤트 루프 안에서는 이쪽을 사용하세요."""
+        await self._ensure_fresh_async()
+        return self._by_id.get(emp_id)
+
+    def _ensure_loop(self):
+        # 락은 이벤트 루프에 묶여 있으므로 루프가 바뀌면 새로 만듭니다.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._locks = weakref.WeakValueDictionary()
+            self._journal_lock = asyncio.Lock()
+            self._load_lock = asyncio.Lock()
+            self._loop = loop
+
+    def _lock_for(self, emp_id: str) -> asyncio.Lock:
+        lock = self._locks.get(emp_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[emp_id] = lock
+        return lock
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, emp_ids: Iterable[str]):
+        """
+        주어진 직원들의 락을 ID 순서대로(교착 방지) 잡고 레코드 복사본을 {id: 레코드}로 넘겨줍니다.
+        블록이 예외 없이 끝나면 바뀐 레코드를 저널에 한 번에 기록한 뒤 반영하고,
+        예외가 나거나 블록 안에서 딕셔너리를 비우면 아무것도 반영하지 않습니다.
+        없는 직원 ID는 딕셔너리에 포함되지 않습니다.
+        """
+        self._ensure_loop()
+        ids = sorted(set(emp_ids))
+        async with contextlib.AsyncExitStack() as stack:
+            for emp_id in ids:
+                await stack.enter_async_context(self._lock_for(emp_id))
+            await self._ensure_fresh_async()
+            working = {i: copy.deepcopy(self._by_id[i]) for i in ids if i in self._by_id}
+            yield working
+            changed = [emp for i, emp in working.items() if emp != self._by_id.get(i)]
+            if not changed:
+                return
+            async with self._journal_lock:
+                # 저널 기록(fsync)이 끝나야 메모리에 반영하고 성공으로 응답
+                await asyncio.to_thread(self._append_journal, changed)
+                for emp in changed:
+                    self._by_id[emp["id"]] = emp
+            self._schedule_flush()
+
+    def _append_journal(self, records: List[dict]):
+        line = json.dumps({"records": records}, ensure_ascii=False) + "\n"
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        # 저널 교체 중에 다른 트랜잭션이 이전 저널에 기록하지 않도록 저널 락 안에서
+        # 레코드 목록을 떠 두고 저널을 교체 (파일 작업은 스레드에서)
+        async with self._journal_lock:
+            records = self._snapshot()
+            flushing = await asyncio.to_thread(self._rotate_journal)
+        if flushing is None:
+            return
+        try:
+            # 직렬화와 스냅샷 기록은 락 밖에서
+            await asyncio.to_thread(self._write_snapshot, records, flushing)
+        except Exception as e:
+            # 저널이 남아 있으므로 다음 저장이나 재시작 시 다시 반영됨
+            logger.error(f"직원 데이터 저장 실패: {e}")
+
+    def _snapshot(self) -> List[dict]:
+        # 레코드는 변경 시 통째로 교체되고 제자리에서 수정되지 않으므로 얕은 복사로 충분함
+        return [self._by_id[i] for i in self._order]
+
+    def _rotate_journal(self) -> Optional[str]:
+        """현재 저널을 .flushing으로 넘기고 그 경로를 반환합니다. 저장할 변경이 없으면 None."""
+        if not os.path.exists(self.journal_path):
+            return None
+        flushing = self.journal_path + ".flushing"
+        if os.path.exists(flushing):
+            # 이전 기록이 실패해 남은 저널은 새 저널 앞에 합침
+            with open(flushing, "a", encoding="utf-8") as dst, open(self.journal_path, "r", encoding="utf-8") as src:
+                dst.write(src.read())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, flushing)
+        return flushing
+
+    def _write_snapshot(self, records: List[dict], flushing: str):
+        logger.info(f"직원 데이터 저장 중: {self.path}")
+        payload = json.dumps(records, indent=2, ensure_ascii=False)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        _fsync_dir(os.path.dirname(self.path))
+        # 자신이 쓴 파일 때문에 다시 읽지 않도록 새 mtime을 기록
+        self._mtime = os.stat(self.path).st_mtime_ns
+        os.remove(flushing)
+
+    def flush(self):
+        """예약된 저장을 기다리지 않고 즉시 스냅샷을 기록합니다."""
+        records = self._snapshot()
+        flushing = self._rotate_journal()
+        if flushing is not None:
+            self._write_snapshot(records, flushing)
+
+
+def _fsync_dir(directory: str):
+    # 이름 바꾸기 결과까지 디스크에 남도록 디렉터리도 fsync (Windows는 지원하지 않음)
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory or ".", os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+LEAVE_TYPES = ("vacation", "sick", "personal")
+
+
+async def submit_leave_requests(store: EmployeeStore, requests: List[dict]) -> dict:
+    """
+    휴가 신청 여러 건을 하나의 트랜잭션으로 적용합니다.
+    한 건이라도 실패하면(직원 없음, 잘못된 요청, 잔액 부족) 아무것도 반영하지 않고 실패 목록을 반환합니다.
+    같은 직원의 여러 신청은 순서대로 차감된 잔액 기준으로 검사합니다.
+    """
+    errors = []
+    results = []
+    # 형식이 잘못된 항목은 락을 잡기 전에 걸러내고, 올바른 직원 ID만 트랜잭션에 넘김
+    well_formed = [isinstance(r, dict) and isinstance(r.get("employee_id"), str) for r in requests]
+    emp_ids = [r["employee_id"] for r, ok in zip(requests, well_formed) if ok]
+    async with store.transaction(emp_ids) as employees:
+        for index, request in enumerate(requests):
+            if not well_formed[index]:
+                emp_id = request.get("employee_id") if isinstance(request, dict) else None
+                errors.append({"index": index, "employee_id": emp_id, "error": "invalid_request"})
+                continue
+            emp_id, l_type, days = request["employee_id"], request.get("type"), request.get("days")
+            emp = employees.get(emp_id)
+            if emp is None:
+                errors.append({"index": index, "employee_id": emp_id, "error": "not_found"})
+                continue
+            if l_type not in LEAVE_TYPES or not isinstance(days, (int, float)) or days <= 0:
+                errors.append({"index": index, "employee_id": emp_id, "error": "invalid_request"})
+                continue
+            current = emp["leave_balance"].get(l_type, 0)
+            if current < days:
+                errors.append({"index": index, "employee_id": emp_id, "error": "insufficient_balance", "available": current})
+                continue
+            # 상태 변경: 잔여 휴가 차감 및 신청 내역 추가
+            emp["leave_balance"][l_type] = current - days
+            emp["pending_requests"].append({"type": l_type, "days": days, "status": "Pending"})
+            results.append({"index": index, "employee_id": emp_id, "type": l_type, "balance": emp["leave_balance"][l_type]})
+        if errors:
+            # 복사본을 비워 트랜잭션 전체를 반영하지 않음
+            employees.clear()
+    if errors:
+        return {"ok": False, "errors": errors, "results": []}
+    return {"ok": True, "errors": [], "results": results}
+
@@ -0,0 +1,187 @@
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger("hr-server")
+
+# 색인할 규정 문서 확장자와 BM25 파라미터
+HANDBOOK_EXTENSIONS = (".md", ".txt")
+BM25_K1 = 1.5
+BM25_B = 0.75
+# 한 번에 돌려줄 검색 결과 수 상한
+SEARCH_MAX_LIMIT = 20
+# 검색 결과 미리보기 길이(문자)
+SNIPPET_CHARS = int(os.getenv("HR_SNIPPET_CHARS", "200"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[가-힣]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    영문/숫자는 소문자 단어 단위로, 한글은 조사가 붙어도 일치하도록 음절 바이그램으로 나눕니다.
+    (예: '휴가는' → '휴가', '가는')
+    """
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if "가" <= word[0] <= "힣":
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class _Section:
+    def __init__(self, path: str, heading: str, text: str):
+        self.path = path
+        self.heading = heading
+        self.text = text
+        self.term_freqs = Counter(tokenize(heading + "\n" + text))
+        self.length = sum(self.term_freqs.values())
+
+
+def split_sections(path: str, content: str) -> List[_Section]:
+    """'## ' 헤더 단위로 문서를 나눕니다. 첫 헤더 앞의 본문은 문서 제목('# ') 섹션이 됩니다."""
+    sections = []
+    heading, lines = "", []
+    for line in content.splitlines():
+        if line.startswith("## "):
+            if heading or any(l.strip() for l in lines):
+                sections.append(_Section(path, heading, "\n".join(lines).strip()))
+            heading, lines = line[3:].strip(), []
+        elif line.startswith("# ") and not heading and not lines:
+            heading = line[2:].strip()
+        else:
+            lines.append(line)
+    if heading or any(l.strip() for l in lines):
+        sections.append(_Section(path, heading, "\n".join(lines).strip()))
+    return sections
+
+
+class HandbookIndex:
+    """
+    규정 문서 디렉터리의 BM25 역색인.
+    검색 전에 파일 목록과 수정 시각(mtime)을 확인해 바뀐 파일의 섹션만 다시 색인합니다.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._sections: Dict[int, _Section] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._files: Dict[str, Tuple[int, List[int]]] = {}  # 경로 → (mtime, 섹션 ID 목록)
+        self._next_id = 0
+        self._total_length = 0
+
+    def refresh(self) -> int:
+        """추가/변경/삭제된 문서를 반영하고 다시 색인한 파일 수를 반환합니다."""
+        current = {}
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.lower().endswith(HANDBOOK_EXTENSIONS):
+                    try:
+                        current[entry.path] = entry.stat().st_mtime_ns
+                    except OSError:
+                        # 목록 조회 직후 삭제된 파일
+                        continue
+
+        changed = 0
+        for path in [p for p in self._files if p not in current]:
+            self._remove_file(path)
+            changed += 1
+        for path, mtime in current.items():
+            indexed = self._files.get(path)
+            if indexed is not None and indexed[0] == mtime:
+                continue
+            self._remove_file(path)
+            self._add_file(path, mtime)
+            changed += 1
+        if changed:
+            logger.info(f"규정 색인 갱신: 파일 {changed}개, 섹션 {len(self._sections)}개")
+        return changed
+
+    def _add_file(self, path: str, mtime: int):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            # 읽을 수 없는 문서는 건너뛰고, 파일이 바뀌기 전까지 다시 시도하지 않음
+            logger.warning(f"규정 문서를 읽을 수 없어 건너뜀: {path} ({e})")
+            self._files[path] = (mtime, [])
+            return
+        ids = []
+        for section in split_sections(os.path.basename(path), content):
+            sid = self._next_id
+            self._next_id += 1
+            self._sections[sid] = section
+            self._total_length += section.length
+            for term, tf in section.term_freqs.items():
+                self._postings.setdefault(term, {})[sid] = tf
+            ids.append(sid)
+        self._files[path] = (mtime, ids)
+
+    def _remove_file(self, path: str):
+        indexed = self._files.pop(path, None)
+        if indexed is None:
+            return
+        for sid in indexed[1]:
+            section = self._sections.pop(sid)
+            self._total_length -= section.length
+            for term in section.term_freqs:
+                postings = self._postings[term]
+                del postings[sid]
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, limit: int = 3) -> List[dict]:
+        limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+        self.refresh()
+        terms = set(tokenize(query))
+        if not terms or not self._sections:
+            return []
+        n = len(self._sections)
+        avg_length = self._total_length / n
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for sid, tf in postings.items():
+                length = self._sections[sid].length
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[sid] = scores.get(sid, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [
+            {
+                "document": self._sections[sid].path,
+                "heading": self._sections[sid].heading,
+                "score": round(score, 3),
+                "snippet": make_snippet(self._sections[sid].text, terms),
+            }
+            for sid, score in ranked
+        ]
+
+
+def make_snippet(text: str, terms, width: int = SNIPPET_CHARS) -> str:
+    """일치하는 검색어가 가장 많이 모인 구간을 width 길이로 잘라 반환합니다."""
+    lowered = text.lower()
+    positions = sorted(m.start() for term in terms for m in re.finditer(re.escape(term), lowered))
+    if len(text) <= width or not positions:
+        snippet, start, end = text[:width], 0, min(len(text), width)
+    else:
+        best_start, best_count = 0, -1
+        for pos in positions:
+            start = max(0, min(pos - width // 4, len(text) - width))
+            count = sum(1 for p in positions if start <= p < start + width)
+            if count > best_count:
+                best_start, best_count = start, count
+        start, end = best_start, best_start + width
+        snippet = text[start:end]
+    snippet = " ".join(snippet.split())
+    return ("..." if start > 0 else "") + snippet + ("..." if end < len(text) else "")
@@ -11,6 +11,9 @@ from starlette.responses import Response
 from starlette.routing import Route
 from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource
 
+from employee_store import EmployeeStore, submit_leave_requests
+from handbook_index import HandbookIndex, SEARCH_MAX_LIMIT
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -24,39 +27,27 @@ app = Server("hr-concierge")
 # 데이터 경로 설정 (정형 데이터와 비정형 데이터 파일)
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 EMP_PATH = os.path.join(DATA_DIR, "employees.json") # 직원 정보 (JSON)
-POLICY_PATH = os.path.join(DATA_DIR, "policy.md")   # 사내 규정 (Markdown)
-
-def load_employees():
-    """employees.json 파일에서 직원 데이터를 읽어옵니다."""
-    logger.info(f"직원 데이터 로딩 중: {EMP_PATH}")
-    with open(EMP_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def save_employees(data):
-    """직원 데이터를 employees.json 파일에 저장합니다."""
-    logger.info(f"직원 데이터 저장 중: {EMP_PATH}")
-    with open(EMP_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-def search_handbook(query):
-    """policy.md 파일에서 키워드 검색을 수행합니다."""
+# 사내 규정은 data/ 디렉터리의 Markdown/텍스트 문서 전체를 색인해 검색 (예: policy.md)
+
+# 직원 데이터는 메모리에 한 번 적재하고, 변경은 저널 기록 후 모아서 저장
+employee_store = EmployeeStore(EMP_PATH)
+
+# 서버 시작 시 규정 문서를 색인하고, 이후 검색할 때 바뀐 문서만 다시 색인
+handbook_index = HandbookIndex(DATA_DIR)
+handbook_index.refresh()
+
+def search_handbook(query, limit=3):
+    """규정 문서 색인에서 BM25 점수가 높은 섹션과 검색어 주변 미리보기를 반환합니다."""
     logger.info(f"규정 검색 시작: '{query}'")
-    with open(POLICY_PATH, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    # 매우 간단한 키워드 검색 구현
-    results = []
-    blocks = content.split("## ") # 헤더 단위로 문서 분할
-    for block in blocks:
-        if query.lower() in block.lower():
-            # 매칭된 블록의 앞부분 200자만 미리보기로 제공
-            results.append("## " + block[:200] + "...") 
-    
+    results = handbook_index.search(query, limit=limit)
+
     logger.info(f"검색 결과 {len(results)}건 발견: '{query}'")
     if not results:
         logger.info("해당 쿼리에 대한 규정을 찾을 수 없음")
         return "No specific policy found matching query."
-    return "\n\n".join(results)
+    return "\n\n".join(
+        f"## {r['heading']} ({r['document']}, score {r['score']})\n{r['snippet']}" for r in results
+    )
 
 # ------------------------------------------------------------------------------
 # Tools (도구) 정의
@@ -84,7 +75,8 @@ async def list_tools() -> list[Tool]:
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "query": {"type": "string", "description": "Keywords (e.g. 'vacation', 'remote') (검색어)"}
+                    "query": {"type": "string", "description": "Keywords (e.g. 'vacation', 'remote') (검색어)"},
+                    "limit": {"type": "integer", "description": "Max number of sections to return (최대 결과 수, 기본 3)", "default": 3, "minimum": 1, "maximum": SEARCH_MAX_LIMIT}
                 },
                 "required": ["query"]
             }
@@ -101,6 +93,28 @@ async def list_tools() -> list[Tool]:
                 },
                 "required": ["employee_id", "type", "days"]
             }
+        ),
+        Tool(
+            name="submit_leave_requests",
+            description="Submit several leave requests at once; all are applied or none. (여러 휴가 신청을 한 번에 제출하며, 하나라도 실패하면 모두 취소됩니다)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "requests": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "employee_id": {"type": "string", "description": "Employee ID (직원 ID)"},
+                                "type": {"type": "string", "enum": ["vacation", "sick", "personal"], "description": "Leave Type (휴가 종류)"},
+                                "days": {"type": "number", "description": "Number of days (기간)"}
+                            },
+                            "required": ["employee_id", "type", "days"]
+                        }
+                    }
+                },
+                "required": ["requests"]
+            }
         )
     ]
 
@@ -111,8 +125,7 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageCo
     
     if name == "get_employee_balance":
         emp_id = arguments["employee_id"]
-        data = load_employees()
-        emp = next((e for e in data if e["id"] == emp_id), None)
+        emp = await employee_store.get_async(emp_id)
         if emp:
             logger.info(f"휴가 잔액 조회 성공: {emp_id}")
             return [TextContent(type="text", text=json.dumps(emp["leave_balance"], indent=2))]
@@ -122,32 +135,39 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageCo
     elif name == "search_policy_docs":
         query = arguments["query"]
         # 비정형 텍스트 데이터 검색
-        result = search_handbook(query)
+        result = search_handbook(query, limit=int(arguments.get("limit", 3)))
         return [TextContent(type="text", text=result)]
 
     elif name == "submit_leave_request":
         emp_id = arguments["employee_id"]
         l_type = arguments["type"]
         days = arguments["days"]
-        
-        data = load_employees()
-        emp = next((e for e in data if e["id"] == emp_id), None)
-        
-        if emp:
-            current = emp["leave_balance"].get(l_type, 0)
-            if current >= days:
-                # 상태 변경: 잔여 휴가 차감 및 신청 내역 추가
-                emp["leave_balance"][l_type] -= days
-                emp["pending_requests"].append({"type": l_type, "days": days, "status": "Pending"})
-                save_employees(data)
-                logger.info(f"휴가 신청 완료: {emp_id}, 종류: {l_type}, 기간: {days}일")
-                return [TextContent(type="text", text=f"Request submitted. New {l_type} balance: {emp['leave_balance'][l_type]}")]
-            else:
-                logger.warning(f"잔액 부족으로 신청 실패: {emp_id}, 요청: {days}일, 가능: {current}일")
-                return [TextContent(type="text", text=f"Insufficient balance. Available: {current}")]
+
+        # 직원별 락 안에서 잔액 확인과 차감을 함께 수행 (동시 신청 시 중복 차감 방지)
+        outcome = await submit_leave_requests(employee_store, [{"employee_id": emp_id, "type": l_type, "days": days}])
+        if outcome["ok"]:
+            balance = outcome["results"][0]["balance"]
+            logger.info(f"휴가 신청 완료: {emp_id}, 종류: {l_type}, 기간: {days}일")
+            return [TextContent(type="text", text=f"Request submitted. New {l_type} balance: {balance}")]
+        error = outcome["errors"][0]
+        if error["error"] == "insufficient_balance":
+            logger.warning(f"잔액 부족으로 신청 실패: {emp_id}, 요청: {days}일, 가능: {error['available']}일")
+            return [TextContent(type="text", text=f"Insufficient balance. Available: {error['available']}")]
+        if error["error"] == "invalid_request":
+            logger.warning(f"잘못된 휴가 신청: {emp_id}, 종류: {l_type}, 기간: {days}")
+            return [TextContent(type="text", text="Invalid leave request.")]
         logger.warning(f"직원을 찾을 수 없음: {emp_id}")
         return [TextContent(type="text", text="Employee not found.")]
 
+    elif name == "submit_leave_requests":
+        requests = arguments["requests"]
+        outcome = await submit_leave_requests(employee_store, requests)
+        if outcome["ok"]:
+            logger.info(f"휴가 일괄 신청 완료: {len(requests)}건")
+        else:
+            logger.warning(f"휴가 일괄 신청 실패, 전체 취소: {outcome['errors']}")
+        return [TextContent(type="text", text=json.dumps(outcome, indent=2, ensure_ascii=False))]
+
     raise ValueError(f"Unknown tool: {name}")
 
 # ------------------------------------------------------------------------------
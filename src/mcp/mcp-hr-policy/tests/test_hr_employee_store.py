@@ -0,0 +1,84 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import employee_store  # noqa: E402
+
+
+def write_roster(path, employees):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(employees, f, ensure_ascii=False)
+
+
+def make_employee(emp_id, vacation=10):
+    return {"id": emp_id, "name": emp_id, "leave_balance": {"vacation": vacation}, "pending_requests": []}
+
+
+def test_store_journals_changes_and_flushes_snapshot_atomically(tmp_path):
+    path = str(tmp_path / "employees.json")
+    write_roster(path, [make_employee("emp_001"), make_employee("emp_002")])
+    store = employee_store.EmployeeStore(path, flush_delay=0.01)
+
+    async def scenario():
+        async with store.transaction(["emp_001"]) as employees:
+            employees["emp_001"]["leave_balance"]["vacation"] -= 3
+        # 스냅샷은 아직 기록 전이지만 저널에 남아 있어 다시 열어도 보존됨
+        assert json.load(open(path, encoding="utf-8"))[0]["leave_balance"]["vacation"] == 10
+        assert employee_store.EmployeeStore(path).get("emp_001")["leave_balance"]["vacation"] == 7
+        await store._flush_task
+
+    asyncio.run(scenario())
+    assert json.load(open(path, encoding="utf-8"))[0]["leave_balance"]["vacation"] == 7
+    assert sorted(os.listdir(tmp_path)) == ["employees.json"]
+
+
+def test_store_reloads_only_when_file_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / "employees.json")
+    write_roster(path, [make_employee("emp_001")])
+    store = employee_store.EmployeeStore(path)
+    loads = []
+    original_load = store._load
+    monkeypatch.setattr(store, "_load", lambda: (loads.append(1), original_load()))
+
+    for _ in range(5):
+        store.get("emp_001")
+    assert len(loads) == 1
+
+    write_roster(path, [make_employee("emp_001", vacation=20)])
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert store.get("emp_001")["leave_balance"]["vacation"] == 20
+    assert len(loads) == 2
+
+
+def test_load_and_snapshot_serialization_run_off_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "employees.json")
+    write_roster(path, [make_employee("emp_001")])
+    store = employee_store.EmployeeStore(path, flush_delay=0.01)
+    threads = {}
+    original_load, original_dumps = store._load, employee_store.json.dumps
+    monkeypatch.setattr(store, "_load", lambda: (threads.setdefault("load", threading.get_ident()), original_load()))
+
+    def dumps(obj, *args, **kwargs):
+        # 스냅샷(직원 목록) 직렬화만 기록하고 저널 한 줄 직렬화는 제외
+        if isinstance(obj, list):
+            threads["dumps"] = threading.get_ident()
+        return original_dumps(obj, *args, **kwargs)
+
+    monkeypatch.setattr(employee_store.json, "dumps", dumps)
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        assert (await store.get_async("emp_001"))["leave_balance"]["vacation"] == 10
+        async with store.transaction(["emp_001"]) as employees:
+            employees["emp_001"]["leave_balance"]["vacation"] -= 1
+        await store._flush_task
+        return loop_thread
+
+    loop_thread = asyncio.run(scenario())
+    assert threads["load"] != loop_thread
+    assert threads["dumps"] != loop_thread
+    assert json.load(open(path, encoding="utf-8"))[0]["leave_balance"]["vacation"] == 9
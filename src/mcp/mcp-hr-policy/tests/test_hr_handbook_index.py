@@ -0,0 +1,71 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from handbook_index import HandbookIndex, SEARCH_MAX_LIMIT, tokenize  # noqa: E402
+
+
+def write(path, content, mtime_ns=None):
+    path.write_text(content, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_tokenize_matches_korean_words_with_particles():
+    assert set(tokenize("휴가")) <= set(tokenize("연차 휴가는 이월됩니다"))
+    assert tokenize("Remote-Work 2회") == ["remote", "work", "2", "회"]
+
+
+def test_search_ranks_sections_across_documents(tmp_path):
+    write(tmp_path / "leave.md", "# Leave\n\n## 병가 (Sick Leave)\n병가는 연간 10일입니다. 3일 이상 병가는 소견서가 필요합니다.\n\n## 연차\n연차는 15일입니다.\n")
+    write(tmp_path / "remote.md", "## 원격 근무 (Remote Work)\n주 2회까지 원격 근무가 가능합니다.\n")
+    write(tmp_path / "employees.json", "[]")
+    index = HandbookIndex(str(tmp_path))
+
+    results = index.search("병가 소견서")
+    assert [(r["document"], r["heading"]) for r in results] == [("leave.md", "병가 (Sick Leave)")]
+    assert "소견서" in results[0]["snippet"]
+
+    results = index.search("remote work")
+    assert results[0]["document"] == "remote.md"
+    assert index.search("없는단어") == []
+
+
+def test_index_rebuilds_only_changed_files(tmp_path):
+    write(tmp_path / "a.md", "## Vacation\nvacation days carry over\n", mtime_ns=1_000_000_000)
+    write(tmp_path / "b.md", "## Expense\nsubmit expense reports\n", mtime_ns=1_000_000_000)
+    index = HandbookIndex(str(tmp_path))
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+
+    write(tmp_path / "b.md", "## Expense\nmeal limit is 50 dollars\n", mtime_ns=2_000_000_000)
+    assert index.refresh() == 1
+    assert index.search("meal")[0]["document"] == "b.md"
+    assert index.search("reports") == []
+
+    os.remove(tmp_path / "a.md")
+    assert index.search("vacation") == []
+    assert index._total_length == sum(s.length for s in index._sections.values())
+
+
+def test_snippet_centers_on_matched_terms(tmp_path):
+    body = "filler text. " * 40 + "the travel reimbursement deadline is 30 days. " + "more filler. " * 40
+    write(tmp_path / "expense.md", "## Travel\n" + body)
+    snippet = HandbookIndex(str(tmp_path)).search("reimbursement deadline")[0]["snippet"]
+    assert "reimbursement deadline" in snippet
+    assert snippet.startswith("...") and snippet.endswith("...")
+
+
+def test_unreadable_documents_are_skipped_and_limit_is_clamped(tmp_path):
+    (tmp_path / "broken.md").write_bytes(b"## Vacation\n\xff\xfe vacation")
+    for i in range(SEARCH_MAX_LIMIT + 5):
+        write(tmp_path / f"doc{i}.md", f"## Vacation {i}\nvacation policy {i}\n")
+    index = HandbookIndex(str(tmp_path))
+
+    results = index.search("vacation", limit=1000)
+    assert len(results) == SEARCH_MAX_LIMIT
+    assert "broken.md" not in {r["document"] for r in results}
+    assert len(index.search("vacation", limit=0)) == 1
+    # 읽지 못한 문서는 바뀌기 전까지 다시 읽지 않음
+    assert index.refresh() == 0
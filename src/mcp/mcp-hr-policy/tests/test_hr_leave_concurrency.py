@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from employee_store import EmployeeStore, submit_leave_requests  # noqa: E402
+
+EMPLOYEES = [f"emp_{i:03d}" for i in range(5)]
+
+
+def write_roster(path, vacation):
+    roster = [{"id": e, "name": e, "leave_balance": {"vacation": vacation, "sick": 5}, "pending_requests": []} for e in EMPLOYEES]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(roster, f)
+
+
+def test_parallel_leave_requests_never_lose_or_double_spend(tmp_path):
+    path = str(tmp_path / "employees.json")
+    write_roster(path, vacation=30)
+    store = EmployeeStore(path, flush_delay=0.001)
+    rng = random.Random(7)
+
+    async def one_request():
+        emp_id = rng.choice(EMPLOYEES)
+        return await submit_leave_requests(store, [{"employee_id": emp_id, "type": "vacation", "days": 1}])
+
+    async def batch_request():
+        # 여러 직원을 서로 다른 순서로 묶어도 교착 없이 처리되어야 함
+        chosen = rng.sample(EMPLOYEES, 3)
+        return await submit_leave_requests(store, [{"employee_id": e, "type": "vacation", "days": 1} for e in chosen])
+
+    async def scenario():
+        calls = [one_request() for _ in range(200)] + [batch_request() for _ in range(30)]
+        rng.shuffle(calls)
+        outcomes = await asyncio.wait_for(asyncio.gather(*calls), timeout=30)
+        await asyncio.sleep(0.05)
+        if store._flush_task is not None:
+            await store._flush_task
+        return outcomes
+
+    outcomes = asyncio.run(scenario())
+    granted = sum(len(o["results"]) for o in outcomes if o["ok"])
+    # 직원 5명 × 30일이 모두 소진될 만큼 요청했으므로 정확히 150일만 승인되어야 함
+    assert granted == len(EMPLOYEES) * 30
+
+    for emp_id in EMPLOYEES:
+        emp = store.get(emp_id)
+        assert emp["leave_balance"]["vacation"] == 0
+        assert len(emp["pending_requests"]) == 30
+
+    # 디스크에 기록된 스냅샷(+남은 저널)도 메모리 상태와 같아야 함
+    reopened = EmployeeStore(path)
+    for emp_id in EMPLOYEES:
+        assert reopened.get(emp_id) == store.get(emp_id)
+
+
+def test_batch_is_all_or_nothing(tmp_path):
+    path = str(tmp_path / "employees.json")
+    write_roster(path, vacation=2)
+    store = EmployeeStore(path, flush_delay=0.001)
+
+    async def scenario():
+        failed = await submit_leave_requests(store, [
+            {"employee_id": "emp_000", "type": "vacation", "days": 2},
+            {"employee_id": "emp_001", "type": "vacation", "days": 1},
+            {"employee_id": "emp_001", "type": "vacation", "days": 2},
+            {"employee_id": "emp_999", "type": "vacation", "days": 1},
+            {"employee_id": "emp_002", "type": "sick", "days": -3},
+            {"employee_id": 7, "type": "vacation", "days": 1},
+            "emp_003",
+        ])
+        ok = await submit_leave_requests(store, [
+            {"employee_id": "emp_000", "type": "vacation", "days": 1},
+            {"employee_id": "emp_000", "type": "sick", "days": 1},
+        ])
+        return failed, ok
+
+    failed, ok = asyncio.run(scenario())
+    assert not failed["ok"]
+    assert [(e["index"], e["error"]) for e in failed["errors"]] == [
+        (2, "insufficient_balance"), (3, "not_found"), (4, "invalid_request"),
+        (5, "invalid_request"), (6, "invalid_request"),
+    ]
+    assert store.get("emp_001")["leave_balance"]["vacation"] == 2
+    assert ok["ok"] and [r["balance"] for r in ok["results"]] == [1, 4]
+
+
+def test_interrupted_journal_write_is_ignored_on_reload(tmp_path):
+    path = str(tmp_path / "employees.json")
+    write_roster(path, vacation=10)
+    store = EmployeeStore(path, flush_delay=60)
+
+    async def scenario():
+        await submit_leave_requests(store, [{"employee_id": "emp_000", "type": "vacation", "days": 4}])
+
+    asyncio.run(scenario())
+    # 트랜잭션 기록 도중 중단된 것처럼 마지막 줄을 일부만 남김
+    line = json.dumps({"records": [{"id": "emp_001", "leave_balance": {"vacation": 0}}]})
+    with open(store.journal_path, "a", encoding="utf-8") as f:
+        f.write(line[: len(line) // 2])
+
+    reopened = EmployeeStore(path, flush_delay=60)
+    assert reopened.get("emp_000")["leave_balance"]["vacation"] == 6
+    assert reopened.get("emp_001")["leave_balance"]["vacation"] == 10
+
+    # 중단된 조각을 정리했으므로 이후 커밋한 트랜잭션도 다시 열었을 때 남아 있어야 함
+    async def after_restart():
+        return await submit_leave_requests(reopened, [{"employee_id": "emp_001", "type": "vacation", "days": 3}])
+
+    assert asyncio.run(after_restart())["ok"]
+    again = EmployeeStore(path)
+    assert again.get("emp_000")["leave_balance"]["vacation"] == 6
+    assert again.get("emp_001")["leave_balance"]["vacation"] == 7
@@ -0,0 +1,135 @@
+import bisect
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("sales-server")
+
+# 이름 검색 결과로 돌려줄 최대 후보 수와 최소 점수(검색어 트라이그램 중 일치 비율)
+MATCH_LIMIT = int(os.getenv("CRM_MATCH_LIMIT", "5"))
+MATCH_MIN_SCORE = float(os.getenv("CRM_MATCH_MIN_SCORE", "0.3"))
+# 1위 후보가 2위보다 이 점수 이상 앞서야 하나로 확정 (아니면 후보 목록 반환)
+MATCH_MARGIN = 0.15
+
+_WORD_RE = re.compile(r"[a-z0-9가-힣]+")
+
+
+def normalize_words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def trigrams(words: List[str]) -> Set[str]:
+    """단어별로 앞뒤에 공백을 붙여 트라이그램을 만듭니다. (짧은 단어와 단어 시작 일치도 반영)"""
+    grams = set()
+    for word in words:
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class CustomerIndex:
+    """
+    고객 데이터를 메모리에 유지하는 색인.
+    ID 맵과 이름 트라이그램/단어 접두어 색인으로 이름 검색을 하며,
+    customers.json의 수정 시각(mtime)이 바뀐 경우에만 다시 읽습니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._customers: List[dict] = []
+        self._by_id: Dict[str, dict] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._gram_counts: Dict[str, int] = {}
+        self._words: List[Tuple[str, str]] = []  # (이름 단어, 고객 ID) 정렬 목록 - 접두어 검색용
+        self._mtime: Optional[int] = None
+
+    def _load(self):
+        logger.info(f"고객 데이터 로딩 중: {self.path}")
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, "r", encoding="utf-8") as f:
+            customers = json.load(f)
+        by_id, grams, gram_counts, words = {}, {}, {}, []
+        for customer in customers:
+            cust_id = customer["id"]
+            by_id[cust_id.lower()] = customer
+            name_words = normalize_words(customer["name"])
+            name_grams = trigrams(name_words)
+            gram_counts[cust_id] = len(name_grams)
+            for gram in name_grams:
+                grams.setdefault(gram, set()).add(cust_id)
+            words.extend((word, cust_id) for word in set(name_words))
+        words.sort()
+        self._customers, self._by_id, self._grams = customers, by_id, grams
+        self._gram_counts, self._words, self._mtime = gram_counts, words, mtime
+
+    def _ensure_fresh(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if self._mtime is None or mtime != self._mtime:
+            self._load()
+
+    def customers(self) -> List[dict]:
+        self._ensure_fresh()
+        return self._customers
+
+    def get(self, cust_id: str) -> Optional[dict]:
+        self._ensure_fresh()
+        return self._by_id.get(cust_id.lower())
+
+    def _prefix_ids(self, word: str) -> Set[str]:
+        start = bisect.bisect_left(self._words, (word, ""))
+        ids = set()
+        for name_word, cust_id in self._words[start:]:
+            if not name_word.startswith(word):
+                break
+            ids.add(cust_id)
+        return ids
+
+    def match(self, query: str, limit: int = MATCH_LIMIT, min_score: float = MATCH_MIN_SCORE) -> List[Tuple[dict, float]]:
+        """
+        ID 또는 이름으로 고객을 찾아 (고객, 점수) 목록을 점수순으로 반환합니다.
+        ID가 정확히 일치하면 그 고객만 점수 1.0으로 반환합니다.
+        이름은 검색어 트라이그램이 얼마나 포함되는지로 점수를 매기고(오타 허용),
+        검색어 단어가 이름 단어의 접두어이면 가산점을 줍니다.
+        """
+        exact = self.get(query.strip())
+        if exact is not None:
+            return [(exact, 1.0)]
+
+        query_words = normalize_words(query)
+        query_grams = trigrams(query_words)
+        if not query_grams:
+            return []
+        shared: Dict[str, int] = {}
+        for gram in query_grams:
+            for cust_id in self._grams.get(gram, ()):
+                shared[cust_id] = shared.get(cust_id, 0) + 1
+        prefix_hits: Dict[str, int] = {}
+        for word in query_words:
+            for cust_id in self._prefix_ids(word):
+                prefix_hits[cust_id] = prefix_hits.get(cust_id, 0) + 1
+
+        scored = []
+        for cust_id in set(shared) | set(prefix_hits):
+            containment = shared.get(cust_id, 0) / len(query_grams)
+            # 이름이 짧을수록(검색어와 비슷한 길이일수록) 약간 우선
+            dice = 2 * shared.get(cust_id, 0) / (len(query_grams) + self._gram_counts[cust_id])
+            prefix = prefix_hits.get(cust_id, 0) / len(query_words)
+            score = min(1.0, 0.7 * containment + 0.2 * prefix + 0.1 * dice)
+            if score >= min_score:
+                scored.append((self._by_id[cust_id.lower()], round(score, 3)))
+        scored.sort(key=lambda item: (-item[1], item[0]["id"]))
+        return scored[:limit]
+
+    def resolve(self, query: str) -> Tuple[Optional[dict], List[Tuple[dict, float]]]:
+        """
+        검색어를 한 고객으로 확정할 수 있으면 (고객, 후보 목록)을, 애매하면 (None, 후보 목록)을 반환합니다.
+        """
+        candidates = self.match(query)
+        if not candidates:
+            return None, []
+        top_score = candidates[0][1]
+        if len(candidates) == 1 or top_score - candidates[1][1] >= MATCH_MARGIN:
+            return candidates[0][0], candidates
+        return None, candidates
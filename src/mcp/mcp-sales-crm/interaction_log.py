@@ -0,0 +1,167 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import date as date_type, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("sales-server")
+
+# 한 번에 돌려줄 상호작용 수 기본값/최대값
+INTERACTIONS_DEFAULT_LIMIT = int(os.getenv("CRM_INTERACTIONS_LIMIT", "10"))
+INTERACTIONS_MAX_LIMIT = 50
+# 모델에 보내는 응답 크기 상한: 노트 한 건의 최대 길이, 전체 노트 길이 합(문자)
+NOTE_MAX_CHARS = int(os.getenv("CRM_NOTE_MAX_CHARS", "500"))
+INTERACTIONS_MAX_CHARS = int(os.getenv("CRM_INTERACTIONS_MAX_CHARS", "4000"))
+
+_CURSOR_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})_(\d+)$")
+# ISO(YYYY-MM-DD) 외에 받아 주는 날짜 형식. 저장과 커서 비교는 항상 ISO 문자열로 합니다.
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%Y%m%d")
+
+
+def normalize_date(value: Any) -> str:
+    """날짜를 ISO(YYYY-MM-DD) 문자열로 맞춥니다. 해석할 수 없으면 ValueError를 냅니다."""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date_type):
+        return value.isoformat()
+    text = str(value or "").strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            pass
+    try:
+        # 2024-05-01T09:30:00 같은 ISO 일시는 날짜 부분만 사용
+        return datetime.fromisoformat(text).date().isoformat()
+    except ValueError:
+        raise ValueError(f"Invalid date: {value!r} (expected YYYY-MM-DD)") from None
+
+
+def encode_cursor(date: str, seq: int) -> str:
+    return f"{date}_{seq}"
+
+
+def parse_before(before: Optional[str]) -> Optional[Tuple[str, Optional[int]]]:
+    """before는 이전 응답의 next_before 커서('날짜_번호') 또는 날짜(YYYY-MM-DD)입니다."""
+    if not before:
+        return None
+    match = _CURSOR_RE.match(before)
+    if match:
+        return match.group(1), int(match.group(2))
+    if re.match(r"^\d{4}-\d{2}-\d{2}$", before):
+        return normalize_date(before), None
+    raise ValueError(f"Invalid before cursor: {before}")
+
+
+class InteractionLog:
+    """
+    고객별 상호작용(미팅/메일/통화) 기록을 SQLite(WAL 모드) 테이블에 추가 전용으로 쌓는 저장소.
+    새 기록은 한 행 INSERT로 끝나며, 조회는 (고객, 날짜, 번호) 인덱스로 최신순 페이지를 읽습니다.
+    처음 열 때 customers.json에 들어 있던 기존 interactions를 한 번만 옮겨 옵니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS interactions (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                cust_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                type TEXT NOT NULL,
+                notes TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_interactions_customer ON interactions (cust_id, date DESC, seq DESC);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def seed(self, customers: List[dict]) -> int:
+        """
+        customers.json의 기존 interactions(최신순)를 한 번만 옮겨 옵니다. 옮긴 건수를 반환합니다.
+        날짜는 ISO로 맞추고, 해석할 수 없는 날짜의 기록은 경고를 남기고 건너뜁니다.
+        """
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'seeded'").fetchone():
+                return 0
+            rows = []
+            for c in customers:
+                for i in reversed(c.get("interactions", [])):
+                    try:
+                        date = normalize_date(i.get("date"))
+                    except ValueError:
+                        logger.warning(f"날짜를 해석할 수 없는 상호작용 건너뜀: {c['id']}, 날짜: {i.get('date')!r}")
+                        continue
+                    rows.append((c["id"], date, i.get("type", "Note"), i.get("notes", "")))
+            self._conn.executemany("INSERT INTO interactions (cust_id, date, type, notes) VALUES (?, ?, ?, ?)", rows)
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('seeded', '1')")
+        logger.info(f"기존 상호작용 {len(rows)}건을 기록 저장소로 이전")
+        return len(rows)
+
+    def append(self, cust_id: str, date: str, type_: str, notes: str) -> int:
+        """기록 한 건을 추가합니다. date가 ISO로 해석되지 않으면 ValueError를 냅니다."""
+        date = normalize_date(date)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO interactions (cust_id, date, type, notes) VALUES (?, ?, ?, ?)",
+                (cust_id, date, type_, notes)
+            )
+        return cursor.lastrowid
+
+    def recent(self, cust_id: str, limit: int = INTERACTIONS_DEFAULT_LIMIT, before: Optional[str] = None,
+               date_from: Optional[str] = None, date_to: Optional[str] = None,
+               max_chars: int = INTERACTIONS_MAX_CHARS) -> Dict[str, Any]:
+        """
+        최신순(날짜, 기록 순서) 상호작용 페이지를 반환합니다.
+        노트가 길면 NOTE_MAX_CHARS에서 자르고, 노트 길이 합이 max_chars를 넘으면 그 앞에서 멈춥니다.
+        다음 페이지가 있으면 next_before 커서를 함께 반환합니다.
+        """
+        limit = max(1, min(limit, INTERACTIONS_MAX_LIMIT))
+        clauses, params = ["cust_id = ?"], [cust_id]
+        if date_from:
+            clauses.append("date >= ?")
+            params.append(normalize_date(date_from))
+        if date_to:
+            clauses.append("date <= ?")
+            params.append(normalize_date(date_to))
+        boundary = parse_before(before)
+        if boundary is not None:
+            date, seq = boundary
+            if seq is None:
+                clauses.append("date < ?")
+                params.append(date)
+            else:
+                clauses.append("(date < ? OR (date = ? AND seq < ?))")
+                params.extend([date, date, seq])
+        # 다음 페이지 유무를 알기 위해 하나 더 조회
+        query = f"SELECT seq, date, type, notes FROM interactions WHERE {' AND '.join(clauses)} ORDER BY date DESC, seq DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, [*params, limit + 1]).fetchall()
+
+        interactions, used = [], 0
+        for row in rows[:limit]:
+            notes = row["notes"]
+            if len(notes) > NOTE_MAX_CHARS:
+                notes = notes[:NOTE_MAX_CHARS] + "..."
+            if interactions and used + len(notes) > max_chars:
+                break
+            used += len(notes)
+            interactions.append({"date": row["date"], "type": row["type"], "notes": notes, "_seq": row["seq"]})
+
+        has_more = len(interactions) < len(rows)
+        next_before = None
+        if has_more:
+            last = interactions[-1]
+            next_before = encode_cursor(last["date"], last["_seq"])
+        for item in interactions:
+            del item["_seq"]
+        return {"interactions": interactions, "next_before": next_before}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
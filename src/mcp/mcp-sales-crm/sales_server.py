@@ -11,6 +11,9 @@ from starlette.applications import Starlette
 from starlette.routing import Route
 from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource, Resource
 
+from customer_index import CustomerIndex
+from interaction_log import InteractionLog, INTERACTIONS_DEFAULT_LIMIT
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -24,17 +27,33 @@ app = Server("sales-crm")
 # Mock 데이터 경로 설정 (customers.json 파일을 사용)
 DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "customers.json")
 
-def load_data():
-    """customers.json 파일에서 데이터를 읽어옵니다."""
-    logger.info(f"고객 데이터 로딩 중: {DATA_PATH}")
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def save_data(data):
-    """데이터를 customers.json 파일에 저장합니다."""
-    logger.info(f"고객 데이터 저장 중: {DATA_PATH}")
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+# 고객 데이터는 메모리에 한 번 적재하고 ID 맵과 이름 색인으로 조회 (파일이 바뀌면 다시 적재)
+customer_index = CustomerIndex(DATA_PATH)
+
+# 상호작용 기록은 고객별 추가 전용 로그(SQLite)에 저장 (customers.json의 기존 기록은 처음 한 번만 이전)
+INTERACTIONS_DB_PATH = os.getenv("CRM_INTERACTIONS_DB", os.path.join(os.path.dirname(__file__), "data", "interactions.db"))
+interaction_log = InteractionLog(INTERACTIONS_DB_PATH)
+interaction_log.seed(customer_index.customers())
+
+def find_customer(query):
+    """
+    ID 또는 이름(오타 허용)으로 고객을 찾습니다.
+    한 고객으로 확정되면 (고객, None), 애매하면 (None, 후보 안내 응답), 없으면 (None, None)을 반환합니다.
+    """
+    customer, candidates = customer_index.resolve(query)
+    if customer is not None:
+        return customer, None
+    if not candidates:
+        return None, None
+    logger.info(f"고객 후보 {len(candidates)}건, 확정 불가: {query}")
+    payload = {
+        "message": f"Multiple customers match '{query}'. Retry with the exact customer ID.",
+        "candidates": [
+            {"id": c["id"], "name": c["name"], "segment": c.get("segment"), "score": score}
+            for c, score in candidates
+        ]
+    }
+    return None, [TextContent(type="text", text=json.dumps(payload, indent=2, ensure_ascii=False))]
 
 # ------------------------------------------------------------------------------
 # Tools (도구) 정의
@@ -47,7 +66,7 @@ async def list_tools() -> list[Tool]:
     return [
         Tool(
             name="get_customer_profile",
-            description="Retrieve customer profile including revenue and risk status. (고객의 기본 프로필 정보를 조회합니다)",
+            description="Retrieve customer profile including revenue and risk status. Ambiguous names return a list of candidate IDs. (고객의 기본 프로필 정보를 조회합니다. 이름이 애매하면 후보 목록을 반환합니다)",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -58,11 +77,15 @@ async def list_tools() -> list[Tool]:
         ),
         Tool(
             name="get_recent_interactions",
-            description="Get a list of recent notes/emails/meetings for a customer. (고객의 최근 상담/미팅 이력을 조회합니다)",
+            description="Get recent notes/emails/meetings for a customer, newest first. Results are paged; pass next_before as before to get older ones. (고객의 최근 상담/미팅 이력을 최신순으로 조회합니다)",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "cust_name_or_id": {"type": "string", "description": "Client Name or ID (고객명 또는 ID)"}
+                    "cust_name_or_id": {"type": "string", "description": "Client Name or ID (고객명 또는 ID)"},
+                    "limit": {"type": "integer", "description": "Max interactions to return, up to 50 (최대 건수)", "default": INTERACTIONS_DEFAULT_LIMIT},
+                    "before": {"type": "string", "description": "next_before cursor from a previous call, or a date YYYY-MM-DD (이전 페이지 커서 또는 날짜)"},
+                    "date_from": {"type": "string", "description": "Earliest date YYYY-MM-DD, inclusive (시작일)"},
+                    "date_to": {"type": "string", "description": "Latest date YYYY-MM-DD, inclusive (종료일)"}
                 },
                 "required": ["cust_name_or_id"]
             }
@@ -86,12 +109,12 @@ async def list_tools() -> list[Tool]:
 async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
     """클라이언트가 도구 실행을 요청했을 때 호출됩니다."""
     logger.info(f"도구 실행 요청: {name}, 인자: {arguments}")
-    data = load_data()
     
     if name == "get_customer_profile":
-        query = arguments["cust_name_or_id"].lower()
-        # 간단한 검색 구현 (이름 포함 여부 또는 ID 일치 여부)
-        customer = next((c for c in data if query in c["name"].lower() or query == c["id"].lower()), None)
+        query = arguments["cust_name_or_id"]
+        customer, ambiguous = find_customer(query)
+        if ambiguous:
+            return ambiguous
         
         if customer:
             logger.info(f"고객 프로필 조회 성공: {query}")
@@ -102,12 +125,26 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageCo
         return [TextContent(type="text", text=f"Customer '{query}' not found.")]
 
     elif name == "get_recent_interactions":
-        query = arguments["cust_name_or_id"].lower()
-        customer = next((c for c in data if query in c["name"].lower() or query == c["id"].lower()), None)
+        query = arguments["cust_name_or_id"]
+        customer, ambiguous = find_customer(query)
+        if ambiguous:
+            return ambiguous
         
         if customer:
-            logger.info(f"최근 활동 내역 조회 성공: {query}")
-            return [TextContent(type="text", text=json.dumps(customer["interactions"], indent=2, ensure_ascii=False))]
+            try:
+                page = await asyncio.to_thread(
+                    interaction_log.recent,
+                    customer["id"],
+                    limit=int(arguments.get("limit", INTERACTIONS_DEFAULT_LIMIT)),
+                    before=arguments.get("before"),
+                    date_from=arguments.get("date_from"),
+                    date_to=arguments.get("date_to")
+                )
+            except ValueError as e:
+                return [TextContent(type="text", text=str(e))]
+            logger.info(f"최근 활동 내역 조회 성공: {query}, {len(page['interactions'])}건")
+            payload = {"customer_id": customer["id"], "customer_name": customer["name"], **page}
+            return [TextContent(type="text", text=json.dumps(payload, indent=2, ensure_ascii=False))]
         logger.warning(f"고객을 찾을 수 없음: {query} (get_recent_interactions)")
         return [TextContent(type="text", text=f"Customer '{query}' not found.")]
 
@@ -116,12 +153,13 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageCo
         note = arguments["note"]
         date = arguments.get("date", datetime.now().strftime("%Y-%m-%d"))
         
-        customer = next((c for c in data if c["id"] == cust_id), None)
+        customer = customer_index.get(cust_id)
         if customer:
-            new_interaction = {"date": date, "type": "Meeting", "notes": note}
-            # 최신순으로 맨 앞에 추가
-            customer["interactions"].insert(0, new_interaction) 
-            save_data(data)
+            # 고객 파일 전체를 다시 쓰지 않고 로그에 한 건만 추가 (SQLite 쓰기는 이벤트 루프 밖에서)
+            try:
+                await asyncio.to_thread(interaction_log.append, customer["id"], date, "Meeting", note)
+            except ValueError as e:
+                return [TextContent(type="text", text=str(e))]
             logger.info(f"미팅 노트 추가 완료: {cust_id}, 날짜: {date}, 내용: {note}")
             return [TextContent(type="text", text=f"Note added to {customer['name']} successfully.")]
         logger.warning(f"고객 ID를 찾을 수 없음: {cust_id} (add_meeting_note)")
@@ -151,7 +189,7 @@ async def read_resource(uri: str) -> str | bytes:
     logger.info(f"리소스 읽기 요청: {uri}")
     uri = str(uri) # Pydantic AnyUrl 타입을 문자열로 변환
     if uri == "sales://dashboard":
-        data = load_data()
+        data = customer_index.customers()
         # 리스크 점수가 High인 고객만 필터링
         high_risk = [c["name"] for c in data if c["risk_score"] == "High"]
         logger.info(f"대시보드 생성 완료. 고위험 고객 수: {len(high_risk)}명")
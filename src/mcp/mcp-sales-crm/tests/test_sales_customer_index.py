@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from customer_index import CustomerIndex  # noqa: E402
+
+CUSTOMERS = [
+    {"id": "cust_001", "name": "태산 물산 (Acme Corp)", "segment": "Enterprise", "interactions": []},
+    {"id": "cust_002", "name": "베타 주식회사 (Beta Inc)", "segment": "SMB", "interactions": []},
+    {"id": "cust_003", "name": "Acme Logistics", "segment": "SMB", "interactions": []},
+    {"id": "cust_004", "name": "Globex Corporation", "segment": "Enterprise", "interactions": []},
+]
+
+
+def make_index(tmp_path):
+    path = tmp_path / "customers.json"
+    path.write_text(json.dumps(CUSTOMERS, ensure_ascii=False), encoding="utf-8")
+    return CustomerIndex(str(path))
+
+
+def test_exact_id_and_clear_name_matches_resolve_to_one_customer(tmp_path):
+    index = make_index(tmp_path)
+    assert index.resolve("CUST_004")[0]["name"] == "Globex Corporation"
+    assert index.resolve("베타")[0]["id"] == "cust_002"
+    # 오타가 있어도 찾음
+    assert index.resolve("globx corp")[0]["id"] == "cust_004"
+    # 띄어쓰기가 달라도 찾음
+    assert index.resolve("태산물산")[0]["id"] == "cust_001"
+    assert index.resolve("zzzz") == (None, [])
+
+
+def test_ambiguous_name_returns_ranked_candidates(tmp_path):
+    index = make_index(tmp_path)
+    customer, candidates = index.resolve("acme")
+    assert customer is None
+    assert {c["id"] for c, _ in candidates} == {"cust_001", "cust_003"}
+    # 더 구체적인 검색어는 하나로 확정
+    assert index.resolve("acme logistics")[0]["id"] == "cust_003"
+    scores = [score for _, score in index.match("acme")]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_index_reloads_only_when_file_changes(tmp_path):
+    index = make_index(tmp_path)
+    loads = []
+    original_load = index._load
+    index._load = lambda: (loads.append(1), original_load())
+    for _ in range(5):
+        index.match("beta")
+    assert len(loads) == 1
+
+    path = tmp_path / "customers.json"
+    updated = CUSTOMERS + [{"id": "cust_005", "name": "Initech", "segment": "SMB", "interactions": []}]
+    path.write_text(json.dumps(updated), encoding="utf-8")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert index.resolve("initech")[0]["id"] == "cust_005"
+    assert len(loads) == 2
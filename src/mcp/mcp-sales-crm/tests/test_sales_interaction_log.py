@@ -0,0 +1,80 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import interaction_log as log_module  # noqa: E402
+from interaction_log import InteractionLog  # noqa: E402
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = InteractionLog(str(tmp_path / "interactions.db"))
+    yield log
+    log.close()
+
+
+def test_seed_runs_once_and_keeps_newest_first_order(log):
+    customers = [{"id": "cust_001", "interactions": [
+        {"date": "2024-03-10", "type": "Meeting", "notes": "newer"},
+        {"date": "2024-02-15", "type": "Email", "notes": "older"},
+    ]}]
+    assert log.seed(customers) == 2
+    assert log.seed(customers) == 0
+    page = log.recent("cust_001")
+    assert [i["notes"] for i in page["interactions"]] == ["newer", "older"]
+    assert page["next_before"] is None
+
+
+def test_recent_pages_with_before_cursor_and_date_range(log):
+    for day in range(1, 8):
+        log.append("cust_001", f"2024-05-0{day}", "Meeting", f"note {day}")
+    log.append("cust_001", "2024-05-07", "Email", "same day, logged later")
+    log.append("cust_002", "2024-05-09", "Meeting", "other customer")
+
+    page = log.recent("cust_001", limit=3)
+    assert [i["notes"] for i in page["interactions"]] == ["same day, logged later", "note 7", "note 6"]
+    page = log.recent("cust_001", limit=3, before=page["next_before"])
+    assert [i["notes"] for i in page["interactions"]] == ["note 5", "note 4", "note 3"]
+
+    page = log.recent("cust_001", date_from="2024-05-02", date_to="2024-05-03")
+    assert [i["notes"] for i in page["interactions"]] == ["note 3", "note 2"]
+    page = log.recent("cust_001", before="2024-05-02")
+    assert [i["notes"] for i in page["interactions"]] == ["note 1"]
+
+    with pytest.raises(ValueError):
+        log.recent("cust_001", before="yesterday")
+
+
+def test_payload_is_bounded(log, monkeypatch):
+    monkeypatch.setattr(log_module, "NOTE_MAX_CHARS", 100)
+    for day in range(1, 10):
+        log.append("cust_001", f"2024-06-0{day}", "Meeting", "x" * 1000)
+
+    page = log.recent("cust_001", limit=100, max_chars=250)
+    # 노트는 100자에서 잘리고, 합계 250자를 넘기 전에 멈추며 다음 커서를 돌려줌
+    assert len(page["interactions"]) == 2
+    assert all(len(i["notes"]) == 103 for i in page["interactions"])
+    assert page["next_before"] == "2024-06-08_8"
+
+
+def test_dates_are_normalized_to_iso_and_invalid_dates_rejected(log):
+    customers = [{"id": "cust_001", "interactions": [
+        {"date": "2024/03/10", "type": "Meeting", "notes": "slashes"},
+        {"date": "yesterday", "type": "Email", "notes": "unparseable"},
+        {"date": "2024-02-15T09:30:00", "type": "Call", "notes": "datetime"},
+    ]}]
+    assert log.seed(customers) == 2
+    log.append("cust_001", "2024.04.01", "Meeting", "dots")
+    with pytest.raises(ValueError):
+        log.append("cust_001", "04/01/2024", "Meeting", "not iso")
+    with pytest.raises(ValueError):
+        log.append("cust_001", "2024-13-01", "Meeting", "bad month")
+
+    page = log.recent("cust_001", limit=2)
+    assert [(i["date"], i["notes"]) for i in page["interactions"]] == [("2024-04-01", "dots"), ("2024-03-10", "slashes")]
+    page = log.recent("cust_001", limit=2, before=page["next_before"])
+    assert [(i["date"], i["notes"]) for i in page["interactions"]] == [("2024-02-15", "datetime")]
+    assert page["next_before"] is None